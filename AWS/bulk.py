@@ -0,0 +1,10 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import bulk
+
+# Bulk generation for a batch manifest using Bedrock, e.g.:
+#   python AWS/bulk.py run services.yaml --out jobs/nightly
+if __name__ == '__main__':
+    sys.exit(bulk.main(provider='bedrock'))
@@ -1,52 +1,43 @@
 import subprocess
-import ollama
+import sys
+from pathlib import Path
 
-def get_full_git_diff():
-    try:
-        # Get the full unified diff (actual code changes)
-        result = subprocess.run(
-            ['git', 'diff', 'HEAD~1', 'HEAD'],
-            capture_output=True, text=True, check=True
-        )
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import console, daemon, gitdiff
 
-        return result.stdout.strip()
 
+def get_full_git_diff():
+    try:
+        # Ranked, filtered diff of the last commit, cut to the prompt budget
+        return gitdiff.read_diff('HEAD~1', 'HEAD')
     except subprocess.CalledProcessError as e:
         print("Error running git diff:", e)
         return None
 
-def create_commit_message(diff_text):
+def create_commit_message(diff_text, on_chunk=None):
     if not diff_text:
         return None
 
-    prompt = (
-        "Based on the following Git diff, generate a concise and meaningful commit message :\n\n"
-        f"{diff_text}"
-    )
     try:
-        client = boto3.client('bedrock-runtime', region_name='us-east-1')
-        body = {
-            "inputText": prompt,
-            "textGenerationConfig": {
-                "temperature": 0.2,
-                "maxTokenCount": 800
-            }
-        }
-        response = client.invoke_model(
-            modelId='amazon.titan-text-express-v1',
-            body=json.dumps(body),
-            contentType='application/json'
-        )
-        result = json.loads(response['body'].read())
-        return result['results'][0]['outputText']
-    except ClientError as e:
+        return daemon.request('commit', 'bedrock', on_chunk=on_chunk, diff_text=diff_text)
+    except Exception as e:
         print(f"Bedrock- Git Commit Error: {e}")
         return None
+# A revision range argument (e.g. v1.2.0..HEAD) suggests a message for every commit in it
+if len(sys.argv) > 1:
+    from devopsgpt import commitrange
+    sys.exit(commitrange.run('bedrock', sys.argv[1]))
+
 # Main flow
 diff_text = get_full_git_diff()
 if diff_text:
-    commit_msg = create_commit_message(diff_text)
+    printer = console.StreamPrinter("\nSuggested Commit Message:\n")
+    try:
+        commit_msg = create_commit_message(diff_text, on_chunk=printer)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        commit_msg = None
     if commit_msg:
-        print("\nSuggested Commit Message:\n", commit_msg)
+        printer.finish(commit_msg)
 else:
     print("No diff found or git command failed.")
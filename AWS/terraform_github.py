@@ -1,71 +1,19 @@
-import ollama
-from pathlib import Path
 import os
+import sys
+from pathlib import Path
 
-PROMPT_TEMPLATE = """
-Generate an ideal GitHub Action for a Terraform application following best practices.
-
-Requirements:
-1. Run the workflow on these branches: {BRANCH}. If the branch is 'main', trigger only on pull requests.
-2. Set permissions:
-   contents: read
-   pull-requests: write
-3. Inside the job, do the following:
-   a. Create environment variables for GitHub token and cloud credentials: {CREDENTIALS}, and specify the Terraform working directory: {TF_DIR}.
-   b. Set verbosity for Terraform logs.
-   c. Run the following steps in order:
-      - checkout
-      - setup Terraform
-      - terraform fmt
-      - terraform sec scan
-      - terraform lint
-      - terraform validate
-      - terraform plan
-   d. For `terraform plan`, if `github.event_name == 'pull_request'`, run a script that:
-      - collects the outputs of each Terraform step
-      - formats them into a comment
-      - uses `github.rest.issues.createComment` to post the result back to the pull request
-"""
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import console, daemon, writer
 
-def get_credentials(cloud):
-    """Return credentials required for a given cloud provider"""
-    cloud = cloud.strip().lower()
-    cloud_cred = {
-        'aws': 'AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY',
-        'azure': 'ARM_CLIENT_ID, ARM_CLIENT_SECRET, ARM_SUBSCRIPTION_ID, and ARM_TENANT_ID',
-        'google': 'GOOGLE_CREDENTIALS as JSON',
-    }
-    return cloud_cred.get(cloud, 'Unknown credentials (please update mapping)')
 
-def generate_githubaction(cloud, branch, tf_dir="."):
-    """Generate GitHub Action YAML using Ollama"""
-    credentials = get_credentials(cloud)
-    if "Unknown" in credentials:
-        print(f"Unsupported cloud: {cloud}")
-        return None
-
-    prompt = PROMPT_TEMPLATE.format(
-        CREDENTIALS=credentials,
-        BRANCH=branch,
-        TF_DIR=tf_dir
-    )
+def generate_githubaction(cloud, branch, tf_dir=".", on_chunk=None, customization=None):
+    """Generate GitHub Action YAML using Bedrock"""
     try:
-        client = boto3.client('bedrock-runtime', region_name='us-east-1')
-        body = {
-            "inputText": prompt,
-            "textGenerationConfig": {
-                "temperature": 0.2,
-                "maxTokenCount": 800
-            }
-        }
-        response = client.invoke_model(
-            modelId='amazon.titan-text-express-v1',
-            body=json.dumps(body),
-            contentType='application/json'
+        return daemon.request(
+            'terraform', 'bedrock', on_chunk=on_chunk, cloud=cloud, branch=branch, tf_dir=tf_dir,
+            customization=customization
         )
-        result = json.loads(response['body'].read())
-        return result['results'][0]['outputText']
-    except ClientError as e:
+    except Exception as e:
         print(f"Error generating GitHub Action YAML:: {e}")
         return None
 
@@ -73,9 +21,10 @@ def save_yamlfile(content, path='.'):
     """Save generated YAML file"""
     yamlfile_path = Path(path) / 'terraform.yml'
     try:
-        with open(yamlfile_path, 'w') as f:
-            f.write(content)
-        print(f"\n YAML file saved to: {yamlfile_path.resolve()}")
+        if writer.write_file(yamlfile_path, content, 'bedrock', 'terraform') == writer.UNCHANGED:
+            print(f"\n YAML file unchanged: {yamlfile_path.resolve()}")
+        else:
+            print(f"\n YAML file saved to: {yamlfile_path.resolve()}")
     except Exception as e:
         print(f" Error saving YAML file: {e}")
 
@@ -93,13 +42,18 @@ def main():
         branch = "main"
 
     tf_dir = input("Enter the Terraform directory path [default: '.']: ").strip() or '.'
+    customization = input("Any customisation for the workflow? (type 'no' to skip): ").strip()
 
     print("\n Generating GitHub Action YAML...")
-    yamlfile = generate_githubaction(cloud, branch, tf_dir)
+    printer = console.StreamPrinter("\n--- Generated YAML ---\n")
+    try:
+        yamlfile = generate_githubaction(cloud, branch, tf_dir, on_chunk=printer, customization=customization)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        return
 
     if yamlfile:
-        print("\n--- Generated YAML ---\n")
-        print(yamlfile)
+        printer.finish(yamlfile)
 
         save = input("\n Save this YAML to file? (y/n): ").lower()
         if save == 'y':
@@ -1,54 +1,44 @@
 import subprocess
-import ollama
+import sys
+from pathlib import Path
 
-def get_full_git_diff():
-    try:
-        # Get the full unified diff (actual code changes)
-        result = subprocess.run(
-            ['git', 'diff', 'HEAD~1', 'HEAD'],
-            capture_output=True, text=True, check=True
-        )
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import console, daemon, gitdiff
 
-        return result.stdout.strip()
 
+def get_full_git_diff():
+    try:
+        # Ranked, filtered diff of the last commit, cut to the prompt budget
+        return gitdiff.read_diff('HEAD~1', 'HEAD')
     except subprocess.CalledProcessError as e:
         print("Error running git diff:", e)
         return None
 
-def create_commit_message(diff_text):
+def create_commit_message(diff_text, on_chunk=None):
     if not diff_text:
         return None
 
-    prompt = (
-        "Based on the following Git diff, generate a concise and meaningful commit message :\n\n"
-        f"{diff_text}"
-    )
-
     try:
-        azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-        api_key = os.getenv("AZURE_OPENAI_KEY")
-        deployment = os.getenv("AZURE_DEPLOYMENT_NAME")
-        headers = {
-            "api-key": api_key,
-            "Content-Type": "application/json"
-        }
-        data = {
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.2
-        }
-        response = requests.post(
-            f"{azure_endpoint}/openai/deployments/{deployment}/chat/completions?api-version=2023-07-01-preview",
-            headers=headers, json=data
-        )
-        return response.json()['choices'][0]['message']['content']
+        return daemon.request('commit', 'azure_openai', on_chunk=on_chunk, diff_text=diff_text)
     except Exception as e:
         print(f"Azure Error: {e}")
         return None
+
+# A revision range argument (e.g. v1.2.0..HEAD) suggests a message for every commit in it
+if len(sys.argv) > 1:
+    from devopsgpt import commitrange
+    sys.exit(commitrange.run('azure_openai', sys.argv[1]))
+
 # Main flow
 diff_text = get_full_git_diff()
 if diff_text:
-    commit_msg = create_commit_message(diff_text)
+    printer = console.StreamPrinter("\nSuggested Commit Message:\n")
+    try:
+        commit_msg = create_commit_message(diff_text, on_chunk=printer)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        commit_msg = None
     if commit_msg:
-        print("\nSuggested Commit Message:\n", commit_msg)
+        printer.finish(commit_msg)
 else:
     print("No diff found or git command failed.")
@@ -1,55 +1,46 @@
 import subprocess
-import os
-from google import genai
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import console, daemon, gitdiff
+
 
 def get_full_git_diff():
     try:
-        result = subprocess.run(
-            ['git', 'diff', 'HEAD~1', 'HEAD'],
-            capture_output=True, text=True, check=True
-        )
-        return result.stdout.strip()
+        # Ranked, filtered diff of the last commit, cut to the prompt budget
+        return gitdiff.read_diff('HEAD~1', 'HEAD')
     except subprocess.CalledProcessError as e:
         print("❌ Error running git diff:", e)
         return None
 
-def create_commit_message(diff_text):
+def create_commit_message(diff_text, on_chunk=None):
     if not diff_text:
         return None
 
-    prompt = (
-        "Based on the following Git diff, generate a concise and meaningful commit message:\n\n"
-        f"{diff_text}"
-    )
-
     try:
-        api_key_env = os.getenv("GEMINI_API_KEY")
-        if not api_key_env:
-            print("❌ GEMINI_API_KEY environment variable not set.")
-            return None
-
-        genai.configure(api_key=api_key_env)
-        model = genai.GenerativeModel('gemini-1.5-pro')
-        response = model.generate_content(
-            [prompt],
-            generation_config={
-                'temperature': 0.2,
-                'max_output_tokens': 100,
-            }
-        )
-        
-        return response.candidates[0].content.parts[0].text
+        return daemon.request('commit', 'gemini', on_chunk=on_chunk, diff_text=diff_text)
     except Exception as e:
         print(f" Error generating commit message using Gemini: {e}")
         return None
 
+# A revision range argument (e.g. v1.2.0..HEAD) suggests a message for every commit in it
+if len(sys.argv) > 1:
+    from devopsgpt import commitrange
+    sys.exit(commitrange.run('gemini', sys.argv[1]))
+
 # Main flow
 diff_text = get_full_git_diff()
 
 if diff_text:
-    commit_msg = create_commit_message(diff_text)
+    printer = console.StreamPrinter("\n Suggested Commit Message:\n")
+    try:
+        commit_msg = create_commit_message(diff_text, on_chunk=printer)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        commit_msg = None
     if commit_msg:
-        print("\n Suggested Commit Message:\n", commit_msg)
+        printer.finish(commit_msg)
     else:
         print(" Failed to generate commit message.")
 else:
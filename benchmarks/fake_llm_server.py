@@ -0,0 +1,344 @@
+"""Local stand-in for every LLM API DevopsGPT talks to.
+
+One threaded HTTP server answers the request shapes of
+
+* Ollama            POST /api/chat                                    (NDJSON when streaming)
+* Bedrock runtime   POST /model/<id>/invoke, /invoke-with-response-stream (AWS event stream)
+* Azure AI Foundry  POST /score
+* Azure OpenAI      POST /openai/deployments/<name>/chat/completions  (SSE when streaming)
+* Gemini (REST)     POST /v1beta/models/<model>:generateContent, :streamGenerateContent
+* Ollama embeddings POST /api/embed                                   (hashed character trigrams)
+
+Each answer waits a configurable first-byte latency and then emits tokens at a
+configurable rate, so client overhead can be separated from model time.
+
+Run standalone with ``python benchmarks/fake_llm_server.py --port 11500`` or
+embed it via FakeLLMServer.
+"""
+import argparse
+import base64
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_OUTPUT = (
+    "FROM python:3.12-slim AS runtime\n"
+    "WORKDIR /app\n"
+    "COPY requirements.txt .\n"
+    "RUN pip install --no-cache-dir -r requirements.txt\n"
+    "COPY . .\n"
+    "RUN useradd --create-home appuser\n"
+    "USER appuser\n"
+    "EXPOSE 8000\n"
+    "CMD [\"python\", \"app.py\"]\n"
+)
+
+
+class Profile:
+    """Latency and throughput of the simulated model"""
+
+    def __init__(self, latency_ms=100, jitter_ms=20, tokens_per_sec=200, output_tokens=120):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+
+    def first_byte_delay(self):
+        return max(0.0, (self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0)
+
+    def token_delay(self):
+        return 1.0 / self.tokens_per_sec if self.tokens_per_sec else 0.0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+def _tokens(count):
+    words = re.findall(r'\S+\s*', SAMPLE_OUTPUT)
+    return [words[i % len(words)] for i in range(count)]
+
+
+def _embedding(text, dimensions=256):
+    """Deterministic stand-in embedding: hashed character trigrams, so similar strings score close"""
+    vector = [0.0] * dimensions
+    text = f"  {text.lower()}  "
+    for i in range(len(text) - 2):
+        vector[zlib.crc32(text[i:i + 3].encode()) % dimensions] += 1.0
+    return vector
+
+
+def _event_message(payload):
+    """Encode one AWS event-stream message carrying a Bedrock response chunk"""
+    headers = b''
+    for name, value in ((':event-type', 'chunk'), (':content-type', 'application/json'), (':message-type', 'event')):
+        name, value = name.encode(), value.encode()
+        headers += bytes([len(name)]) + name + bytes([7]) + len(value).to_bytes(2, 'big') + value
+    total = 12 + len(headers) + len(payload) + 4
+    prelude = total.to_bytes(4, 'big') + len(headers).to_bytes(4, 'big')
+    message = prelude + zlib.crc32(prelude).to_bytes(4, 'big') + headers + payload
+    return message + zlib.crc32(message).to_bytes(4, 'big')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; Nagle would hold the body for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/_stats':
+            self._send_json(self.server.owner.stats())
+        else:
+            self._send_json({'error': 'not found'}, 404)
+
+    def do_POST(self):
+        started = time.perf_counter()
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+        path = self.path.split('?', 1)[0]
+        if path == '/api/embed':
+            # Not a generation: answered at once and left out of the stats
+            inputs = body.get('input') or ''
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            self._send_json({'model': body.get('model', ''), 'embeddings': [_embedding(text) for text in inputs]})
+            return
+        profile = self.server.owner.profile
+        tokens = _tokens(profile.output_tokens)
+        prompt_tokens = len(json.dumps(body)) // 4
+        time.sleep(profile.first_byte_delay())
+
+        if path == '/api/chat':
+            self._ollama(body, tokens, profile, prompt_tokens)
+        elif path.startswith('/model/') and path.endswith('/invoke-with-response-stream'):
+            self._bedrock_stream(tokens, profile, prompt_tokens)
+        elif path.startswith('/model/') and path.endswith('/invoke'):
+            self._finish_generation(profile, tokens)
+            self._send_json({
+                'inputTextTokenCount': prompt_tokens,
+                'results': [{'outputText': ''.join(tokens), 'tokenCount': len(tokens), 'completionReason': 'FINISH'}],
+            })
+        elif path == '/score':
+            self._finish_generation(profile, tokens)
+            self._send_json({'output': [''.join(tokens)]})
+        elif path.startswith('/openai/deployments/'):
+            self._azure_openai(body, tokens, profile, prompt_tokens)
+        elif path.endswith(':streamGenerateContent'):
+            self._gemini_stream(tokens, profile, prompt_tokens)
+        elif path.endswith(':generateContent'):
+            self._finish_generation(profile, tokens)
+            self._send_json({
+                'candidates': [self._gemini_candidate(''.join(tokens), 'STOP')],
+                'usageMetadata': self._gemini_usage(prompt_tokens, len(tokens)),
+            })
+        else:
+            self._send_json({'error': 'not found'}, 404)
+            return
+        self.server.owner.record(time.perf_counter() - started)
+
+    def _finish_generation(self, profile, tokens):
+        time.sleep(profile.token_delay() * len(tokens))
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+    def _chunk(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def _ollama(self, body, tokens, profile, prompt_tokens):
+        stamp = '2024-01-01T00:00:00Z'
+        model = body.get('model', 'llama3')
+        if not body.get('stream', True):
+            self._finish_generation(profile, tokens)
+            self._send_json({
+                'model': model, 'created_at': stamp, 'done': True, 'done_reason': 'stop',
+                'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                'prompt_eval_count': prompt_tokens, 'eval_count': len(tokens),
+            })
+            return
+        self._start_chunked('application/x-ndjson')
+        for token in tokens:
+            time.sleep(profile.token_delay())
+            self._chunk(json.dumps({
+                'model': model, 'created_at': stamp, 'done': False,
+                'message': {'role': 'assistant', 'content': token},
+            }) + '\n')
+        self._chunk(json.dumps({
+            'model': model, 'created_at': stamp, 'done': True, 'done_reason': 'stop',
+            'message': {'role': 'assistant', 'content': ''},
+            'prompt_eval_count': prompt_tokens, 'eval_count': len(tokens),
+        }) + '\n')
+        self._end_chunked()
+
+    def _bedrock_stream(self, tokens, profile, prompt_tokens):
+        self._start_chunked('application/vnd.amazon.eventstream')
+        for index, token in enumerate(tokens):
+            time.sleep(profile.token_delay())
+            chunk = {'outputText': token, 'index': 0}
+            if index == len(tokens) - 1:
+                chunk['completionReason'] = 'FINISH'
+                chunk['amazon-bedrock-invocationMetrics'] = {
+                    'inputTokenCount': prompt_tokens, 'outputTokenCount': len(tokens),
+                }
+            payload = json.dumps({'bytes': base64.b64encode(json.dumps(chunk).encode()).decode()}).encode()
+            self._chunk(_event_message(payload))
+        self._end_chunked()
+
+    def _azure_openai(self, body, tokens, profile, prompt_tokens):
+        if not body.get('stream'):
+            self._finish_generation(profile, tokens)
+            self._send_json({
+                'choices': [{
+                    'index': 0, 'finish_reason': 'stop',
+                    'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                }],
+                'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': len(tokens)},
+            })
+            return
+        self._start_chunked('text/event-stream')
+        for token in tokens:
+            time.sleep(profile.token_delay())
+            event = {'choices': [{'index': 0, 'delta': {'content': token}, 'finish_reason': None}]}
+            self._chunk(f"data: {json.dumps(event)}\n\n")
+        self._chunk(f"data: {json.dumps({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})}\n\n")
+        self._chunk("data: [DONE]\n\n")
+        self._end_chunked()
+
+    @staticmethod
+    def _gemini_candidate(text, finish_reason=None):
+        candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}
+        if finish_reason:
+            candidate['finishReason'] = finish_reason
+        return candidate
+
+    @staticmethod
+    def _gemini_usage(prompt_tokens, completion_tokens):
+        return {
+            'promptTokenCount': prompt_tokens,
+            'candidatesTokenCount': completion_tokens,
+            'totalTokenCount': prompt_tokens + completion_tokens,
+        }
+
+    def _gemini_stream(self, tokens, profile, prompt_tokens):
+        # The REST transport reads a streamed JSON array of GenerateContentResponse objects
+        self._start_chunked('application/json')
+        self._chunk('[')
+        for index, token in enumerate(tokens):
+            time.sleep(profile.token_delay())
+            last = index == len(tokens) - 1
+            response = {'candidates': [self._gemini_candidate(token, 'STOP' if last else None)]}
+            if last:
+                response['usageMetadata'] = self._gemini_usage(prompt_tokens, len(tokens))
+            prefix = ',' if index else ''
+            self._chunk(prefix + json.dumps(response))
+        self._chunk(']')
+        self._end_chunked()
+
+
+class FakeLLMServer:
+    """Threaded stand-in server; use as a context manager or call start()/stop()"""
+
+    def __init__(self, host='127.0.0.1', port=0, profile=None):
+        self.profile = profile or Profile()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.owner = self
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._server_seconds = 0.0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, seconds):
+        with self._lock:
+            self._requests += 1
+            self._server_seconds += seconds
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self._requests, 'server_seconds': self._server_seconds}
+
+    def environment(self):
+        """Environment variables that point every DevopsGPT backend at this server"""
+        return {
+            'OLLAMA_HOST': self.url,
+            'AWS_ENDPOINT_URL_BEDROCK_RUNTIME': self.url,
+            'AWS_ACCESS_KEY_ID': 'benchmark',
+            'AWS_SECRET_ACCESS_KEY': 'benchmark',
+            'AWS_REGION': 'us-east-1',
+            'AZURE_AI_ENDPOINT': f"{self.url}/score",
+            'AZURE_AI_TOKEN': 'benchmark',
+            'AZURE_OPENAI_ENDPOINT': self.url,
+            'AZURE_OPENAI_KEY': 'benchmark',
+            'AZURE_DEPLOYMENT_NAME': 'benchmark',
+            'GEMINI_API_KEY': 'benchmark',
+            'GEMINI_API_ENDPOINT': self.url,
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve fake Ollama, Bedrock, Azure and Gemini endpoints")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11500)
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--tokens-per-sec', type=float, default=200)
+    parser.add_argument('--output-tokens', type=int, default=120)
+    args = parser.parse_args(argv)
+
+    profile = Profile(args.latency_ms, args.jitter_ms, args.tokens_per_sec, args.output_tokens)
+    server = FakeLLMServer(args.host, args.port, profile)
+    print(f"Fake LLM server listening on {server.url}")
+    for name, value in server.environment().items():
+        print(f"export {name}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == '__main__':
+    main()
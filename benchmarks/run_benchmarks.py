@@ -0,0 +1,277 @@
+"""Benchmark the generation paths against the local stand-in LLM server.
+
+Every provider is pointed at benchmarks/fake_llm_server.py, so the numbers
+measure DevopsGPT itself (prompt building, client pooling, HTTP handling,
+map-reduce for commits) on top of a known, fixed model latency. For every
+provider, target and concurrency level the run reports wall time,
+throughput, p50/p95/p99 latency and client overhead (client latency minus
+the time the server spent on the request).
+
+Usage:
+    python benchmarks/run_benchmarks.py [--providers ollama,bedrock] [--concurrency 1,4,16]
+        [--requests 32] [--latency-ms 100] [--tokens-per-sec 200] [--stream] [--cache] [--validate]
+        [--output results.json] [--baseline old.json --tolerance 0.2]
+
+Results are written to benchmarks/results/ unless --output is given. With
+--baseline, any p95 or client overhead worse than the baseline by more than
+the tolerance is listed and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fake_llm_server import FakeLLMServer, Profile
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+PROVIDERS = ('ollama', 'bedrock', 'azure', 'azure_openai', 'gemini')
+TARGETS = ('dockerfile', 'dockerfile_patch', 'docker_ci', 'docker_ci_patch', 'terraform', 'terraform_patch', 'commit')
+
+SAMPLE_DIFF = """diff --git a/app.py b/app.py
+index 3b18e51..a9c4d2f 100644
+--- a/app.py
++++ b/app.py
+@@ -1,6 +1,9 @@
+ from flask import Flask
++from flask import jsonify
+
+ app = Flask(__name__)
+
+ @app.route("/")
+ def index():
+-    return "ok"
++    return jsonify(status="ok")
++
++
+"""
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))]
+
+
+def _targets(commitmsg, generators, diff_text):
+    return {
+        'dockerfile': lambda provider, on_chunk: generators.generate_dockerfile(
+            provider, 'python', 'no', root=REPO_ROOT, on_chunk=on_chunk
+        ),
+        # An extra requirement sends the rendered template to the model for patching
+        'dockerfile_patch': lambda provider, on_chunk: generators.generate_dockerfile(
+            provider, 'python', 'expose port 9000', root=REPO_ROOT, on_chunk=on_chunk
+        ),
+        'docker_ci': lambda provider, on_chunk: generators.generate_docker_ci(
+            provider, 'main', '.', 'acme', 'api', on_chunk=on_chunk
+        ),
+        'docker_ci_patch': lambda provider, on_chunk: generators.generate_docker_ci(
+            provider, 'main', '.', 'acme', 'api', on_chunk=on_chunk, customization='also push a git sha tag'
+        ),
+        'terraform': lambda provider, on_chunk: generators.generate_githubaction(
+            provider, 'aws', 'main', 'infra', on_chunk=on_chunk
+        ),
+        'terraform_patch': lambda provider, on_chunk: generators.generate_githubaction(
+            provider, 'aws', 'main', 'infra', on_chunk=on_chunk, customization='run nightly at 02:00 UTC'
+        ),
+        'commit': lambda provider, on_chunk: commitmsg.generate_commit_message(
+            provider, diff_text, on_chunk=on_chunk
+        ),
+    }
+
+
+def _timed_call(call, provider, stream):
+    first = []
+
+    def on_chunk(chunk):
+        if not first:
+            first.append(time.perf_counter())
+
+    started = time.perf_counter()
+    text = call(provider, on_chunk if stream else None)
+    finished = time.perf_counter()
+    if not text:
+        raise RuntimeError("empty response")
+    ttfb = (first[0] if first else finished) - started
+    return finished - started, ttfb
+
+
+def run_case(server, call, provider, target, concurrency, requests, stream):
+    """Run requests calls at the given concurrency and return one result row"""
+    before = server.stats()
+    latencies = []
+    ttfbs = []
+    errors = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(_timed_call, call, provider, stream) for _ in range(requests)]
+        for future in futures:
+            try:
+                latency, ttfb = future.result()
+                latencies.append(latency)
+                ttfbs.append(ttfb)
+            except Exception as e:
+                errors.append(str(e))
+    wall = time.perf_counter() - started
+    after = server.stats()
+
+    row = {
+        'provider': provider,
+        'target': target,
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': len(errors),
+        'wall_s': round(wall, 4),
+        'throughput_rps': round(len(latencies) / wall, 3) if wall else 0.0,
+    }
+    if errors:
+        row['first_error'] = errors[0]
+    if latencies:
+        # One benchmark call can issue several model requests (commit map-reduce, continuations)
+        server_s = (after['server_seconds'] - before['server_seconds']) / len(latencies)
+        mean = sum(latencies) / len(latencies)
+        row.update(
+            mean_ms=round(mean * 1000, 2),
+            p50_ms=round(percentile(latencies, 0.50) * 1000, 2),
+            p95_ms=round(percentile(latencies, 0.95) * 1000, 2),
+            p99_ms=round(percentile(latencies, 0.99) * 1000, 2),
+            server_ms=round(server_s * 1000, 2),
+            client_overhead_ms=round((mean - server_s) * 1000, 2),
+            model_calls=after['requests'] - before['requests'],
+        )
+        if stream:
+            row['ttfb_p50_ms'] = round(percentile(ttfbs, 0.50) * 1000, 2)
+    return row
+
+
+def compare(results, baseline, tolerance):
+    """Rows whose p95 or client overhead regressed by more than tolerance against baseline"""
+    previous = {(row['provider'], row['target'], row['concurrency']): row for row in baseline.get('results', [])}
+    regressions = []
+    for row in results:
+        old = previous.get((row['provider'], row['target'], row['concurrency']))
+        if not old:
+            continue
+        for metric in ('p95_ms', 'client_overhead_ms'):
+            if metric not in row or metric not in old:
+                continue
+            # A few milliseconds of noise on tiny values is not a regression
+            limit = old[metric] * (1 + tolerance) + 5
+            if row[metric] > limit:
+                regressions.append(
+                    f"{row['provider']}/{row['target']} x{row['concurrency']}: {metric} {old[metric]} -> {row[metric]}"
+                )
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_table(rows):
+    columns = ('provider', 'target', 'concurrency', 'throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms',
+               'client_overhead_ms', 'errors')
+    print("  ".join(f"{column:>18}" for column in columns))
+    for row in rows:
+        print("  ".join(f"{str(row.get(column, '-')):>18}" for column in columns))
+
+
+def _csv(value, cast=str):
+    return [cast(item.strip()) for item in value.split(',') if item.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DevopsGPT against a local stand-in LLM server")
+    parser.add_argument('--providers', default=','.join(PROVIDERS))
+    parser.add_argument('--targets', default=','.join(TARGETS))
+    parser.add_argument('--concurrency', default='1,4,16', help="comma-separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=32, help="calls per provider, target and concurrency level")
+    parser.add_argument('--latency-ms', type=float, default=100, help="simulated time to first token")
+    parser.add_argument('--jitter-ms', type=float, default=20)
+    parser.add_argument('--tokens-per-sec', type=float, default=200, help="simulated generation speed")
+    parser.add_argument('--output-tokens', type=int, default=120)
+    parser.add_argument('--stream', action='store_true', help="stream responses and record time to first chunk")
+    parser.add_argument('--cache', action='store_true', help="leave the response cache on (off by default)")
+    parser.add_argument('--validate', action='store_true',
+                        help="validate and repair output (off by default: the stand-in text is not a valid artifact)")
+    parser.add_argument('--output', help="where to write the JSON results")
+    parser.add_argument('--baseline', help="earlier results JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown against the baseline")
+    args = parser.parse_args(argv)
+
+    profile = Profile(args.latency_ms, args.jitter_ms, args.tokens_per_sec, args.output_tokens)
+    server = FakeLLMServer(profile=profile).start()
+    try:
+        # The environment has to be in place before devopsgpt reads its settings at import
+        os.environ.update(server.environment())
+        if not args.cache:
+            os.environ['DEVOPSGPT_CACHE'] = '0'
+        if not args.validate:
+            os.environ['DEVOPSGPT_VALIDATE'] = '0'
+        os.environ.pop('DEVOPSGPT_HEDGE_BACKUP', None)
+        sys.path.insert(0, str(REPO_ROOT))
+        from devopsgpt import commitmsg, generators
+
+        targets = _targets(commitmsg, generators, SAMPLE_DIFF)
+        rows = []
+        for provider in _csv(args.providers):
+            for target in _csv(args.targets):
+                # Warm up once so connection setup and client creation are not in the percentiles
+                try:
+                    _timed_call(targets[target], provider, args.stream)
+                except Exception as e:
+                    print(f"Skipping {provider}/{target}: {e}")
+                    continue
+                for concurrency in _csv(args.concurrency, int):
+                    row = run_case(server, targets[target], provider, target, concurrency, args.requests, args.stream)
+                    rows.append(row)
+                    print(f"{provider}/{target} x{concurrency}: p95 {row.get('p95_ms')} ms, "
+                          f"{row['throughput_rps']} req/s, overhead {row.get('client_overhead_ms')} ms")
+    finally:
+        server.stop()
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'profile': profile.as_dict(),
+            'stream': args.stream,
+            'cache': args.cache,
+            'validate': args.validate,
+        },
+        'results': rows,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print()
+    _print_table(rows)
+    print(f"\nResults saved to {output}")
+
+    failed = any(row['errors'] for row in rows)
+    if args.baseline:
+        regressions = compare(rows, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions against baseline.")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1 @@
+"""Shared building blocks used by the provider scripts in AWS/, Azure/, Google/ and local_llm/."""
@@ -0,0 +1,5 @@
+import sys
+
+from devopsgpt.cli import main
+
+sys.exit(main())
@@ -0,0 +1,510 @@
+"""Project analyzer for repositories and monorepos.
+
+analyze() walks a tree concurrently with os.scandir and returns the facts
+the prompts need for every project in it: languages, dependency manifests
+and the packages they declare, lockfiles, entry points, listening ports and
+framework hints. inspect() does the same for a single directory.
+
+Results are kept in an index keyed by directory and file mtimes
+(~/.cache/devopsgpt/projects/, DEVOPSGPT_ANALYZER_INDEX to move it).
+Directories whose mtime is unchanged are not listed again, and a project's
+facts are re-parsed only when one of the files they came from changed, so
+repeat scans of large trees stay well under a second.
+
+Usage: python -m devopsgpt.analyzer [root] [--json] [--no-index]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+INDEX_DIR = os.getenv("DEVOPSGPT_ANALYZER_INDEX", str(Path.home() / ".cache" / "devopsgpt" / "projects"))
+MAX_WORKERS = int(os.getenv("DEVOPSGPT_ANALYZER_WORKERS", "16"))
+INDEX_VERSION = 2
+MAX_READ_BYTES = 256 * 1024
+MAX_LISTED_DEPENDENCIES = 15
+
+SKIP_DIRS = {
+    '.git', '.hg', '.svn', 'node_modules', 'vendor', 'venv', '.venv', 'env', '__pycache__',
+    '.tox', '.mypy_cache', '.pytest_cache', 'dist', 'build', 'target', '.terraform', '.idea',
+    '.vscode', '.gradle', '.next', 'coverage', 'bower_components',
+}
+
+MANIFESTS = {
+    'requirements.txt': 'python',
+    'pyproject.toml': 'python',
+    'Pipfile': 'python',
+    'setup.py': 'python',
+    'package.json': 'javascript',
+    'pom.xml': 'java',
+    'build.gradle': 'java',
+    'build.gradle.kts': 'java',
+    'go.mod': 'golang',
+    'Gemfile': 'ruby',
+    'composer.json': 'php',
+}
+
+LOCKFILES = {
+    'poetry.lock': 'python', 'Pipfile.lock': 'python', 'uv.lock': 'python',
+    'package-lock.json': 'javascript', 'yarn.lock': 'javascript', 'pnpm-lock.yaml': 'javascript',
+    'gradle.lockfile': 'java', 'go.sum': 'golang', 'Gemfile.lock': 'ruby', 'composer.lock': 'php',
+}
+
+ENTRYPOINTS = {
+    'main.py': 'python', 'app.py': 'python', 'manage.py': 'python', 'wsgi.py': 'python',
+    'asgi.py': 'python', 'server.py': 'python', 'run.py': 'python',
+    'index.js': 'javascript', 'server.js': 'javascript', 'app.js': 'javascript',
+    'src/index.js': 'javascript', 'src/index.ts': 'javascript', 'src/main.ts': 'javascript',
+    'main.go': 'golang',
+    'config.ru': 'ruby', 'app.rb': 'ruby', 'bin/rails': 'ruby',
+    'public/index.php': 'php', 'index.php': 'php', 'artisan': 'php',
+}
+
+# Other files that may name a port. Not the Dockerfile: it is generated from these facts,
+# so reading its EXPOSE back would make every run depend on the previous one's output
+PORT_SOURCES = (
+    'Procfile', '.env', '.env.example', 'docker-compose.yml', 'compose.yaml',
+    'src/main/resources/application.properties', 'src/main/resources/application.yml',
+    'config/puma.rb',
+)
+
+EXTENSIONS = {
+    '.py': 'python',
+    '.js': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript', '.jsx': 'javascript',
+    '.ts': 'javascript', '.tsx': 'javascript',
+    '.java': 'java', '.kt': 'java',
+    '.go': 'golang',
+    '.rb': 'ruby',
+    '.php': 'php',
+    '.rs': 'rust', '.cs': 'csharp', '.tf': 'terraform',
+}
+
+FRAMEWORKS = {
+    'django': 'Django', 'flask': 'Flask', 'fastapi': 'FastAPI', 'gunicorn': 'Gunicorn',
+    'uvicorn': 'Uvicorn', 'streamlit': 'Streamlit', 'celery': 'Celery',
+    'express': 'Express', 'next': 'Next.js', 'react': 'React', 'vue': 'Vue', '@nestjs/core': 'NestJS',
+    'fastify': 'Fastify', 'koa': 'Koa', '@angular/core': 'Angular', 'nuxt': 'Nuxt', 'svelte': 'Svelte',
+    'spring-boot-starter-web': 'Spring Boot', 'spring-boot-starter-webflux': 'Spring Boot',
+    'quarkus-core': 'Quarkus', 'micronaut-runtime': 'Micronaut',
+    'github.com/gin-gonic/gin': 'Gin', 'github.com/labstack/echo/v4': 'Echo',
+    'github.com/gofiber/fiber/v2': 'Fiber', 'github.com/go-chi/chi/v5': 'chi',
+    'rails': 'Rails', 'sinatra': 'Sinatra', 'puma': 'Puma', 'hanami': 'Hanami',
+    'laravel/framework': 'Laravel', 'symfony/framework-bundle': 'Symfony', 'slim/slim': 'Slim',
+}
+
+_PORT_PATTERNS = [re.compile(pattern, re.I) for pattern in (
+    r'\bEXPOSE\s+(\d{2,5})',
+    r'\bPORT\b\s*[=:]\s*["\']?(\d{2,5})',
+    r'\bport\s*[=:]\s*["\']?(\d{2,5})',
+    r'\.listen\(\s*(\d{2,5})',
+    r'PORT\s*(?:\|\||\?\?|or)\s*(\d{2,5})',
+    r'(?:0\.0\.0\.0|localhost|127\.0\.0\.1)?:(\d{2,5})["\']',
+    r'--port[= ](\d{2,5})',
+)]
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read(MAX_READ_BYTES).decode('utf-8', errors='replace')
+    except OSError:
+        return None
+
+
+def _requirements(text):
+    names = []
+    for line in text.splitlines():
+        line = line.split('#', 1)[0].strip()
+        if not line or line.startswith('-'):
+            continue
+        match = re.match(r'[A-Za-z0-9][A-Za-z0-9._\-]*', line)
+        if match:
+            names.append(match.group(0).lower())
+    return names
+
+
+def _pyproject(text):
+    try:
+        import tomllib
+        data = tomllib.loads(text)
+    except Exception:
+        data = None
+    if data is not None:
+        names = _requirements("\n".join(data.get('project', {}).get('dependencies', [])))
+        poetry = data.get('tool', {}).get('poetry', {}).get('dependencies', {})
+        return names + [name.lower() for name in poetry if name.lower() != 'python']
+    block = re.search(r'^dependencies\s*=\s*\[(.*?)\]', text, re.S | re.M)
+    return _requirements("\n".join(re.findall(r'["\']([^"\']+)["\']', block.group(1)))) if block else []
+
+
+def _pipfile(text):
+    section = re.search(r'^\[packages\](.*?)(?=^\[|\Z)', text, re.S | re.M)
+    return re.findall(r'^([A-Za-z0-9][A-Za-z0-9._\-]*)\s*=', section.group(1), re.M) if section else []
+
+
+def _package_json(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [], {}
+    if not isinstance(data, dict):
+        return [], {}
+    names = list(data.get('dependencies') or {}) + list(data.get('devDependencies') or {})
+    return names, data
+
+
+def _pom(text):
+    return re.findall(r'<dependency>.*?<artifactId>\s*([^<\s]+)\s*</artifactId>', text, re.S)
+
+
+def _gradle(text):
+    return re.findall(r'(?:implementation|api|compileOnly|runtimeOnly)\s*\(?\s*["\'][^:"\']+:([^:"\']+)', text)
+
+
+def _go_mod(text):
+    block = re.findall(r'^require\s*\((.*?)^\)', text, re.S | re.M)
+    lines = "\n".join(block) + "\n" + "\n".join(re.findall(r'^require\s+(\S+\s+\S+)', text, re.M))
+    return re.findall(r'^\s*(\S+)\s+v[\w.\-+]+', lines, re.M)
+
+
+def _gemfile(text):
+    return re.findall(r'^\s*gem\s+["\']([^"\']+)["\']', text, re.M)
+
+
+def _composer(text):
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return []
+    return [name for name in data.get('require') or {} if name != 'php' and not name.startswith('ext-')]
+
+
+_PARSERS = {
+    'requirements.txt': _requirements,
+    'pyproject.toml': _pyproject,
+    'Pipfile': _pipfile,
+    'pom.xml': _pom,
+    'build.gradle': _gradle,
+    'build.gradle.kts': _gradle,
+    'go.mod': _go_mod,
+    'Gemfile': _gemfile,
+    'composer.json': _composer,
+}
+
+
+def find_ports(text):
+    """Ports named in source or config text, most explicit forms first"""
+    found = []
+    for pattern in _PORT_PATTERNS:
+        for match in pattern.finditer(text):
+            port = int(match.group(1))
+            if 1 <= port <= 65535 and port not in found:
+                found.append(port)
+    return found
+
+
+# Files in a directory listing that can contribute facts
+_CANDIDATES = set(MANIFESTS) | set(LOCKFILES) | set(PORT_SOURCES) | set(ENTRYPOINTS)
+
+
+def input_paths(path='.'):
+    """Every file inspect() may read for the project in path, whether or not it exists yet"""
+    path = Path(path)
+    return sorted({path / name for name in _CANDIDATES} | set(path.glob('cmd/*/main.go')))
+
+
+def inspect(path='.', names=None):
+    """Return the facts for the project in directory path
+
+    names is the directory listing, when the caller already has it.
+    """
+    path = Path(path)
+    if names is None:
+        try:
+            names = [entry.name for entry in os.scandir(path) if entry.is_file()]
+        except OSError:
+            names = []
+    present = set(names)
+    # Entry points and configs one level down that are worth a direct check
+    nested = [name for name in list(ENTRYPOINTS) + list(PORT_SOURCES) if '/' in name and (path / name).is_file()]
+    nested += sorted(p.relative_to(path).as_posix() for p in path.glob('cmd/*/main.go'))
+
+    facts = {
+        'path': str(path),
+        'languages': [],
+        'manifests': [],
+        'lockfiles': [],
+        'entrypoints': [],
+        'ports': [],
+        'frameworks': [],
+        'dependencies': {},
+    }
+    package = {}
+    for name in sorted(present & set(MANIFESTS)):
+        facts['manifests'].append(name)
+        text = _read(path / name) or ''
+        if name == 'package.json':
+            facts['dependencies'][name], package = _package_json(text)
+        elif name in _PARSERS:
+            facts['dependencies'][name] = _PARSERS[name](text)
+        else:
+            facts['dependencies'][name] = []
+    facts['lockfiles'] = sorted(present & set(LOCKFILES))
+
+    main = package.get('main')
+    if main and (path / main).is_file():
+        facts['entrypoints'].append(main)
+    for name in list(ENTRYPOINTS) + nested:
+        if (name in present or name in nested) and name not in facts['entrypoints']:
+            facts['entrypoints'].append(name)
+
+    start = (package.get('scripts') or {}).get('start', '')
+    for source in [*facts['entrypoints'], *(n for n in PORT_SOURCES if n in present or n in nested)]:
+        for port in find_ports(_read(path / source) or ''):
+            if port not in facts['ports']:
+                facts['ports'].append(port)
+    for port in find_ports(start):
+        if port not in facts['ports']:
+            facts['ports'].append(port)
+
+    languages = []
+    for name in facts['manifests'] + facts['lockfiles'] + facts['entrypoints']:
+        language = MANIFESTS.get(name) or LOCKFILES.get(name) or ENTRYPOINTS.get(name)
+        if name.endswith('main.go'):
+            language = 'golang'
+        if language and language not in languages:
+            languages.append(language)
+    facts['languages'] = languages
+
+    for names in facts['dependencies'].values():
+        for dependency in names:
+            framework = FRAMEWORKS.get(dependency.lower()) or FRAMEWORKS.get(dependency)
+            if framework and framework not in facts['frameworks']:
+                facts['frameworks'].append(framework)
+    return facts
+
+
+def describe(facts, language=None):
+    """Compact, prompt-ready summary of a project's facts"""
+    manifests = facts['manifests']
+    if language:
+        matching = [name for name in manifests if MANIFESTS.get(name) == language]
+        manifests = matching or manifests
+    parts = []
+    for name in manifests:
+        dependencies = facts['dependencies'].get(name) or []
+        listed = ', '.join(dependencies[:MAX_LISTED_DEPENDENCIES])
+        more = len(dependencies) - MAX_LISTED_DEPENDENCIES
+        if dependencies:
+            parts.append(f"install from {name} ({listed}{f' and {more} more' if more > 0 else ''})")
+        else:
+            parts.append(f"install from {name}")
+    lockfiles = [name for name in facts['lockfiles'] if not language or LOCKFILES.get(name) == language]
+    if lockfiles:
+        parts.append(f"lockfile {', '.join(lockfiles)}")
+    if facts['frameworks']:
+        parts.append(f"frameworks {', '.join(facts['frameworks'])}")
+    if facts['entrypoints']:
+        parts.append(f"entry point {facts['entrypoints'][0]}")
+    if facts['ports']:
+        parts.append(f"listens on {', '.join(str(port) for port in facts['ports'][:3])}")
+    return "; ".join(parts)
+
+
+class Index:
+    """Directory listings and project facts from earlier scans, keyed by mtime"""
+
+    def __init__(self, root, directory=INDEX_DIR):
+        digest = hashlib.sha1(str(Path(root).resolve()).encode()).hexdigest()[:16]
+        self.path = Path(directory).expanduser() / f"{digest}.json"
+        self.dirs = {}
+        self.projects = {}
+        try:
+            data = json.loads(self.path.read_text())
+            if data.get('version') == INDEX_VERSION:
+                self.dirs = data['dirs']
+                self.projects = data['projects']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self, dirs, projects):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'dirs': dirs, 'projects': projects}, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not save analyzer index: {e}")
+
+
+def _list_dir(path, cached):
+    """Return (listing, rescanned) for one directory, reusing cached when its mtime is unchanged"""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, False
+    if cached and cached['mtime'] == mtime:
+        return cached, False
+    files = []
+    dirs = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            dirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return None, False
+    extensions = {}
+    for name in files:
+        language = EXTENSIONS.get(os.path.splitext(name)[1].lower())
+        if language:
+            extensions[language] = extensions.get(language, 0) + 1
+    listing = {
+        'mtime': mtime,
+        'dirs': sorted(dirs),
+        'files': len(files),
+        'languages': extensions,
+        'candidates': sorted(name for name in files if name in _CANDIDATES),
+    }
+    return listing, True
+
+
+def _input_stats(path, names):
+    stats = {}
+    for name in names:
+        try:
+            st = os.stat(os.path.join(path, name))
+            stats[name] = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            pass
+    return stats
+
+
+def _project(path, listing, cached):
+    """Facts for a directory with a manifest, re-parsed only if an input changed"""
+    inputs = listing['candidates'] + [
+        name for name in list(ENTRYPOINTS) + list(PORT_SOURCES) if '/' in name
+    ] + [p.relative_to(path).as_posix() for p in Path(path).glob('cmd/*/main.go')]
+    if cached:
+        # Entry points found through package.json "main" are read for ports too
+        inputs += cached['facts']['entrypoints']
+    stats = _input_stats(path, inputs)
+    if cached and cached['dir_mtime'] == listing['mtime'] and cached['inputs'] == stats:
+        return cached
+    facts = inspect(path, listing['candidates'])
+    stats = _input_stats(path, inputs + facts['entrypoints'])
+    return {'dir_mtime': listing['mtime'], 'inputs': stats, 'facts': facts}
+
+
+def project_facts(path='.', use_index=True):
+    """inspect() for one directory, served from the index while none of its inputs changed"""
+    if not use_index:
+        return inspect(path)
+    index = Index(path)
+    listing, fresh = _list_dir(path, index.dirs.get('.'))
+    if listing is None:
+        return inspect(path)
+    cached = index.projects.get('.')
+    project = _project(path, listing, cached)
+    if fresh or project is not cached:
+        index.dirs['.'] = listing
+        index.projects['.'] = project
+        index.save(index.dirs, index.projects)
+    facts = dict(project['facts'])
+    facts['path'] = str(path)
+    return facts
+
+
+def analyze(root='.', use_index=True, max_workers=None):
+    """Walk root and return the facts for every project found in it"""
+    started = time.perf_counter()
+    root = Path(root).resolve()
+    index = Index(root) if use_index else None
+    old_dirs = index.dirs if index else {}
+    old_projects = index.projects if index else {}
+    dirs = {}
+    projects = {}
+    rescanned = 0
+
+    def visit(rel):
+        path = root / rel if rel != '.' else root
+        listing, fresh = _list_dir(path, old_dirs.get(rel))
+        if listing is None:
+            return rel, None, None, False
+        project = None
+        if any(name in MANIFESTS for name in listing['candidates']):
+            project = _project(path, listing, old_projects.get(rel))
+        return rel, listing, project, fresh
+
+    with ThreadPoolExecutor(max_workers=max_workers or MAX_WORKERS) as pool:
+        pending = {pool.submit(visit, '.')}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                rel, listing, project, fresh = future.result()
+                if listing is None:
+                    continue
+                dirs[rel] = listing
+                rescanned += fresh
+                if project is not None:
+                    projects[rel] = project
+                for name in listing['dirs']:
+                    child = name if rel == '.' else f"{rel}/{name}"
+                    pending.add(pool.submit(visit, child))
+
+    if index is not None and (rescanned or dirs.keys() != old_dirs.keys() or projects != old_projects):
+        index.save(dirs, projects)
+
+    languages = {}
+    for listing in dirs.values():
+        for language, count in listing['languages'].items():
+            languages[language] = languages.get(language, 0) + count
+    found = []
+    for rel in sorted(projects):
+        facts = dict(projects[rel]['facts'])
+        facts['path'] = rel
+        found.append(facts)
+    return {
+        'root': str(root),
+        'directories': len(dirs),
+        'files': sum(listing['files'] for listing in dirs.values()),
+        'rescanned_directories': rescanned,
+        'languages': dict(sorted(languages.items(), key=lambda item: -item[1])),
+        'projects': found,
+        'seconds': round(time.perf_counter() - started, 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Detect projects, dependencies, entry points and ports in a repository")
+    parser.add_argument('root', nargs='?', default='.')
+    parser.add_argument('--json', action='store_true', help="print the full result as JSON")
+    parser.add_argument('--no-index', action='store_true', help="ignore and do not update the index")
+    args = parser.parse_args(argv)
+
+    result = analyze(args.root, use_index=not args.no_index)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return 0
+    print(f"{result['files']} files in {result['directories']} directories "
+          f"({result['rescanned_directories']} rescanned) in {result['seconds']}s")
+    for facts in result['projects']:
+        print(f"{facts['path']}: {', '.join(facts['languages']) or 'unknown'} - {describe(facts)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,526 @@
+"""Long-lived provider clients shared by every generator script.
+
+Each client is built once per process and reused, so repeated generations
+keep their HTTP keep-alive connections instead of paying for a new TLS
+handshake and credential lookup on every call.
+"""
+import json
+import os
+import threading
+import time
+
+from devopsgpt import cache, metrics, providers
+
+POOL_SIZE = int(os.getenv("DEVOPSGPT_POOL_SIZE", "10"))
+AWS_REGION = os.getenv("AWS_REGION", "us-east-1")
+AZURE_API_VERSION = "2023-07-01-preview"
+
+# How many times a response cut off by the output limit is continued before giving up
+MAX_CONTINUATIONS = int(os.getenv("DEVOPSGPT_MAX_CONTINUATIONS", "2"))
+
+CONTINUE_PROMPT = (
+    "{prompt}\n\n"
+    "Your previous answer was cut off by the output limit. This is what you wrote so far:\n\n"
+    "{partial}\n\n"
+    "Continue exactly where it stops. Output only the remaining text, without repeating anything."
+)
+
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def _cached(key, factory):
+    """Return the client stored under key, creating it on first use"""
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            with metrics.span('client'):
+                client = factory()
+            _clients[key] = client
+        return client
+
+
+def pooled_clients():
+    """Keys of the clients built so far in this process"""
+    with _lock:
+        return list(_clients)
+
+
+def reset_clients():
+    """Drop every pooled client so the next call builds fresh ones"""
+    with _lock:
+        for client in _clients.values():
+            close = getattr(client, 'close', None)
+            if callable(close):
+                close()
+        _clients.clear()
+
+
+def _ollama_client():
+    import httpx
+    import ollama
+
+    limits = httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE)
+    return ollama.Client(host=os.getenv("OLLAMA_HOST"), limits=limits)
+
+
+def _bedrock_client():
+    import boto3
+    from botocore.config import Config
+
+    return boto3.client(
+        'bedrock-runtime',
+        region_name=AWS_REGION,
+        config=Config(max_pool_connections=POOL_SIZE, tcp_keepalive=True)
+    )
+
+
+def _http_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _gemini_module():
+    import google.generativeai as genai
+
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise RuntimeError("GEMINI_API_KEY environment variable not set.")
+    endpoint = os.getenv("GEMINI_API_ENDPOINT")
+    if endpoint:
+        # Self-hosted gateways and local stand-ins speak the REST flavour of the API
+        genai.configure(api_key=api_key, transport='rest', client_options={'api_endpoint': endpoint})
+    else:
+        genai.configure(api_key=api_key)
+    return genai
+
+
+def get_client(provider, model=None):
+    """Return the pooled client for a provider (and model, for Gemini)"""
+    if provider == 'ollama':
+        return _cached('ollama', _ollama_client)
+    if provider == 'bedrock':
+        return _cached('bedrock', _bedrock_client)
+    if provider in ('azure', 'azure_openai'):
+        return _cached('http', _http_session)
+    if provider == 'gemini':
+        genai = _cached('gemini', _gemini_module)
+        model = model or providers.default_model('gemini')
+        return _cached(('gemini', model), lambda: genai.GenerativeModel(model))
+    raise ValueError(f"Unknown provider: {provider}")
+
+
+def _ollama_options(model, temperature, max_tokens):
+    # Ollama's own default context is smaller than the window prompts are sized for, and it truncates silently
+    options = {'temperature': temperature, 'num_ctx': providers.context_window('ollama', model)}
+    if max_tokens:
+        options['num_predict'] = max_tokens
+    return options
+
+
+def _call_ollama(prompt, model, temperature, max_tokens, state):
+    options = _ollama_options(model, temperature, max_tokens)
+    client = get_client('ollama')
+    with metrics.span('network'):
+        response = client.chat(
+            model=model,
+            messages=[{'role': 'user', 'content': prompt}],
+            options=options
+        )
+    with metrics.span('parse'):
+        state['truncated'] = response.get('done_reason') == 'length'
+        state['usage'] = (response.get('prompt_eval_count'), response.get('eval_count'))
+        return response['message']['content']
+
+
+def _call_bedrock(prompt, model, temperature, max_tokens, state):
+    body = json.dumps({
+        "inputText": prompt,
+        "textGenerationConfig": {
+            "temperature": temperature,
+            "maxTokenCount": max_tokens
+        }
+    })
+    client = get_client('bedrock')
+    with metrics.span('network'):
+        response = client.invoke_model(
+            modelId=model,
+            body=body,
+            contentType='application/json'
+        )
+        raw = response['body'].read()
+    with metrics.span('parse'):
+        payload = json.loads(raw)
+        result = payload['results'][0]
+        state['truncated'] = result.get('completionReason') == 'LENGTH'
+        state['usage'] = (payload.get('inputTextTokenCount'), result.get('tokenCount'))
+        state['wire'] = (len(body.encode('utf-8')), len(raw))
+        return result['outputText']
+
+
+def _call_azure(prompt, model, temperature, max_tokens, state):
+    endpoint = os.getenv("AZURE_AI_ENDPOINT")
+    token = os.getenv("AZURE_AI_TOKEN")
+    if not endpoint or not token:
+        raise RuntimeError("AZURE_AI_ENDPOINT or AZURE_AI_TOKEN is not set.")
+
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Content-Type": "application/json"
+    }
+    payload = {
+        "input_data": {
+            "input_string": [prompt]
+        }
+    }
+    client = get_client('azure')
+    with metrics.span('network'):
+        response = client.post(endpoint, headers=headers, json=payload)
+        response.raise_for_status()
+        raw = response.content
+    with metrics.span('parse'):
+        # Assumes response contains: { "output": ["response text"] }; no stop reason or usage is reported
+        state['truncated'] = False
+        state['wire'] = (len(response.request.body or b''), len(raw))
+        return response.json()["output"][0]
+
+
+def _call_azure_openai(prompt, model, temperature, max_tokens, state):
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_KEY")
+    deployment = model or os.getenv("AZURE_DEPLOYMENT_NAME")
+    if not endpoint or not api_key or not deployment:
+        raise RuntimeError("AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_KEY or AZURE_DEPLOYMENT_NAME is not set.")
+
+    headers = {
+        "api-key": api_key,
+        "Content-Type": "application/json"
+    }
+    data = {
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature
+    }
+    if max_tokens:
+        data["max_tokens"] = max_tokens
+    client = get_client('azure_openai')
+    with metrics.span('network'):
+        response = client.post(
+            f"{endpoint}/openai/deployments/{deployment}/chat/completions?api-version={AZURE_API_VERSION}",
+            headers=headers, json=data
+        )
+        response.raise_for_status()
+        raw = response.content
+    with metrics.span('parse'):
+        payload = response.json()
+        choice = payload['choices'][0]
+        usage = payload.get('usage') or {}
+        state['truncated'] = choice.get('finish_reason') == 'length'
+        state['usage'] = (usage.get('prompt_tokens'), usage.get('completion_tokens'))
+        state['wire'] = (len(response.request.body or b''), len(raw))
+        return choice['message']['content']
+
+
+def _call_gemini(prompt, model, temperature, max_tokens, state):
+    generation_config = {'temperature': temperature}
+    if max_tokens:
+        generation_config['max_output_tokens'] = max_tokens
+    client = get_client('gemini', model)
+    with metrics.span('network'):
+        response = client.generate_content(
+            [prompt],
+            generation_config=generation_config
+        )
+    with metrics.span('parse'):
+        candidate = response.candidates[0]
+        state['truncated'] = _gemini_hit_limit(candidate)
+        state['usage'] = _gemini_usage(response)
+        return candidate.content.parts[0].text
+
+
+def _gemini_hit_limit(candidate):
+    reason = getattr(candidate, 'finish_reason', None)
+    return getattr(reason, 'name', reason) in ('MAX_TOKENS', 2)
+
+
+def _gemini_usage(response):
+    usage = getattr(response, 'usage_metadata', None)
+    if not usage:
+        return None, None
+    return getattr(usage, 'prompt_token_count', None) or None, getattr(usage, 'candidates_token_count', None) or None
+
+
+def _timed(chunks):
+    """Iterate chunks, counting the wait for each one as network time"""
+    iterator = iter(chunks)
+    while True:
+        started = time.perf_counter()
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            metrics.add_phase('network', time.perf_counter() - started)
+        yield chunk
+
+
+def _stream_ollama(prompt, model, temperature, max_tokens, state):
+    options = _ollama_options(model, temperature, max_tokens)
+    parts = get_client('ollama').chat(
+        model=model,
+        messages=[{'role': 'user', 'content': prompt}],
+        options=options,
+        stream=True
+    )
+    try:
+        for part in _timed(parts):
+            content = part['message']['content']
+            if content:
+                yield content
+            if part.get('done'):
+                state['truncated'] = part.get('done_reason') == 'length'
+                state['usage'] = (part.get('prompt_eval_count'), part.get('eval_count'))
+    finally:
+        parts.close()
+
+
+def _stream_bedrock(prompt, model, temperature, max_tokens, state):
+    body = {
+        "inputText": prompt,
+        "textGenerationConfig": {
+            "temperature": temperature,
+            "maxTokenCount": max_tokens
+        }
+    }
+    client = get_client('bedrock')
+    with metrics.span('network'):
+        response = client.invoke_model_with_response_stream(
+            modelId=model,
+            body=json.dumps(body),
+            contentType='application/json'
+        )
+    events = response['body']
+    try:
+        for event in _timed(events):
+            chunk = event.get('chunk')
+            if chunk:
+                payload = json.loads(chunk['bytes'])
+                if payload.get('outputText'):
+                    yield payload['outputText']
+                if payload.get('completionReason'):
+                    state['truncated'] = payload['completionReason'] == 'LENGTH'
+                invocation = payload.get('amazon-bedrock-invocationMetrics')
+                if invocation:
+                    state['usage'] = (invocation.get('inputTokenCount'), invocation.get('outputTokenCount'))
+    finally:
+        events.close()
+
+
+def _stream_azure_openai(prompt, model, temperature, max_tokens, state):
+    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
+    api_key = os.getenv("AZURE_OPENAI_KEY")
+    if not endpoint or not api_key or not model:
+        raise RuntimeError("AZURE_OPENAI_ENDPOINT, AZURE_OPENAI_KEY or AZURE_DEPLOYMENT_NAME is not set.")
+
+    headers = {
+        "api-key": api_key,
+        "Content-Type": "application/json"
+    }
+    data = {
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "stream": True
+    }
+    if max_tokens:
+        data["max_tokens"] = max_tokens
+    client = get_client('azure_openai')
+    with metrics.span('network'):
+        response = client.post(
+            f"{endpoint}/openai/deployments/{model}/chat/completions?api-version={AZURE_API_VERSION}",
+            headers=headers, json=data, stream=True
+        )
+    try:
+        response.raise_for_status()
+        for line in _timed(response.iter_lines(decode_unicode=True)):
+            if not line or not line.startswith("data: "):
+                continue
+            payload = line[len("data: "):]
+            if payload == "[DONE]":
+                break
+            choices = json.loads(payload).get('choices') or [{}]
+            content = choices[0].get('delta', {}).get('content')
+            if content:
+                yield content
+            if choices[0].get('finish_reason'):
+                state['truncated'] = choices[0]['finish_reason'] == 'length'
+    finally:
+        response.close()
+
+
+def _stream_gemini(prompt, model, temperature, max_tokens, state):
+    generation_config = {'temperature': temperature}
+    if max_tokens:
+        generation_config['max_output_tokens'] = max_tokens
+    client = get_client('gemini', model)
+    with metrics.span('network'):
+        response = client.generate_content(
+            [prompt],
+            generation_config=generation_config,
+            stream=True
+        )
+    for chunk in _timed(response):
+        if chunk.candidates and chunk.candidates[0].content.parts:
+            yield chunk.candidates[0].content.parts[0].text
+        if chunk.candidates and _gemini_hit_limit(chunk.candidates[0]):
+            state['truncated'] = True
+        if getattr(chunk, 'usage_metadata', None):
+            state['usage'] = _gemini_usage(chunk)
+
+
+_CALLS = {
+    'ollama': _call_ollama,
+    'bedrock': _call_bedrock,
+    'azure': _call_azure,
+    'azure_openai': _call_azure_openai,
+    'gemini': _call_gemini,
+}
+
+_STREAMS = {
+    'ollama': _stream_ollama,
+    'bedrock': _stream_bedrock,
+    'azure_openai': _stream_azure_openai,
+    'gemini': _stream_gemini,
+}
+
+
+def resolve(provider, model=None, max_tokens=None):
+    """The model and output limit a request to provider will actually use"""
+    spec = providers.get(provider)
+    model = model or providers.default_model(provider)
+    max_tokens = max_tokens or spec.default_max_tokens
+    if max_tokens:
+        max_tokens = min(max_tokens, spec.max_output_tokens)
+    return model, max_tokens
+
+
+def _call_function(provider):
+    # A registered call replaces the built-in one
+    function = providers.get(provider).call or _CALLS.get(provider)
+    if function is None:
+        raise ValueError(f"Provider {provider} has no call function")
+    return function
+
+
+def _stream_function(provider):
+    """The provider's streaming function; providers that cannot stream deliver one chunk"""
+    spec = providers.get(provider)
+    function = (spec.stream or _STREAMS.get(provider)) if spec.streaming else None
+    if function is not None:
+        return function
+    call = _call_function(provider)
+
+    def single_chunk(prompt, model, temperature, max_tokens, state):
+        yield call(prompt, model, temperature, max_tokens, state)
+
+    return single_chunk
+
+
+def _cache_lookup(key):
+    with metrics.span('cache'):
+        cached = cache.default_cache().get(key)
+    metrics.cache_result(cached is not None)
+    return cached
+
+
+def stream(provider, prompt, model=None, temperature=0.2, max_tokens=None, use_cache=True):
+    """Yield the completion for prompt chunk by chunk as the provider produces it
+
+    A cached answer is yielded as a single chunk. If the provider stops on
+    the output limit, a continuation is requested and streamed on. Closing
+    the generator early (e.g. on Ctrl-C) closes the underlying connection
+    and caches nothing.
+    """
+    model, max_tokens = resolve(provider, model, max_tokens)
+    use_cache = use_cache and cache.CACHE_ENABLED
+    if use_cache:
+        key = cache.make_key(provider, model, prompt, {'temperature': temperature, 'max_tokens': max_tokens})
+        cached = _cache_lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+    parts = []
+    request = prompt
+    for _ in range(MAX_CONTINUATIONS + 1):
+        state = {'truncated': False}
+        start = len(parts)
+        chunks = _stream_function(provider)(request, model, temperature, max_tokens, state)
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+        finally:
+            chunks.close()
+        metrics.model_call(request, ''.join(parts[start:]), state)
+        if not state['truncated']:
+            break
+        request = CONTINUE_PROMPT.format(prompt=prompt, partial=''.join(parts))
+
+    text = ''.join(parts)
+    if use_cache and text:
+        cache.default_cache().put(key, text)
+
+
+def _call(provider, prompt, model, temperature, max_tokens):
+    state = {'truncated': False}
+    text = _call_function(provider)(prompt, model, temperature, max_tokens, state)
+    metrics.model_call(prompt, text, state)
+    return text, state['truncated']
+
+
+def generate(provider, prompt, model=None, temperature=0.2, max_tokens=None, use_cache=True, on_chunk=None):
+    """Send prompt to provider through its pooled client and return the completion text
+
+    Identical requests are answered from the response cache unless
+    use_cache is False or DEVOPSGPT_CACHE=0. Answers cut off by the output
+    limit are continued up to MAX_CONTINUATIONS times. When on_chunk is given the
+    provider's streaming API is used and on_chunk is called with every
+    piece of text as it arrives.
+    """
+    model, max_tokens = resolve(provider, model, max_tokens)
+    with metrics.generation(provider, model):
+        if on_chunk is not None:
+            chunks = stream(provider, prompt, model, temperature, max_tokens, use_cache)
+            parts = []
+            try:
+                for chunk in chunks:
+                    on_chunk(chunk)
+                    parts.append(chunk)
+            finally:
+                chunks.close()
+            return ''.join(parts)
+
+        use_cache = use_cache and cache.CACHE_ENABLED
+        if use_cache:
+            key = cache.make_key(provider, model, prompt, {'temperature': temperature, 'max_tokens': max_tokens})
+            cached = _cache_lookup(key)
+            if cached is not None:
+                return cached
+
+        text, truncated = _call(provider, prompt, model, temperature, max_tokens)
+        for _ in range(MAX_CONTINUATIONS):
+            if not truncated:
+                break
+            more, truncated = _call(
+                provider, CONTINUE_PROMPT.format(prompt=prompt, partial=text), model, temperature, max_tokens
+            )
+            text += more
+        if use_cache and text:
+            cache.default_cache().put(key, text)
+        return text
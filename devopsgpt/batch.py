@@ -0,0 +1,320 @@
+"""Non-interactive batch generation driven by a manifest.
+
+A manifest (YAML or JSON) lists services and the same fields the
+interactive scripts ask for::
+
+    provider: ollama
+    defaults:
+      branch: main
+      dockerhub_user: acme
+    services:
+      - name: api
+        path: services/api        # relative to the manifest
+        language: python
+        extra_requirement: expose port 8000
+        image_name: api
+        cloud: aws
+        tf_dir: services/api/infra
+        terraform_customization: also run on workflow_dispatch
+
+A Dockerfile is generated for every service with a ``language``, a Docker CI
+workflow for every service with ``dockerhub_user`` and ``image_name``, and a
+Terraform workflow for every service with a ``cloud``. Set ``artifacts`` on a
+service to pick them explicitly, and ``outputs`` to override target paths.
+Workflows are built locally from these fields; ``ci_customization`` and
+``terraform_customization`` have the model patch them for a free-form change.
+
+Generations go through the rate-limit-aware scheduler, so large manifests
+run at the provider's quota instead of failing on throttling. Progress is
+journaled (see journal.py) next to the manifest, so a rerun after a crash
+or a partial failure only redoes jobs that failed, never finished, or whose
+inputs changed; pass --fresh to redo everything. Files are written as their
+jobs finish, together with any others that finished at the same time, and
+each job is journaled as finished once its file is on disk (see writer.py).
+A file is only written when its content changed, and each result reports
+whether it was created, changed or unchanged.
+
+Usage: python -m devopsgpt.batch manifest.yaml [--provider ollama] [--workers 8] [--rpm N] [--tpm N]
+       [--summary out.json] [--journal PATH | --no-journal] [--fresh]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from devopsgpt import backends, generators, journal, metrics, prompts, providers, semantic_cache, validation, writer
+from devopsgpt.scheduler import Scheduler
+
+DEFAULT_WORKERS = int(os.getenv("DEVOPSGPT_BATCH_WORKERS", "8"))
+DEFAULT_PROVIDER = 'ollama'
+
+ARTIFACT_FILES = {
+    'dockerfile': 'Dockerfile',
+    'docker_ci': 'docker-ci.yml',
+    'terraform': 'terraform.yml',
+}
+
+REQUIRED_FIELDS = {
+    'dockerfile': ('language',),
+    'docker_ci': ('dockerhub_user', 'image_name'),
+    'terraform': ('cloud',),
+}
+
+
+def load_manifest(path):
+    """Read a YAML or JSON manifest"""
+    text = Path(path).read_text()
+    if str(path).endswith('.json'):
+        return json.loads(text)
+    try:
+        import yaml
+    except ImportError:
+        raise RuntimeError("PyYAML is required for YAML manifests (pip install pyyaml); use a .json manifest instead")
+    return yaml.safe_load(text)
+
+
+def plan_jobs(manifest, base_dir='.'):
+    """Expand a manifest into one job per (service, artifact)"""
+    base_dir = Path(base_dir)
+    defaults = manifest.get('defaults') or {}
+    jobs = []
+    for index, entry in enumerate(manifest.get('services') or []):
+        service = {**defaults, **entry}
+        name = service.get('name') or f"service-{index}"
+        path = service.get('path', '.')
+        outputs = service.get('outputs') or {}
+        artifacts = service.get('artifacts') or [
+            artifact for artifact, fields in REQUIRED_FIELDS.items()
+            if all(service.get(field) for field in fields)
+        ]
+        for artifact in artifacts:
+            if artifact not in ARTIFACT_FILES:
+                raise ValueError(f"{name}: unknown artifact '{artifact}'")
+            target = outputs.get(artifact) or os.path.join(path, ARTIFACT_FILES[artifact])
+            jobs.append({
+                'id': f"{name}:{artifact}",
+                'service': name,
+                'artifact': artifact,
+                'root': base_dir / path,
+                'target': base_dir / target,
+                'fields': service,
+            })
+    return jobs
+
+
+def job_plan(job):
+    """Render the job's content locally, or the prompt and budget artifact for the model
+
+    Returns (content, None) or (None, (prompt, artifact)).
+    """
+    fields = job['fields']
+    missing = [field for field in REQUIRED_FIELDS[job['artifact']] if not fields.get(field)]
+    if missing:
+        raise ValueError(f"missing field(s): {', '.join(missing)}")
+
+    if job['artifact'] == 'dockerfile':
+        return generators.plan_dockerfile(fields['language'], fields.get('extra_requirement', ''), root=job['root'])
+    if job['artifact'] == 'docker_ci':
+        return generators.plan_docker_ci(
+            fields.get('branch', 'main'), fields.get('app_dir', fields.get('path', '.')),
+            fields['dockerhub_user'], fields['image_name'], fields.get('ci_customization')
+        )
+    return generators.plan_terraform(
+        fields['cloud'], fields.get('branch', 'main'), fields.get('tf_dir', '.'),
+        fields.get('terraform_customization')
+    )
+
+
+def job_requirement(job):
+    """(requirement, exact inputs) of a job for the semantic cache (see semantic_cache.request_key)"""
+    fields = job['fields']
+    free_form = {
+        'dockerfile': 'extra_requirement',
+        'docker_ci': 'ci_customization',
+        'terraform': 'terraform_customization',
+    }[job['artifact']]
+    requirement = generators.normalize_extra_requirement(fields.get(free_form)) or "None"
+    return requirement, (fields['language'],) if job['artifact'] == 'dockerfile' else ()
+
+
+async def _checked(scheduler, provider, artifact, content):
+    """Validate model output off the event loop, sending repairs through the scheduler"""
+    loop = asyncio.get_running_loop()
+
+    def complete(prompt):
+        max_tokens = prompts.output_budget('repair', prompt, providers.context_window(provider))
+        return asyncio.run_coroutine_threadsafe(
+            scheduler.generate(provider, prompt, max_tokens=max_tokens), loop
+        ).result()
+    return await asyncio.to_thread(validation.repair, artifact, content, complete)
+
+
+def job_fingerprint(provider, job, content, request):
+    """Hash of everything that determines the job's output"""
+    model, _ = backends.resolve(provider)
+    return journal.fingerprint(provider, model, job['artifact'], str(job['target']), content, request)
+
+
+async def run_job(scheduler, provider, job, writes, log=None):
+    """Generate one job's content and stage it in writes"""
+    started = time.perf_counter()
+    result = {
+        'id': job['id'],
+        'service': job['service'],
+        'artifact': job['artifact'],
+        'target': str(job['target']),
+    }
+    fingerprint = None
+    try:
+        with metrics.generation(provider, artifact=job['artifact']):
+            with metrics.span('render'):
+                content, request = job_plan(job)
+            if log is not None:
+                fingerprint = job_fingerprint(provider, job, content, request)
+                if log.is_done(job['id'], fingerprint, job['target']):
+                    result.update(status='skipped', seconds=round(time.perf_counter() - started, 4))
+                    return result
+                log.started(job['id'], fingerprint)
+            if content is None:
+                prompt, artifact = request
+                key = None
+                if semantic_cache.enabled():
+                    key = semantic_cache.request_key(provider, None, artifact, prompt, *job_requirement(job))
+                    content = await asyncio.to_thread(semantic_cache.lookup, *key)
+            if content is None:
+                max_tokens = prompts.output_budget(artifact, prompt, providers.context_window(provider))
+                content = await scheduler.generate(provider, prompt, max_tokens=max_tokens)
+                content, problems = await _checked(scheduler, provider, artifact, content)
+                if problems:
+                    result['problems'] = [f"line {problem.line}: {problem.message}" for problem in problems]
+                elif key:
+                    await asyncio.to_thread(semantic_cache.store, *key, content)
+        if not content:
+            raise RuntimeError("empty response from model")
+        writes.add(job['target'], content, provider, job['artifact'])
+        result.update(status='ok', bytes=len(content.encode('utf-8')))
+    except Exception as e:
+        if fingerprint is not None:
+            log.failed(job['id'], fingerprint, e)
+        result.update(status='failed', error=str(e))
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def write_results(jobs, results, writes, log=None):
+    """Write the staged files of jobs in one pass and record each outcome on its result and in the journal"""
+    staged = {path: content for path, (content, _, _) in writes.staged.items()}
+    report = writes.commit()
+    for job, result in zip(jobs, results):
+        if result['status'] != 'ok':
+            continue
+        result['write'] = report[str(job['target'])]
+        # Recorded under the fingerprint the job was started with (see run_job)
+        fingerprint = log.state[job['id']]['fingerprint'] if log is not None else None
+        if result['write'].startswith('failed'):
+            result.update(status='failed', error=result.pop('write'))
+            if log is not None:
+                log.failed(job['id'], fingerprint, result['error'])
+        elif log is not None:
+            log.finished(job['id'], fingerprint, staged[job['target']])
+    return report
+
+
+async def _run_batch(jobs, provider, scheduler, writes, log=None):
+    """(results, write report) of every job, writing files in groups as jobs finish"""
+    tasks = [asyncio.ensure_future(run_job(scheduler, provider, job, writes, log)) for job in jobs]
+    by_task = dict(zip(tasks, jobs))
+    report = {}
+    pending = set(tasks)
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        # run_job stages its file right before returning, so writes holds exactly the done jobs' files
+        group = [task for task in tasks if task in done]
+        report.update(write_results([by_task[task] for task in group], [task.result() for task in group], writes, log))
+    return [task.result() for task in tasks], report
+
+
+def run_batch(jobs, provider=DEFAULT_PROVIDER, workers=DEFAULT_WORKERS, rpm=None, tpm=None, journal_path=None,
+              fresh=False):
+    """Run every job through the scheduler, at most workers at a time, and return a summary dict
+
+    Generated files are written as jobs finish, and files whose content did not change are
+    left untouched. With journal_path, jobs already finished with the same inputs are skipped,
+    including those finished by a run that crashed.
+    """
+    log = journal.Journal(journal_path, fresh=fresh) if journal_path else None
+    interrupted = log.interrupted() if log else []
+    limits = {'concurrency': max(1, workers)}
+    if rpm:
+        limits['rpm'] = rpm
+    if tpm:
+        limits['tpm'] = tpm
+    scheduler = Scheduler(limits={provider: limits}, max_workers=max(1, workers))
+    started = time.perf_counter()
+    writes = writer.WriteBatch()
+    try:
+        results, report = asyncio.run(_run_batch(jobs, provider, scheduler, writes, log))
+    finally:
+        scheduler.close()
+        if log is not None:
+            log.close()
+    failed = [result for result in results if result['status'] == 'failed']
+    skipped = [result for result in results if result['status'] == 'skipped']
+    return {
+        'provider': provider,
+        'workers': workers,
+        'jobs': len(results),
+        'succeeded': len(results) - len(failed) - len(skipped),
+        'skipped': len(skipped),
+        'failed': len(failed),
+        'resumed': interrupted,
+        'writes': writer.count(report),
+        'seconds': round(time.perf_counter() - started, 4),
+        'scheduler': scheduler.stats,
+        'results': results,
+    }
+
+
+def default_journal_path(manifest_path):
+    manifest_path = Path(manifest_path)
+    return manifest_path.with_name(manifest_path.name + '.journal.jsonl')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Dockerfiles and workflows for every service in a manifest")
+    parser.add_argument('manifest', help="YAML or JSON manifest listing services")
+    parser.add_argument('--provider', help=f"backend to use (default: manifest 'provider' or {DEFAULT_PROVIDER})")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="concurrent generations")
+    parser.add_argument('--rpm', type=int, help="requests per minute allowed for the provider")
+    parser.add_argument('--tpm', type=int, help="tokens per minute allowed for the provider")
+    parser.add_argument('--summary', help="write the JSON summary here instead of stdout")
+    parser.add_argument('--journal', help="progress journal (default: <manifest>.journal.jsonl next to the manifest)")
+    parser.add_argument('--no-journal', action='store_true', help="do not record or skip finished jobs")
+    parser.add_argument('--fresh', action='store_true', help="ignore the journal and redo every job")
+    args = parser.parse_args(argv)
+
+    manifest = load_manifest(args.manifest)
+    provider = args.provider or manifest.get('provider') or DEFAULT_PROVIDER
+    jobs = plan_jobs(manifest, Path(args.manifest).resolve().parent)
+    journal_path = None if args.no_journal else args.journal or default_journal_path(args.manifest)
+    summary = run_batch(jobs, provider, args.workers, args.rpm, args.tpm, journal_path, args.fresh)
+
+    report = json.dumps(summary, indent=2)
+    if args.summary:
+        Path(args.summary).write_text(report + "\n")
+        writes = summary['writes']
+        print(
+            f"{summary['succeeded']}/{summary['jobs']} artifacts generated ({summary['skipped']} unchanged, skipped) "
+            f"in {summary['seconds']}s, {writes['created']} files created, {writes['changed']} changed, "
+            f"{writes['unchanged']} left as they were; summary saved to {args.summary}"
+        )
+    else:
+        print(report)
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,479 @@
+"""Offline bulk generation through JSONL job files.
+
+For nightly regeneration across many repositories, a provider's batch
+inference API is cheaper and gentler on quotas than one call per artifact.
+Bulk mode splits a batch manifest (see batch.py) into three steps that can
+run hours apart:
+
+    prepare   render every prompt into records.jsonl in a job directory
+    submit    run the records through an executor, producing results.jsonl
+    ingest    match results to jobs by record ID, validate and write the files
+              that changed (see writer.py)
+
+Records use the Bedrock batch inference layout, one per line::
+
+    {"recordId": "REC00000001", "modelInput": {...provider request body...}}
+
+and results add ``modelOutput`` (or ``error``). Executors:
+
+    bedrock   uploads the records to DEVOPSGPT_BULK_S3 (s3://bucket/prefix),
+              starts a model invocation job as DEVOPSGPT_BULK_ROLE_ARN and
+              downloads the output when it completes. Bedrock needs a minimum
+              number of records per job (DEVOPSGPT_BULK_MIN_RECORDS, 100 at
+              the time of writing); smaller jobs run locally under auto.
+    local     runs every record through the ordinary provider call, under the
+              rate-limit-aware scheduler. This is the worker for Ollama, the
+              fallback for other providers, and with the stand-in server in
+              benchmarks/ it runs the whole flow offline.
+
+Artifacts that render without the model, and prompts already in the
+response cache, never become records; results are added to the cache on
+ingest, so an unchanged nightly run submits nothing. The local executor
+appends each result to results.jsonl as soon as it arrives (see
+journal.AppendLog), so rerunning submit after a crash only runs the
+records that have no result yet.
+
+Usage: python -m devopsgpt.bulk run manifest.yaml --out jobs/nightly [--provider bedrock] [--executor auto]
+       python -m devopsgpt.bulk prepare|submit|ingest ...
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from devopsgpt import backends, batch, cache, generators, journal, prompts, providers, validation, writer
+from devopsgpt.scheduler import Scheduler
+
+BULK_S3 = os.getenv("DEVOPSGPT_BULK_S3")
+BULK_ROLE_ARN = os.getenv("DEVOPSGPT_BULK_ROLE_ARN")
+POLL_SECONDS = float(os.getenv("DEVOPSGPT_BULK_POLL", "30"))
+BEDROCK_MIN_RECORDS = int(os.getenv("DEVOPSGPT_BULK_MIN_RECORDS", "100"))
+TEMPERATURE = 0.2
+
+JOBS_FILE = 'jobs.json'
+RECORDS_FILE = 'records.jsonl'
+RESULTS_FILE = 'results.jsonl'
+
+BEDROCK_RUNNING = {'Submitted', 'Validating', 'Scheduled', 'InProgress', 'Stopping'}
+BEDROCK_DONE = {'Completed', 'PartiallyCompleted'}
+
+# How one provider's request and response bodies carry a prompt and its answer
+RecordFormat = namedtuple('RecordFormat', 'request prompt response text')
+
+
+def _titan_request(prompt, model, max_tokens):
+    config = {'temperature': TEMPERATURE}
+    if max_tokens:
+        config['maxTokenCount'] = max_tokens
+    return {'inputText': prompt, 'textGenerationConfig': config}
+
+
+def _titan_prompt(body):
+    return body['inputText'], body.get('textGenerationConfig', {}).get('maxTokenCount')
+
+
+def _titan_response(text, truncated):
+    return {'results': [{'outputText': text, 'completionReason': 'LENGTH' if truncated else 'FINISH'}]}
+
+
+def _titan_text(body):
+    result = body['results'][0]
+    return result['outputText'], result.get('completionReason') == 'LENGTH'
+
+
+def _ollama_request(prompt, model, max_tokens):
+    options = {'temperature': TEMPERATURE}
+    if max_tokens:
+        options['num_predict'] = max_tokens
+    return {'model': model, 'messages': [{'role': 'user', 'content': prompt}], 'options': options, 'stream': False}
+
+
+def _ollama_prompt(body):
+    return body['messages'][-1]['content'], body.get('options', {}).get('num_predict')
+
+
+def _ollama_response(text, truncated):
+    return {'message': {'role': 'assistant', 'content': text}, 'done': True, 'done_reason': 'length' if truncated else 'stop'}
+
+
+def _ollama_text(body):
+    return body['message']['content'], body.get('done_reason') == 'length'
+
+
+def _plain_request(prompt, model, max_tokens):
+    return {'prompt': prompt, 'model': model, 'max_tokens': max_tokens, 'temperature': TEMPERATURE}
+
+
+def _plain_prompt(body):
+    return body['prompt'], body.get('max_tokens')
+
+
+def _plain_response(text, truncated):
+    return {'text': text, 'truncated': truncated}
+
+
+def _plain_text(body):
+    return body['text'], body.get('truncated', False)
+
+
+RECORD_FORMATS = {
+    'bedrock': RecordFormat(_titan_request, _titan_prompt, _titan_response, _titan_text),
+    'ollama': RecordFormat(_ollama_request, _ollama_prompt, _ollama_response, _ollama_text),
+}
+PLAIN_FORMAT = RecordFormat(_plain_request, _plain_prompt, _plain_response, _plain_text)
+
+
+def record_format(provider):
+    return RECORD_FORMATS.get(provider, PLAIN_FORMAT)
+
+
+def _write_atomic(path, text):
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_job(job_dir):
+    return json.loads((Path(job_dir) / JOBS_FILE).read_text())
+
+
+def save_job(job_dir, job):
+    _write_atomic(Path(job_dir) / JOBS_FILE, json.dumps(job, indent=2) + "\n")
+
+
+def read_jsonl(path):
+    """Records of a JSONL file by recordId, the last one winning; unreadable lines are skipped"""
+    records = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and record.get('recordId'):
+                records[record['recordId']] = record
+    return records
+
+
+def prepare(manifest_path, job_dir, provider=None):
+    """Render every job of a manifest; model prompts go to records.jsonl
+
+    Returns the job description that is also saved as jobs.json.
+    """
+    manifest = batch.load_manifest(manifest_path)
+    provider = provider or manifest.get('provider') or batch.DEFAULT_PROVIDER
+    model, _ = backends.resolve(provider)
+    fmt = record_format(provider)
+    job_dir = Path(job_dir)
+    job_dir.mkdir(parents=True, exist_ok=True)
+
+    entries = []
+    records = []
+    use_cache = cache.CACHE_ENABLED
+    for index, job in enumerate(batch.plan_jobs(manifest, Path(manifest_path).resolve().parent), 1):
+        entry = {
+            'id': job['id'],
+            'service': job['service'],
+            'artifact': job['artifact'],
+            'target': str(job['target']),
+        }
+        try:
+            content, request = batch.job_plan(job)
+        except Exception as e:
+            entries.append({**entry, 'error': str(e)})
+            continue
+        if content is None:
+            prompt, artifact = request
+            _, max_tokens = backends.resolve(
+                provider, model, prompts.output_budget(artifact, prompt, providers.context_window(provider, model))
+            )
+            key = cache.make_key(provider, model, prompt, {'temperature': TEMPERATURE, 'max_tokens': max_tokens})
+            content = cache.default_cache().get(key) if use_cache else None
+            entry.update(prompt_artifact=artifact, cache_key=key)
+            if content is None:
+                entry['record_id'] = f"REC{index:08d}"
+                records.append({'recordId': entry['record_id'], 'modelInput': fmt.request(prompt, model, max_tokens)})
+        if content is not None:
+            entry['content'] = content
+        entries.append(entry)
+
+    text = ''.join(json.dumps(record) + "\n" for record in records)
+    try:
+        unchanged = (job_dir / RECORDS_FILE).read_text() == text
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        # Results of earlier records would be matched to the wrong jobs
+        _write_atomic(job_dir / RECORDS_FILE, text)
+        (job_dir / RESULTS_FILE).unlink(missing_ok=True)
+    job = {
+        'provider': provider,
+        'model': model,
+        'created': time.time(),
+        'records': len(records),
+        'jobs': entries,
+    }
+    save_job(job_dir, job)
+    return job
+
+
+async def _run_local(provider, model, records, workers, on_result):
+    scheduler = Scheduler(limits={provider: {'concurrency': max(1, workers)}}, max_workers=max(1, workers))
+    fmt = record_format(provider)
+
+    async def run(record):
+        try:
+            prompt, max_tokens = fmt.prompt(record['modelInput'])
+            text = await scheduler.generate(provider, prompt, model=model, max_tokens=max_tokens)
+            on_result({**record, 'modelOutput': fmt.response(text, False)})
+        except Exception as e:
+            on_result({**record, 'error': {'errorCode': type(e).__name__, 'errorMessage': str(e)}})
+
+    try:
+        await asyncio.gather(*(run(record) for record in records))
+    finally:
+        scheduler.close()
+
+
+def submit_local(job_dir, job, workers=batch.DEFAULT_WORKERS):
+    """Run the records that have no result yet in this process, appending to results.jsonl"""
+    job_dir = Path(job_dir)
+    results_path = job_dir / RESULTS_FILE
+    answered = {
+        record_id for record_id, record in (read_jsonl(results_path) if results_path.exists() else {}).items()
+        if 'modelOutput' in record
+    }
+    pending = [record for record_id, record in read_jsonl(job_dir / RECORDS_FILE).items() if record_id not in answered]
+    log = journal.AppendLog(results_path)
+    try:
+        if pending:
+            asyncio.run(_run_local(job['provider'], job['model'], pending, workers, log.append))
+    finally:
+        log.close()
+    return len(pending)
+
+
+def _split_s3(uri):
+    if not uri or not uri.startswith('s3://'):
+        raise RuntimeError("DEVOPSGPT_BULK_S3 must be set to an s3://bucket/prefix location")
+    bucket, _, prefix = uri[len('s3://'):].partition('/')
+    return bucket, prefix.strip('/')
+
+
+def submit_bedrock(job_dir, job, poll=POLL_SECONDS):
+    """Run the records as a Bedrock batch inference job and download results.jsonl
+
+    The job ARN is saved in jobs.json, so an interrupted submit resumes
+    waiting for the same job instead of starting another.
+    """
+    import boto3
+
+    job_dir = Path(job_dir)
+    bucket, prefix = _split_s3(BULK_S3)
+    s3 = boto3.client('s3', region_name=backends.AWS_REGION)
+    control = boto3.client('bedrock', region_name=backends.AWS_REGION)
+
+    submission = job.get('submission') or {}
+    if submission.get('executor') != 'bedrock':
+        if not BULK_ROLE_ARN:
+            raise RuntimeError("DEVOPSGPT_BULK_ROLE_ARN must name the IAM role Bedrock uses to read and write S3")
+        name = f"devopsgpt-{time.strftime('%Y%m%d-%H%M%S')}"
+        base = f"{prefix}/{name}" if prefix else name
+        s3.upload_file(str(job_dir / RECORDS_FILE), bucket, f"{base}/{RECORDS_FILE}")
+        response = control.create_model_invocation_job(
+            jobName=name,
+            roleArn=BULK_ROLE_ARN,
+            modelId=job['model'],
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{bucket}/{base}/{RECORDS_FILE}", 's3InputFormat': 'JSONL'}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': f"s3://{bucket}/{base}/output/"}},
+        )
+        submission = {'executor': 'bedrock', 'job_arn': response['jobArn'], 'base': base}
+        job['submission'] = submission
+        save_job(job_dir, job)
+        print(f"Submitted Bedrock batch job {response['jobArn']}")
+
+    while True:
+        state = control.get_model_invocation_job(jobIdentifier=submission['job_arn'])
+        status = state['status']
+        if status in BEDROCK_DONE:
+            break
+        if status not in BEDROCK_RUNNING:
+            raise RuntimeError(f"Bedrock batch job {status}: {state.get('message', '')}")
+        print(f"Bedrock batch job {status}, checking again in {poll:.0f}s")
+        time.sleep(poll)
+
+    job_id = submission['job_arn'].rsplit('/', 1)[-1]
+    s3.download_file(bucket, f"{submission['base']}/output/{job_id}/{RECORDS_FILE}.out", str(job_dir / RESULTS_FILE))
+
+
+EXECUTORS = {
+    'local': submit_local,
+    'bedrock': submit_bedrock,
+}
+
+
+def choose_executor(provider, executor='auto', records=0):
+    """The executor to use: Bedrock's batch API when it is configured and the job is big enough, otherwise local"""
+    if executor == 'bedrock' and records < BEDROCK_MIN_RECORDS:
+        raise ValueError(
+            f"Bedrock batch jobs need at least {BEDROCK_MIN_RECORDS} records, this job has {records}; "
+            "use --executor local"
+        )
+    if executor != 'auto':
+        if executor not in EXECUTORS:
+            raise ValueError(f"Unknown executor: {executor}")
+        return executor
+    if (provider == 'bedrock' and providers.get(provider).batch_api and BULK_S3 and BULK_ROLE_ARN
+            and records >= BEDROCK_MIN_RECORDS):
+        return 'bedrock'
+    return 'local'
+
+
+def submit(job_dir, executor='auto', workers=batch.DEFAULT_WORKERS):
+    job = load_job(job_dir)
+    if not job['records']:
+        _write_atomic(Path(job_dir) / RESULTS_FILE, '')
+        return 'none'
+    executor = choose_executor(job['provider'], executor, job['records'])
+    if executor == 'local':
+        submit_local(job_dir, job, workers)
+    else:
+        EXECUTORS[executor](job_dir, job)
+    return executor
+
+
+def ingest(job_dir, repair=False):
+    """Write every job's file from its rendered content or its matched result; returns a summary"""
+    job_dir = Path(job_dir)
+    job = load_job(job_dir)
+    provider = job['provider']
+    fmt = record_format(provider)
+    results_path = job_dir / RESULTS_FILE
+    results = read_jsonl(results_path) if results_path.exists() else {}
+    if job['records'] and not results:
+        raise RuntimeError(f"No results in {results_path}; run submit first")
+
+    def complete(prompt):
+        return generators.generate(provider, prompt, model=job['model'], artifact='repair')
+
+    summary = []
+    writes = writer.WriteBatch()
+    for entry in job['jobs']:
+        result = {key: entry[key] for key in ('id', 'service', 'artifact', 'target')}
+        try:
+            if entry.get('error'):
+                raise RuntimeError(entry['error'])
+            content = entry.get('content')
+            fresh = content is None
+            truncated = False
+            if fresh:
+                record = results.get(entry['record_id'])
+                if record is None:
+                    raise RuntimeError(f"no result for record {entry['record_id']}")
+                if record.get('error'):
+                    error = record['error']
+                    raise RuntimeError(error.get('errorMessage', error) if isinstance(error, dict) else error)
+                content, truncated = fmt.text(record['modelOutput'])
+                if truncated:
+                    result['truncated'] = True
+            if entry.get('prompt_artifact'):
+                # Model output, whether it came from this job or from the response cache
+                content, problems = validation.repair(
+                    entry['prompt_artifact'], content, complete, attempts=None if repair else 0
+                )
+                if problems:
+                    result['problems'] = [f"line {problem.line}: {problem.message}" for problem in problems]
+                elif fresh and content and cache.CACHE_ENABLED and not truncated:
+                    cache.default_cache().put(entry['cache_key'], content)
+            if not content:
+                raise RuntimeError("empty response from model")
+            writes.add(entry['target'], content, provider, entry['artifact'])
+            result.update(status='ok', bytes=len(content.encode('utf-8')))
+        except Exception as e:
+            result.update(status='failed', error=str(e))
+        summary.append(result)
+
+    report = writes.commit()
+    for result in summary:
+        if result['status'] == 'ok':
+            result['write'] = report[str(Path(result['target']))]
+            if result['write'].startswith('failed'):
+                result.update(status='failed', error=result.pop('write'))
+
+    failed = [result for result in summary if result['status'] != 'ok']
+    return {
+        'provider': provider,
+        'model': job['model'],
+        'records': job['records'],
+        'jobs': len(summary),
+        'succeeded': len(summary) - len(failed),
+        'failed': len(failed),
+        'writes': writer.count(report),
+        'results': summary,
+    }
+
+
+def _report(summary, path):
+    report = json.dumps(summary, indent=2)
+    if path:
+        Path(path).write_text(report + "\n")
+        writes = summary['writes']
+        print(
+            f"{summary['succeeded']}/{summary['jobs']} artifacts written ({writes['created']} created, "
+            f"{writes['changed']} changed, {writes['unchanged']} unchanged), summary saved to {path}"
+        )
+    else:
+        print(report)
+    return 1 if summary['failed'] else 0
+
+
+def main(argv=None, provider=None):
+    parser = argparse.ArgumentParser(description="Generate a manifest's artifacts through JSONL bulk jobs")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    for name, help_text in (('prepare', "render prompts into a job directory"), ('run', "prepare, submit and ingest")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('manifest', help="YAML or JSON manifest listing services")
+        command.add_argument('--out', required=True, help="job directory")
+        command.add_argument('--provider', default=provider, help="backend to use (default: manifest 'provider' or ollama)")
+    for name, help_text in (('submit', "run a prepared job's records"), ('ingest', "write files from a job's results")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument('job_dir', help="job directory created by prepare")
+    for name in ('submit', 'run'):
+        command = commands.choices[name]
+        command.add_argument('--executor', default='auto', choices=('auto', *EXECUTORS), help="where records run")
+        command.add_argument('--workers', type=int, default=batch.DEFAULT_WORKERS, help="concurrent local generations")
+    for name in ('ingest', 'run'):
+        command = commands.choices[name]
+        command.add_argument('--repair', action='store_true', help="have the model fix output that fails validation")
+        command.add_argument('--summary', help="write the JSON summary here instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command in ('prepare', 'run'):
+            job = prepare(args.manifest, args.out, args.provider)
+            rendered = sum(1 for entry in job['jobs'] if 'content' in entry)
+            print(f"{len(job['jobs'])} artifacts: {rendered} rendered locally or cached, {job['records']} records to submit")
+            if args.command == 'prepare':
+                return 0
+        job_dir = args.out if args.command == 'run' else args.job_dir
+        if args.command in ('submit', 'run'):
+            executor = submit(job_dir, args.executor, args.workers)
+            print(f"Records run by the {executor} executor." if executor != 'none' else "Nothing to submit.")
+            if args.command == 'submit':
+                return 0
+        return _report(ingest(job_dir, args.repair), args.summary)
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"Bulk job failed: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""Content-addressed response cache shared by every generator.
+
+Lookups go through three tiers, fastest first:
+
+1. an in-process LRU,
+2. a persistent SQLite database with TTL and size-based eviction,
+3. an optional shared directory (e.g. a mounted volume) so a whole team's
+   CI runners can reuse each other's answers.
+
+A hit in a slower tier is promoted into the faster ones. Hit and miss
+counts are added to the SQLite database when the process exits, so
+``python -m devopsgpt.cache stats`` reports them across runs.
+"""
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_ENABLED = os.getenv("DEVOPSGPT_CACHE", "1") != "0"
+MEMORY_SIZE = int(os.getenv("DEVOPSGPT_CACHE_MEMORY_SIZE", "256"))
+DB_PATH = os.getenv("DEVOPSGPT_CACHE_DB", str(Path.home() / ".cache" / "devopsgpt" / "responses.sqlite3"))
+TTL_SECONDS = int(os.getenv("DEVOPSGPT_CACHE_TTL", str(7 * 24 * 3600)))
+MAX_BYTES = int(os.getenv("DEVOPSGPT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+SHARED_DIR = os.getenv("DEVOPSGPT_CACHE_SHARED_DIR")
+
+
+def make_key(provider, model, prompt, params):
+    """Hash provider, model, rendered prompt and generation params into a cache key"""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    material = json.dumps(
+        {'provider': provider, 'model': model, 'prompt': prompt_hash, 'params': params},
+        sort_keys=True
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class MemoryTier:
+    """Bounded in-process LRU"""
+    name = 'memory'
+
+    def __init__(self, max_entries=MEMORY_SIZE):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteTier:
+    """Persistent tier with TTL expiry and least-recently-used eviction by total size"""
+    name = 'sqlite'
+
+    def __init__(self, path=DB_PATH, ttl=TTL_SECONDS, max_bytes=MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def put(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, len(value.encode('utf-8')))
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        if self.ttl:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        doomed = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def info(self):
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {'path': self.path, 'entries': count, 'bytes': size}
+
+    def add_counts(self, counts):
+        """Add {name: count} to the stored counters"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO counters (name, count) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET count = count + excluded.count",
+                counts.items()
+            )
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, count FROM counters"))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM counters")
+
+
+class DirectoryTier:
+    """One JSON file per entry in a shared directory, written atomically"""
+    name = 'shared'
+
+    def __init__(self, root=SHARED_DIR, ttl=TTL_SECONDS):
+        self.root = Path(root)
+        self.ttl = ttl
+
+    def _path(self, key):
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        try:
+            with open(self._path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.ttl and time.time() - entry.get('created', 0) > self.ttl:
+            return None
+        return entry.get('value')
+
+    def put(self, key, value):
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'value': value, 'created': time.time()}, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Shared cache write failed: {e}")
+
+    def clear(self):
+        for path in self.root.glob('*/*.json'):
+            path.unlink(missing_ok=True)
+
+
+class TieredCache:
+    """Checks each tier in order and keeps hit/miss counters per tier"""
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+        self.hits = {tier.name: 0 for tier in tiers}
+        self.misses = 0
+        self._unsaved = {}
+        self._reported = set()
+        self._lock = threading.Lock()
+
+    def _failed(self, tier, error):
+        """Report a tier's error once; the lookup or write carries on without it"""
+        with self._lock:
+            if tier.name in self._reported:
+                return
+            self._reported.add(tier.name)
+        print(f"Cache tier {tier.name} failed, skipping it: {error}")
+
+    def get(self, key):
+        for index, tier in enumerate(self.tiers):
+            try:
+                value = tier.get(key)
+            except sqlite3.Error as e:  # e.g. "database is locked" with many processes on one DB
+                self._failed(tier, e)
+                continue
+            if value is not None:
+                for faster in self.tiers[:index]:
+                    self._put(faster, key, value)
+                with self._lock:
+                    self.hits[tier.name] += 1
+                    self._unsaved[tier.name] = self._unsaved.get(tier.name, 0) + 1
+                return value
+        with self._lock:
+            self.misses += 1
+            self._unsaved['miss'] = self._unsaved.get('miss', 0) + 1
+        return None
+
+    def _put(self, tier, key, value):
+        try:
+            tier.put(key, value)
+        except sqlite3.Error as e:
+            self._failed(tier, e)
+
+    def put(self, key, value):
+        for tier in self.tiers:
+            self._put(tier, key, value)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+    def _store(self):
+        return next((tier for tier in self.tiers if isinstance(tier, SQLiteTier)), None)
+
+    def save_stats(self):
+        """Add the counts since the last save to the SQLite tier, if there is one"""
+        store = self._store()
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        if store is None or not unsaved:
+            return
+        try:
+            store.add_counts(unsaved)
+        except sqlite3.Error as e:
+            print(f"Could not save cache stats: {e}")
+
+    def stats(self, lifetime=False):
+        """Hit and miss counts of this process, or with lifetime those of every run"""
+        with self._lock:
+            hits = dict(self.hits)
+            misses = self.misses
+            unsaved = dict(self._unsaved)
+        store = self._store()
+        if lifetime and store is not None:
+            # Whatever this process already saved is in the store
+            saved = store.counts()
+            hits = {name: saved.get(name, 0) + unsaved.get(name, 0) for name in hits}
+            misses = saved.get('miss', 0) + unsaved.get('miss', 0)
+        total = sum(hits.values()) + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': (sum(hits.values()) / total) if total else 0.0,
+        }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Return the process-wide cache built from the DEVOPSGPT_CACHE_* settings"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            tiers = [MemoryTier()]
+            try:
+                tiers.append(SQLiteTier())
+            except (sqlite3.Error, OSError) as e:  # e.g. a read-only home directory
+                print(f"SQLite cache disabled: {e}")
+            if SHARED_DIR:
+                tiers.append(DirectoryTier())
+            _default = TieredCache(tiers)
+            atexit.register(_default.save_stats)
+        return _default
+
+
+def main(argv=None):
+    import sys
+
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else 'stats'
+    cache = default_cache()
+    if command == 'clear':
+        cache.clear()
+        print("Cache cleared.")
+    elif command == 'stats':
+        store = cache._store()
+        print(json.dumps({**(store.info() if store else {}), **cache.stats(lifetime=True)}, indent=2))
+    else:
+        print("Usage: python -m devopsgpt.cache [stats|clear]")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
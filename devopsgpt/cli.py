@@ -0,0 +1,169 @@
+"""Single command-line entry point for every generator.
+
+    python -m devopsgpt dockerfile python --extra "expose port 8000" -o .
+    python -m devopsgpt docker-ci --user me --image api --branch main,dev
+    python -m devopsgpt terraform-ci aws --tf-dir infra -o .github/workflows
+    python -m devopsgpt commit --provider bedrock
+    python -m devopsgpt commit --range v1.2.0..release/1.3
+
+Start-up is kept cheap: this module imports only the standard library, and
+each subcommand imports what it needs when it runs. Provider SDKs are
+imported by backends on first use, so only the selected provider's SDK is
+ever loaded, and none at all when a daemon (devopsgpt.daemon) answers.
+tests/test_import_time.py holds this to a budget.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+DEFAULT_PROVIDER = os.getenv("DEVOPSGPT_PROVIDER", "ollama")
+
+# File each subcommand saves to when given a directory with --output
+ARTIFACT_FILES = {
+    'dockerfile': 'Dockerfile',
+    'docker_ci': 'docker-ci.yml',
+    'terraform': 'terraform.yml',
+}
+
+
+def _generate(args, op, header, **params):
+    from devopsgpt import console, daemon
+
+    printer = console.StreamPrinter(header)
+    try:
+        content = daemon.request(op, args.provider, on_chunk=printer, **params)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        return None
+    except Exception as e:
+        print(f"Error: {e}")
+        return None
+    if not content:
+        print("Nothing was generated.")
+        return None
+    printer.finish(content)
+    return content
+
+
+def _save(args, artifact, content):
+    from devopsgpt import writer
+
+    path = Path(args.output)
+    if artifact in ARTIFACT_FILES and (path.is_dir() or not path.suffix):
+        path = path / ARTIFACT_FILES[artifact]
+    try:
+        status = writer.write_file(path, content if content.endswith('\n') else content + '\n', args.provider, artifact)
+    except OSError as e:
+        print(f"Error saving {path}: {e}")
+        return False
+    if status == writer.UNCHANGED:
+        print(f"\nUnchanged: {path.resolve()}")
+    else:
+        print(f"\nSaved to: {path.resolve()}")
+    return True
+
+
+def _finish(args, artifact, content):
+    if content is None:
+        return 1
+    if args.output and not _save(args, artifact, content):
+        return 1
+    return 0
+
+
+def cmd_dockerfile(args):
+    content = _generate(
+        args, 'dockerfile', "\nGenerated Dockerfile:\n",
+        language=args.language, extra_requirement=args.extra, root=args.root,
+    )
+    return _finish(args, 'dockerfile', content)
+
+
+def cmd_docker_ci(args):
+    content = _generate(
+        args, 'docker_ci', "\n--- Generated YAML ---\n", branch=args.branch, app_dir=args.app_dir,
+        dockerhub_user=args.user, image_name=args.image, customization=args.customization,
+    )
+    return _finish(args, 'docker_ci', content)
+
+
+def cmd_terraform_ci(args):
+    content = _generate(
+        args, 'terraform', "\n--- Generated YAML ---\n", cloud=args.cloud, branch=args.branch,
+        tf_dir=args.tf_dir, customization=args.customization,
+    )
+    return _finish(args, 'terraform', content)
+
+
+def cmd_commit(args):
+    import subprocess
+
+    from devopsgpt import gitdiff
+
+    if args.range:
+        from devopsgpt import commitrange
+
+        return commitrange.run(args.provider, args.range, args.workers, args.json)
+    try:
+        diff_text = gitdiff.read_diff(args.base, args.head)
+    except subprocess.CalledProcessError as e:
+        print("Error running git diff:", e)
+        return 1
+    if not diff_text:
+        print("No diff found.")
+        return 1
+    content = _generate(args, 'commit', "\nSuggested Commit Message:\n", diff_text=diff_text)
+    return _finish(args, 'commit', content)
+
+
+def build_parser():
+    from devopsgpt import providers
+
+    parser = argparse.ArgumentParser(prog='devopsgpt', description="Generate Dockerfiles, workflows and commit messages")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument(
+        '--provider', choices=providers.names(), default=DEFAULT_PROVIDER,
+        help=f"backend to use (default: DEVOPSGPT_PROVIDER or {DEFAULT_PROVIDER})",
+    )
+    common.add_argument('-o', '--output', help="save the result to this file or directory")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    dockerfile = commands.add_parser('dockerfile', parents=[common], help="generate a Dockerfile")
+    dockerfile.add_argument('language', help="programming language, e.g. Python, Node, Java")
+    dockerfile.add_argument('--extra', default='no', help="extra requirement for the Dockerfile")
+    dockerfile.add_argument('--root', default='.', help="project directory to analyze (default: .)")
+    dockerfile.set_defaults(handler=cmd_dockerfile)
+
+    docker_ci = commands.add_parser('docker-ci', parents=[common], help="generate a Docker build-and-push workflow")
+    docker_ci.add_argument('--user', required=True, help="Docker Hub username")
+    docker_ci.add_argument('--image', required=True, help="Docker image name")
+    docker_ci.add_argument('--branch', default='main', help="branch(es) to trigger on, comma-separated")
+    docker_ci.add_argument('--app-dir', default='.', help="directory containing the Dockerfile")
+    docker_ci.add_argument('--customization', help="free-form change to the workflow")
+    docker_ci.set_defaults(handler=cmd_docker_ci)
+
+    terraform = commands.add_parser('terraform-ci', parents=[common], help="generate a Terraform workflow")
+    terraform.add_argument('cloud', help="cloud provider: AWS, Azure or Google")
+    terraform.add_argument('--branch', default='main', help="branch(es) to trigger on, comma-separated")
+    terraform.add_argument('--tf-dir', default='.', help="Terraform directory")
+    terraform.add_argument('--customization', help="free-form change to the workflow")
+    terraform.set_defaults(handler=cmd_terraform_ci)
+
+    commit = commands.add_parser('commit', parents=[common], help="suggest a commit message for a diff")
+    commit.add_argument('--base', default='HEAD~1', help="diff from this revision (default: HEAD~1)")
+    commit.add_argument('--head', default='HEAD', help="diff to this revision (default: HEAD)")
+    commit.add_argument('--range', help="suggest a message for every commit in this range instead, e.g. v1.2..HEAD")
+    commit.add_argument('--workers', type=int, help="with --range, commits summarised at once")
+    commit.add_argument('--json', action='store_true', help="with --range, print the results as JSON")
+    commit.set_defaults(handler=cmd_commit)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""prepare-commit-msg hook that has a suggestion ready before git commit runs.
+
+A model call takes seconds, far too long to hold up ``git commit``. So the
+message is generated ahead of time: a watcher polls the index (a stat call)
+and, once staging has been quiet for DEVOPSGPT_HOOK_DEBOUNCE seconds, hashes
+the staged entries (``git ls-files --stage``) and generates a message for
+the staged diff in the background. Unlike ``git write-tree``, that only
+reads the index, so the watcher never holds index.lock while the user runs
+git add or git commit. The message is stored under that hash in the
+repository's git directory. At commit time the hook only hashes the index
+the same way and looks the message up. If a generation for it is still running, the
+hook waits at most DEVOPSGPT_HOOK_BUDGET seconds. Otherwise it leaves the
+message alone and the commit goes ahead as if there were no hook.
+
+install writes the prepare-commit-msg hook and a post-index-change hook
+that starts the watcher when it is not running, so nothing has to be
+started by hand. The watcher exits after DEVOPSGPT_HOOK_IDLE seconds
+without index changes. Generations go through the daemon when it is up.
+The hook does nothing for commits that already have a message (-m, -F,
+merges, amends, templates).
+
+Usage: python -m devopsgpt.commithook install [--provider ollama] [--force]
+       python -m devopsgpt.commithook [uninstall|watch|start|status]
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_PROVIDER = os.getenv("DEVOPSGPT_PROVIDER", "ollama")
+DEBOUNCE = float(os.getenv("DEVOPSGPT_HOOK_DEBOUNCE", "1.0"))
+BUDGET = float(os.getenv("DEVOPSGPT_HOOK_BUDGET", "0.2"))
+IDLE_TIMEOUT = float(os.getenv("DEVOPSGPT_HOOK_IDLE", "1800"))
+POLL_INTERVAL = 0.25
+# Stored messages kept per repository; older ones are removed
+MAX_MESSAGES = 64
+
+MARKER = "# installed by devopsgpt"
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+# A suggestion is a convenience, so nothing that goes wrong here may stop the commit
+PREPARE_HOOK = """#!/bin/sh
+{marker}
+PYTHONPATH="{root}${{PYTHONPATH:+:$PYTHONPATH}}" "{python}" -m devopsgpt.commithook prepare --provider {provider} "$@"
+exit 0
+"""
+
+# Runs on every index write, so it checks the pid file in the shell and only starts Python when needed
+INDEX_HOOK = """#!/bin/sh
+{marker}
+kill -0 "$(cat "{pidfile}" 2>/dev/null)" 2>/dev/null && exit 0
+PYTHONPATH="{root}${{PYTHONPATH:+:$PYTHONPATH}}" "{python}" -m devopsgpt.commithook start --provider {provider} >/dev/null 2>&1
+exit 0
+"""
+
+HOOKS = {'prepare-commit-msg': PREPARE_HOOK, 'post-index-change': INDEX_HOOK}
+
+
+def _git(*args, cwd=None):
+    result = subprocess.run(['git', *args], cwd=cwd, capture_output=True, check=True)
+    return result.stdout.decode('utf-8', errors='replace').strip()
+
+
+def git_paths(cwd=None):
+    """(index file, state directory, hooks directory) of the repository at cwd"""
+    paths = _git('rev-parse', '--git-path', 'index', '--git-path', 'devopsgpt', '--git-path', 'hooks', cwd=cwd)
+    # Relative to cwd unless the git directory is elsewhere
+    base = Path(cwd or '.').resolve()
+    index, state, hooks = (base / path for path in paths.splitlines())
+    return index, state, hooks
+
+
+def staged_key(cwd=None):
+    """Hash of the entries the index would commit, or None when nothing is staged
+
+    Only reads the index (write-tree would take index.lock), and honours
+    GIT_INDEX_FILE, so the hook sees the index git is about to commit.
+    """
+    unchanged = subprocess.run(
+        ['git', 'diff-index', '--cached', '--quiet', 'HEAD', '--'], cwd=cwd, capture_output=True,
+    ).returncode == 0  # Fails without a HEAD too: then everything in the index is new
+    if unchanged:
+        return None
+    entries = _git('ls-files', '--stage', '-z', cwd=cwd)
+    return hashlib.sha1(entries.encode('utf-8')).hexdigest() if entries else None
+
+
+def _message_path(state, provider, key):
+    return state / 'messages' / f"{provider}-{key}.txt"
+
+
+def _pending_path(state, provider, key):
+    return state / 'messages' / f"{provider}-{key}.pending"
+
+
+def lookup(provider, key, cwd=None, state=None):
+    """The stored message for key (see staged_key), or None"""
+    state = state or git_paths(cwd)[1]
+    try:
+        return _message_path(state, provider, key).read_text() or None
+    except OSError:
+        return None
+
+
+def pregenerate(provider, cwd=None):
+    """Generate and store a message for what is staged now, unless one is already stored"""
+    from devopsgpt import daemon, gitdiff, writer
+
+    state = git_paths(cwd)[1]
+    key = staged_key(cwd)
+    if key is None or lookup(provider, key, state=state) is not None:
+        return None
+    pending = _pending_path(state, provider, key)
+    pending.parent.mkdir(parents=True, exist_ok=True)
+    pending.write_text(str(os.getpid()))
+    try:
+        diff_text = gitdiff.read_diff('--cached', None, cwd=cwd)
+        if not diff_text:
+            return None
+        message = daemon.request('commit', provider, diff_text=diff_text)
+        if message:
+            writer.write_file(_message_path(state, provider, key), message.strip() + "\n", provider, 'commit')
+        return message
+    finally:
+        pending.unlink(missing_ok=True)
+        _prune(state / 'messages')
+
+
+def _prune(directory):
+    files = sorted(directory.glob('*.txt'), key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in files[MAX_MESSAGES:]:
+        path.unlink(missing_ok=True)
+
+
+def watch(provider, debounce=DEBOUNCE, idle_timeout=IDLE_TIMEOUT, cwd=None):
+    """Pre-generate a message whenever the index settles after a change"""
+    index, state, _ = git_paths(cwd)
+    pidfile = state / 'watch.pid'
+    state.mkdir(parents=True, exist_ok=True)
+    pidfile.write_text(str(os.getpid()))
+    last_seen = None
+    changed_at = time.monotonic()  # Cover whatever was staged before the watcher started
+    last_change = time.monotonic()
+    try:
+        while True:
+            try:
+                seen = index.stat().st_mtime_ns
+            except FileNotFoundError:
+                seen = None
+            now = time.monotonic()
+            if seen != last_seen:
+                last_seen = seen
+                changed_at = last_change = now
+            elif changed_at is not None and now - changed_at >= debounce:
+                changed_at = None
+                try:
+                    pregenerate(provider, cwd)
+                except Exception as e:
+                    print(f"Pre-generation failed: {e}", flush=True)
+            elif idle_timeout and now - last_change > idle_timeout:
+                return
+            time.sleep(POLL_INTERVAL)
+    finally:
+        try:
+            if pidfile.read_text().strip() == str(os.getpid()):
+                pidfile.unlink()
+        except OSError:
+            pass
+
+
+def watcher_pid(cwd=None):
+    """Pid of the repository's running watcher, or None"""
+    try:
+        pid = int((git_paths(cwd)[1] / 'watch.pid').read_text())
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return None
+    return pid
+
+
+def start(provider, cwd=None):
+    """Start the watcher in the background unless it is already running"""
+    if watcher_pid(cwd) is not None:
+        return False
+    state = git_paths(cwd)[1]
+    state.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, (str(PACKAGE_ROOT), os.getenv('PYTHONPATH'))))}
+    # Hooks may run against a temporary index; the watcher follows the real one
+    env.pop('GIT_INDEX_FILE', None)
+    with open(state / 'watch.log', 'a') as out:
+        subprocess.Popen(
+            [sys.executable, '-m', 'devopsgpt.commithook', 'watch', '--provider', provider],
+            stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.STDOUT, cwd=cwd, env=env,
+            start_new_session=True,
+        )
+    return True
+
+
+def prepare(message_file, source=None, provider=DEFAULT_PROVIDER, budget=BUDGET, cwd=None):
+    """The hook itself: put the stored suggestion into message_file if it is ready in time
+
+    Never fails the commit; returns True when a suggestion was inserted.
+    """
+    if source:
+        return False  # The message comes from -m, -F, a merge, an amend or a template
+    deadline = time.monotonic() + budget
+    try:
+        state = git_paths(cwd)[1]
+        key = staged_key(cwd)
+        if key is None:
+            return False
+        while True:
+            message = lookup(provider, key, state=state)
+            if message or time.monotonic() >= deadline or not _pending_path(state, provider, key).exists():
+                break
+            time.sleep(0.02)
+        if not message:
+            start(provider, cwd)
+            return False
+        path = Path(message_file)
+        path.write_text(message.rstrip('\n') + "\n" + path.read_text())
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+
+def install(provider=DEFAULT_PROVIDER, force=False, cwd=None):
+    """Write the hooks into the repository at cwd; raises FileExistsError for hooks that are not ours"""
+    _, state, hooks = git_paths(cwd)
+    values = {
+        'marker': MARKER, 'root': PACKAGE_ROOT, 'python': sys.executable, 'provider': provider,
+        'pidfile': state / 'watch.pid',
+    }
+    for name in HOOKS:
+        path = hooks / name
+        if path.exists() and MARKER not in path.read_text() and not force:
+            raise FileExistsError(f"{path} already exists; use --force to replace it")
+    hooks.mkdir(parents=True, exist_ok=True)
+    for name, template in HOOKS.items():
+        path = hooks / name
+        path.write_text(template.format(**values))
+        path.chmod(0o755)
+    return [hooks / name for name in HOOKS]
+
+
+def uninstall(cwd=None):
+    _, _, hooks = git_paths(cwd)
+    removed = []
+    for name in HOOKS:
+        path = hooks / name
+        if path.exists() and MARKER in path.read_text():
+            path.unlink()
+            removed.append(path)
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suggest commit messages from a git hook without waiting for the model")
+    parser.add_argument('command', choices=('install', 'uninstall', 'watch', 'start', 'status', 'prepare'))
+    parser.add_argument('args', nargs='*', help=argparse.SUPPRESS)
+    parser.add_argument('--provider', default=DEFAULT_PROVIDER, help=f"backend to use (default: {DEFAULT_PROVIDER})")
+    parser.add_argument('--force', action='store_true', help="replace existing hooks")
+    args = parser.parse_intermixed_args(argv)
+
+    if args.command == 'prepare':
+        # Called by git as: prepare-commit-msg <file> [<source> [<sha>]]
+        if args.args:
+            prepare(args.args[0], args.args[1] if len(args.args) > 1 else None, args.provider)
+        return 0
+    try:
+        if args.command == 'install':
+            for path in install(args.provider, args.force):
+                print(f"Installed {path}")
+        elif args.command == 'uninstall':
+            removed = uninstall()
+            print('\n'.join(f"Removed {path}" for path in removed) or "No devopsgpt hooks installed.")
+        elif args.command == 'watch':
+            try:
+                watch(args.provider)
+            except KeyboardInterrupt:
+                pass
+        elif args.command == 'start':
+            print("Watcher started." if start(args.provider) else "Watcher already running.")
+        else:
+            pid = watcher_pid()
+            print(f"Watcher running (pid {pid})" if pid else "No watcher running.")
+    except (FileExistsError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
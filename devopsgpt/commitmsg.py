@@ -0,0 +1,162 @@
+"""Commit message generation that scales to large diffs.
+
+Small diffs go to the model in one prompt. Larger ones are split per file
+and, where a single file is still too big, per hunk. Each chunk is
+summarised concurrently (map), and the partial summaries are folded into
+one commit message (reduce). Chunk size follows the selected model's
+context window.
+"""
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from devopsgpt import backends, generators, metrics, prompts, providers
+
+# Parallel summary calls; by default as many as the provider allows at once
+MAX_WORKERS = int(os.environ["DEVOPSGPT_COMMIT_WORKERS"]) if os.getenv("DEVOPSGPT_COMMIT_WORKERS") else None
+CHARS_PER_TOKEN = 4
+# Share of the context window a single chunk may use; the rest is left for instructions and output
+CHUNK_SHARE = 0.5
+# Hard ceiling so million-token models still get reasonably sized map calls
+MAX_CHUNK_TOKENS = int(os.getenv("DEVOPSGPT_COMMIT_CHUNK_TOKENS", "24000"))
+
+COMMIT_PROMPT = (
+    "Based on the following Git diff, generate a concise and meaningful commit message :\n\n"
+    "{diff}"
+)
+
+MAP_PROMPT = (
+    "Summarize the following part of a Git diff in two or three short bullet points. "
+    "Mention the files touched and what changed, not how.\n\n"
+    "{diff}"
+)
+
+REDUCE_PROMPT = (
+    "The following are summaries of the parts of one Git commit. "
+    "Combine them into a single concise and meaningful commit message:\n\n"
+    "{summaries}"
+)
+
+_FILE_SPLIT = re.compile(r'^(?=diff --git )', re.M)
+_HUNK_SPLIT = re.compile(r'^(?=@@ )', re.M)
+
+
+def chunk_chars(provider, model=None):
+    """Largest diff chunk, in characters, that fits the model comfortably"""
+    tokens = min(int(providers.context_window(provider, model) * CHUNK_SHARE), MAX_CHUNK_TOKENS)
+    return tokens * CHARS_PER_TOKEN
+
+
+def split_diff(diff_text, limit):
+    """Split a unified diff into chunks of at most limit characters
+
+    Files are kept whole when they fit. Oversized files are split on hunk
+    boundaries, repeating the file header on each piece, and hunks that are
+    still too large are cut at line boundaries.
+    """
+    chunks = []
+    current = ''
+    for file_diff in filter(None, _FILE_SPLIT.split(diff_text)):
+        if len(file_diff) > limit:
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.extend(_split_file(file_diff, limit))
+        elif len(current) + len(file_diff) > limit:
+            chunks.append(current)
+            current = file_diff
+        else:
+            current += file_diff
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _split_file(file_diff, limit):
+    parts = _HUNK_SPLIT.split(file_diff)
+    header, hunks = parts[0], parts[1:]
+    room = max(limit - len(header), limit // 2)
+    pieces = []
+    current = ''
+    for hunk in hunks:
+        for piece in _cut_lines(hunk, room):
+            if current and len(current) + len(piece) > room:
+                pieces.append(header + current)
+                current = ''
+            current += piece
+    if current or not pieces:
+        pieces.append(header + current)
+    return pieces
+
+
+def _cut_lines(text, limit):
+    if len(text) <= limit:
+        return [text]
+    pieces = []
+    current = ''
+    for line in text.splitlines(keepends=True):
+        if current and len(current) + len(line) > limit:
+            pieces.append(current)
+            current = ''
+        current += line[:limit]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _summarize(provider, model, chunk):
+    return backends.generate(
+        provider, MAP_PROMPT.format(diff=chunk), model=model, max_tokens=prompts.OUTPUT_BUDGETS['summary']
+    )
+
+
+def _reduce(provider, model, summaries, limit, on_chunk, max_workers):
+    joined = "\n\n".join(summaries)
+    if len(joined) <= limit or len(summaries) <= 2:
+        return generators.generate(
+            provider, REDUCE_PROMPT.format(summaries=joined), model=model, on_chunk=on_chunk, artifact='commit'
+        )
+
+    # Too many summaries for one prompt: fold them in groups first
+    groups = []
+    current = []
+    size = 0
+    for summary in summaries:
+        if current and size + len(summary) > limit:
+            groups.append(current)
+            current = []
+            size = 0
+        current.append(summary)
+        size += len(summary) + 2
+    groups.append(current)
+    if len(groups) == len(summaries):
+        # Every summary is too long to pair up; reduce them two at a time
+        groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+
+    def fold(group):
+        return backends.generate(
+            provider, REDUCE_PROMPT.format(summaries="\n\n".join(group)), model=model,
+            max_tokens=prompts.OUTPUT_BUDGETS['summary']
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        folded = list(pool.map(metrics.bind(fold), groups))
+    return _reduce(provider, model, folded, limit, on_chunk, max_workers)
+
+
+def generate_commit_message(provider, diff_text, model=None, on_chunk=None, max_workers=None):
+    """Generate a commit message for diff_text, using map-reduce when it is too big for one prompt"""
+    with metrics.generation(provider, model, artifact='commit'):
+        limit = chunk_chars(provider, model)
+        if len(diff_text) <= limit:
+            return generators.generate(
+                provider, COMMIT_PROMPT.format(diff=diff_text), model=model, on_chunk=on_chunk, artifact='commit'
+            )
+
+        max_workers = max_workers or MAX_WORKERS or providers.get(provider).concurrency
+        with metrics.span('render'):
+            chunks = split_diff(diff_text, limit)
+        summarize = metrics.bind(lambda chunk: _summarize(provider, model, chunk))
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            summaries = list(pool.map(summarize, chunks))
+        return _reduce(provider, model, summaries, limit, on_chunk, max_workers)
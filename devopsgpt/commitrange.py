@@ -0,0 +1,262 @@
+"""Commit messages for every commit in a range, cached by commit SHA.
+
+The whole range is read from one ``git log -p`` pipe and split into
+commits as it streams, instead of running ``git diff`` once per commit.
+Each commit's diff is filtered like gitdiff.read_diff (lockfiles,
+generated and vendored files are left out) and cut to the same budget,
+then the commits are summarised concurrently, as many at once as the
+provider allows.
+
+A commit never changes once it has a SHA, so its message is cached under
+the SHA (plus provider, model and prompt) in a SQLite database that needs
+no expiry or invalidation. Only commits missing from it are read with -p
+and sent to the model; rerunning over a release branch, or extending the
+range, costs nothing for the commits already done. Merge commits are
+skipped. DEVOPSGPT_CACHE=0 turns the cache off.
+
+Usage: python -m devopsgpt.commitrange v1.2.0..release/1.3 [--provider ollama] [--workers N] [--json]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from devopsgpt import backends, cache, commitmsg, gitdiff, journal, metrics, providers
+
+DB_PATH = os.getenv("DEVOPSGPT_COMMIT_CACHE_DB", str(Path.home() / ".cache" / "devopsgpt" / "commits.sqlite3"))
+DEFAULT_PROVIDER = os.getenv("DEVOPSGPT_PROVIDER", "ollama")
+
+# Starts each commit's header line in the log; a diff line never begins with it
+_MARK = '\x1e'
+_FORMAT = f'--format={_MARK}%H%x00%s'
+
+
+class ShaCache:
+    """Commit messages keyed by commit SHA and the variant (provider, model, prompt) that wrote them"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS commits ("
+            "sha TEXT NOT NULL, variant TEXT NOT NULL, message TEXT NOT NULL, created REAL NOT NULL, "
+            "PRIMARY KEY (sha, variant))"
+        )
+
+    def get_many(self, shas, variant):
+        """{sha: message} for the shas that have one"""
+        found = {}
+        shas = list(shas)
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(shas), 500):
+                batch = shas[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT sha, message FROM commits WHERE variant = ? AND sha IN ({','.join('?' * len(batch))})",
+                    [variant, *batch],
+                )
+                found.update(rows)
+        return found
+
+    def put(self, sha, variant, message):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO commits (sha, variant, message, created) VALUES (?, ?, ?, ?)",
+                (sha, variant, message, time.time()),
+            )
+
+    def info(self):
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(message)), 0) FROM commits").fetchone()
+        return {'path': self.path, 'entries': count, 'bytes': size}
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM commits")
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide ShaCache, or None when caching is turned off"""
+    global _default
+    if not cache.CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default is None:
+            _default = ShaCache()
+        return _default
+
+
+def variant(provider, model=None):
+    """Everything besides the SHA that decides a cached message"""
+    model, _ = backends.resolve(provider, model)
+    return journal.fingerprint(provider, model, commitmsg.COMMIT_PROMPT, commitmsg.MAP_PROMPT, commitmsg.REDUCE_PROMPT)
+
+
+def list_commits(rev_range, cwd=None):
+    """[(sha, subject)] of the non-merge commits in rev_range, oldest first"""
+    result = subprocess.run(
+        ['git', 'log', '--no-merges', '--reverse', '-z', '--format=%H%x00%s', rev_range],
+        cwd=cwd, capture_output=True, check=True,
+    )
+    fields = result.stdout.decode('utf-8', errors='replace').split('\0')
+    return [(fields[i].strip(), fields[i + 1]) for i in range(0, len(fields) - 1, 2) if fields[i].strip()]
+
+
+class _CommitDiff:
+    """One commit's diff as it streams in, kept within budget bytes"""
+
+    def __init__(self, sha, subject, budget, exclude):
+        self.sha = sha
+        self.subject = subject
+        self.budget = budget
+        self.exclude = exclude
+        self.lines = []
+        self.used = 0
+        self.omitted = []
+        self.truncated = False
+        self.skipping = False
+
+    def add(self, line):
+        if line.startswith('diff --git '):
+            path = gitdiff.diff_path(line) or ''
+            self.skipping = gitdiff.excluded(path, self.exclude)
+            if self.skipping:
+                self.omitted.append(path)
+        if self.skipping or self.truncated or (not self.lines and not line.strip()):
+            return
+        if self.used + len(line) > self.budget:
+            self.truncated = True
+            return
+        self.lines.append(line)
+        self.used += len(line)
+
+    def text(self):
+        parts = list(self.lines)
+        if self.truncated:
+            parts.append("... [diff truncated]\n")
+        if self.omitted:
+            listed = ', '.join(self.omitted[:gitdiff.MAX_OMITTED_LISTED])
+            more = len(self.omitted) - gitdiff.MAX_OMITTED_LISTED
+            parts.append(f"# Also changed, not shown: {listed}" + (f" and {more} more" if more > 0 else "") + "\n")
+        return ''.join(parts).strip()
+
+
+def stream_commits(shas, cwd=None, exclude=()):
+    """Yield (sha, subject, diff) for shas from a single ``git log -p``, each diff filtered and budgeted"""
+    if not shas:
+        return
+    cmd = ['git', 'log', '-p', '--no-color', '--no-ext-diff', '--no-walk=unsorted', _FORMAT, *shas]
+    budget = min(gitdiff.MAX_BYTES, gitdiff.MAX_TOKENS * gitdiff.CHARS_PER_TOKEN)
+    current = None
+    for line in gitdiff.stream_lines(cmd, cwd):
+        if line.startswith(_MARK):
+            if current:
+                yield current.sha, current.subject, current.text()
+            sha, _, subject = line[1:].rstrip('\n').partition('\0')
+            current = _CommitDiff(sha, subject, budget, exclude)
+        elif current:
+            current.add(line)
+    if current:
+        yield current.sha, current.subject, current.text()
+
+
+def summarize_range(provider, rev_range, model=None, max_workers=None, cwd=None, exclude=(), on_result=None):
+    """Commit message for every non-merge commit in rev_range, oldest first
+
+    Returns [{'sha', 'subject', 'message', 'cached'}] (with 'error' instead of
+    'message' for a commit that failed). on_result is called with each entry
+    as it completes.
+    """
+    commits = list_commits(rev_range, cwd)
+    key = variant(provider, model)
+    sha_cache = default_cache()
+    known = sha_cache.get_many((sha for sha, _ in commits), key) if sha_cache else {}
+    results = {}
+    for sha, subject in commits:
+        if sha in known:
+            results[sha] = {'sha': sha, 'subject': subject, 'message': known[sha], 'cached': True}
+            if on_result:
+                on_result(results[sha])
+
+    def summarize(sha, subject, diff):
+        entry = {'sha': sha, 'subject': subject, 'cached': False}
+        try:
+            if diff:
+                entry['message'] = commitmsg.generate_commit_message(provider, diff, model=model)
+            else:
+                # Nothing left after filtering (lockfile bumps, empty commits): the subject says it all
+                entry['message'] = subject
+            if not entry['message']:
+                raise RuntimeError("empty response from model")
+            if sha_cache and diff:
+                sha_cache.put(sha, key, entry['message'])
+        except Exception as e:
+            entry.pop('message', None)
+            entry['error'] = str(e)
+        return entry
+
+    missing = [sha for sha, _ in commits if sha not in results]
+    max_workers = max_workers or commitmsg.MAX_WORKERS or providers.get(provider).concurrency
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # Commits are handed to the pool as the log streams in, so the model starts on the first one early
+        futures = [
+            pool.submit(metrics.bind(summarize), sha, subject, diff)
+            for sha, subject, diff in stream_commits(missing, cwd, exclude)
+        ]
+        for future in as_completed(futures):
+            entry = future.result()
+            results[entry['sha']] = entry
+            if on_result:
+                on_result(entry)
+    return [results[sha] for sha, _ in commits if sha in results]
+
+
+def run(provider, rev_range, max_workers=None, as_json=False, cwd=None):
+    """Print a message for each commit in rev_range as it completes; returns an exit code"""
+    def show(entry):
+        if as_json:
+            return
+        body = entry.get('message') or f"Error: {entry['error']}"
+        print(f"\n{entry['sha'][:12]} {entry['subject']}{' (cached)' if entry['cached'] else ''}\n{body}")
+
+    try:
+        results = summarize_range(provider, rev_range, max_workers=max_workers, cwd=cwd, on_result=show)
+    except subprocess.CalledProcessError as e:
+        print("Error running git log:", (e.stderr or b'').decode('utf-8', errors='replace').strip() or e)
+        return 1
+    if not results:
+        print("No commits found in", rev_range)
+        return 1
+    if as_json:
+        print(json.dumps(results, indent=2))
+    return 1 if any('error' in entry for entry in results) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suggest a commit message for every commit in a range")
+    parser.add_argument('range', help="revision range, e.g. v1.2.0..HEAD or main..release")
+    parser.add_argument(
+        '--provider', choices=providers.names(), default=DEFAULT_PROVIDER,
+        help=f"backend to use (default: DEVOPSGPT_PROVIDER or {DEFAULT_PROVIDER})",
+    )
+    parser.add_argument('--workers', type=int, help="commits summarised at once (default: provider concurrency)")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args(argv)
+    return run(args.provider, args.range, args.workers, args.json)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""Terminal helpers shared by the interactive scripts."""
+import sys
+
+
+class StreamPrinter:
+    """Writes streamed chunks as they arrive, printing the header before the first one"""
+
+    def __init__(self, header, out=None):
+        self.header = header
+        self.out = out or sys.stdout
+        self.started = False
+        self.parts = []
+
+    def __call__(self, chunk):
+        if not self.started:
+            print(self.header, file=self.out)
+            self.started = True
+        self.parts.append(chunk)
+        self.out.write(chunk)
+        self.out.flush()
+
+    def finish(self, text):
+        """Print text in full if nothing was streamed, otherwise end the streamed output
+
+        If text differs from what was streamed (it was repaired after
+        validation), the final version is printed as well.
+        """
+        if self.started:
+            print(file=self.out)
+            if text.strip() != ''.join(self.parts).strip():
+                print("\n--- Corrected after validation ---\n", file=self.out)
+                print(text, file=self.out)
+        else:
+            print(self.header, file=self.out)
+            print(text, file=self.out)
@@ -0,0 +1,330 @@
+"""Resident generation daemon with warm clients, and the client that talks to it.
+
+A fresh script run pays for interpreter start, SDK imports, credential
+lookup and TLS handshakes, and Ollama may have to load the model. The
+daemon does all of that once and keeps it: provider clients and their
+connection pools, the response caches, the project index and, for Ollama,
+the model itself (via keep_alive). Scripts and git hooks then get an
+answer in the time the model takes.
+
+Requests are single JSON lines over a Unix socket (localhost TCP where
+Unix sockets are unavailable); the reply streams back as JSON lines of
+``{"chunk": ...}`` followed by ``{"result": ...}`` or ``{"error": ...}``.
+
+request() is what the scripts call: it goes through the daemon when one is
+listening and otherwise runs the same generation in-process, so the daemon
+is purely an accelerator. DEVOPSGPT_DAEMON=0 skips it entirely.
+
+Usage: python -m devopsgpt.daemon [start|serve|stop|status] [--warm ollama,bedrock]
+"""
+import argparse
+import importlib
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from devopsgpt import metrics
+
+DAEMON_ENABLED = os.getenv("DEVOPSGPT_DAEMON", "1") != "0"
+HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+SOCKET_PATH = os.getenv(
+    "DEVOPSGPT_DAEMON_SOCKET",
+    str(Path(os.getenv("XDG_RUNTIME_DIR") or Path.home() / ".cache" / "devopsgpt") / "daemon.sock"),
+)
+TCP_ADDRESS = ('127.0.0.1', int(os.getenv("DEVOPSGPT_DAEMON_PORT", "8765")))
+IDLE_TIMEOUT = float(os.getenv("DEVOPSGPT_DAEMON_IDLE", "1800"))
+# How long Ollama keeps the model loaded after the warm-up request
+OLLAMA_KEEP_ALIVE = os.getenv("DEVOPSGPT_DAEMON_KEEP_ALIVE", "30m")
+CONNECT_TIMEOUT = 0.2
+# A live daemon answers a ping at once; one that does not is treated as gone
+PING_TIMEOUT = 2.0
+
+# Operations the daemon serves, as (module, function); params are passed as keywords.
+# They are imported on first use, so a client that finds the daemon never loads them.
+OPERATIONS = {
+    'dockerfile': ('devopsgpt.generators', 'generate_dockerfile'),
+    'docker_ci': ('devopsgpt.generators', 'generate_docker_ci'),
+    'terraform': ('devopsgpt.generators', 'generate_githubaction'),
+    'commit': ('devopsgpt.commitmsg', 'generate_commit_message'),
+}
+
+
+def execute(op, provider, params, on_chunk=None):
+    """Run one operation in this process"""
+    if op not in OPERATIONS:
+        raise ValueError(f"Unknown operation: {op}")
+    module, name = OPERATIONS[op]
+    return getattr(importlib.import_module(module), name)(provider, on_chunk=on_chunk, **params)
+
+
+def warm(providers):
+    """Import the generators, build the clients for providers and load the default Ollama model"""
+    from devopsgpt import backends, cache
+    from devopsgpt import providers as registry
+
+    for module, _ in OPERATIONS.values():
+        importlib.import_module(module)
+    cache.default_cache()
+    for provider in providers:
+        try:
+            client = backends.get_client(provider)
+            if provider == 'ollama':
+                # An empty prompt only loads the model
+                client.generate(model=registry.default_model('ollama'), prompt='', keep_alive=OLLAMA_KEEP_ALIVE)
+            print(f"Warmed {provider}")
+        except Exception as e:
+            print(f"Could not warm {provider}: {e}")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self.server.touch(1)
+        try:
+            self._handle()
+        finally:
+            self.server.touch(-1)
+
+    def _handle(self):
+        try:
+            request = json.loads(self.rfile.readline() or b'{}')
+        except ValueError:
+            self._send({'error': "malformed request", 'type': 'ValueError'})
+            return
+        op = request.get('op')
+        try:
+            if op == 'ping':
+                self._send({'result': self.server.status()})
+            elif op == 'shutdown':
+                self._send({'result': 'stopping'})
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                on_chunk = (lambda chunk: self._send({'chunk': chunk})) if request.get('stream') else None
+                result = execute(op, request.get('provider'), request.get('params') or {}, on_chunk)
+                self.server.served += 1
+                self._send({'result': result})
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client went away (e.g. Ctrl-C); the generation was abandoned with it
+        except Exception as e:
+            try:
+                self._send({'error': str(e), 'type': type(e).__name__})
+            except OSError:
+                pass
+
+    def _send(self, message):
+        self.wfile.write(json.dumps(message).encode('utf-8') + b"\n")
+        self.wfile.flush()
+
+
+class _ServerMixin:
+    daemon_threads = True
+
+    def setup_state(self):
+        self.started = time.time()
+        self.last_active = time.monotonic()
+        self.active = 0
+        self.served = 0
+        self._state_lock = threading.Lock()
+
+    def touch(self, delta=0):
+        """Note activity; delta counts requests starting (1) and finishing (-1)"""
+        with self._state_lock:
+            self.active += delta
+            self.last_active = time.monotonic()
+
+    def idle_for(self):
+        with self._state_lock:
+            return 0.0 if self.active else time.monotonic() - self.last_active
+
+    def status(self):
+        from devopsgpt import backends, cache
+
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started, 1),
+            'served': self.served,
+            'clients': sorted(str(key) for key in backends.pooled_clients()),
+            'cache': cache.default_cache().stats(),
+        }
+
+
+if HAS_UNIX_SOCKETS:
+    class _UnixServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+        pass
+
+
+class _TCPServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+def _address():
+    return SOCKET_PATH if HAS_UNIX_SOCKETS else TCP_ADDRESS
+
+
+def _connect(timeout=CONNECT_TIMEOUT):
+    family = socket.AF_UNIX if HAS_UNIX_SOCKETS else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(_address())
+    except OSError:
+        sock.close()
+        raise
+    # Generations take as long as the model does
+    sock.settimeout(None)
+    return sock
+
+
+def _exchange(sock, message, on_chunk=None):
+    sock.sendall(json.dumps(message).encode('utf-8') + b"\n")
+    with sock.makefile('rb') as replies:
+        for line in replies:
+            reply = json.loads(line)
+            if 'chunk' in reply:
+                if on_chunk is not None:
+                    on_chunk(reply['chunk'])
+            elif 'error' in reply:
+                raise RuntimeError(f"{reply.get('type', 'Error')}: {reply['error']}")
+            else:
+                return reply.get('result')
+    raise ConnectionError("daemon closed the connection")
+
+
+def request(op, provider, on_chunk=None, **params):
+    """Run op through the daemon when it is up, otherwise in this process
+
+    Relative paths are resolved here, since the daemon has its own working
+    directory.
+    """
+    if op == 'dockerfile':
+        params['root'] = str(Path(params.get('root') or '.').resolve())
+    if DAEMON_ENABLED:
+        try:
+            sock = _connect()
+        except OSError:
+            sock = None
+        if sock is not None:
+            with sock:
+                message = {'op': op, 'provider': provider, 'params': params, 'stream': on_chunk is not None}
+                return _exchange(sock, message, on_chunk)
+    return execute(op, provider, params, on_chunk)
+
+
+def status():
+    """The running daemon's status, or None when none is listening or it does not answer"""
+    try:
+        with _connect() as sock:
+            sock.settimeout(PING_TIMEOUT)
+            return _exchange(sock, {'op': 'ping'})
+    except (OSError, ValueError):
+        return None
+
+
+def serve(providers=(), idle_timeout=IDLE_TIMEOUT):
+    """Serve requests until stopped or idle for idle_timeout seconds"""
+    if status() is not None:
+        raise RuntimeError(f"a daemon is already listening on {_address()}")
+    # Warm up before binding, so a failure here never leaves a socket nobody answers on
+    warm(providers)
+    if HAS_UNIX_SOCKETS:
+        path = Path(SOCKET_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.unlink(missing_ok=True)
+        # Only this user may connect: requests run with this user's credentials
+        old_umask = os.umask(0o177)
+        try:
+            server = _UnixServer(str(path), _Handler)
+        finally:
+            os.umask(old_umask)
+    else:
+        server = _TCPServer(TCP_ADDRESS, _Handler)
+    try:
+        server.setup_state()
+
+        def watch_idle():
+            while idle_timeout:
+                time.sleep(min(idle_timeout, 30))
+                if server.idle_for() > idle_timeout:
+                    print("Idle timeout reached, stopping.")
+                    server.shutdown()
+                    return
+
+        threading.Thread(target=watch_idle, daemon=True).start()
+        print(f"DevopsGPT daemon listening on {_address()} (pid {os.getpid()})", flush=True)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if HAS_UNIX_SOCKETS:
+            Path(SOCKET_PATH).unlink(missing_ok=True)
+        metrics.flush()
+
+
+def start(providers=(), wait=10.0):
+    """Launch serve in the background and wait until it answers"""
+    if status() is not None:
+        return True
+    command = [sys.executable, '-m', 'devopsgpt.daemon', 'serve']
+    if providers:
+        command += ['--warm', ','.join(providers)]
+    log = Path(SOCKET_PATH).with_suffix('.log') if HAS_UNIX_SOCKETS else os.devnull
+    Path(log).parent.mkdir(parents=True, exist_ok=True)
+    with open(log, 'a') as out:
+        subprocess.Popen(
+            command, stdin=subprocess.DEVNULL, stdout=out, stderr=subprocess.STDOUT,
+            cwd=str(Path(__file__).resolve().parent.parent), start_new_session=True,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        if status() is not None:
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def stop():
+    try:
+        with _connect() as sock:
+            _exchange(sock, {'op': 'shutdown'})
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep provider clients, caches and models warm between runs")
+    parser.add_argument('command', nargs='?', default='status', choices=('start', 'serve', 'stop', 'status'))
+    parser.add_argument('--warm', default='', help="comma-separated providers to connect to up front")
+    parser.add_argument('--idle', type=float, default=IDLE_TIMEOUT, help="seconds without requests before exiting (0: never)")
+    args = parser.parse_args(argv)
+    providers = [name.strip() for name in args.warm.split(',') if name.strip()]
+
+    if args.command == 'serve':
+        try:
+            serve(providers, args.idle)
+        except KeyboardInterrupt:
+            pass
+        except RuntimeError as e:
+            print(e)
+            return 1
+        return 0
+    if args.command == 'start':
+        if start(providers):
+            print(f"Daemon running on {_address()}")
+            return 0
+        print("Daemon did not come up; see the log next to the socket")
+        return 1
+    if args.command == 'stop':
+        print("Daemon stopped." if stop() else "No daemon running.")
+        return 0
+    info = status()
+    print(json.dumps(info, indent=2) if info else "No daemon running.")
+    return 0 if info else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""Rule-based Dockerfiles for the stacks the scripts know.
+
+Python, Node, Java, Go, Ruby and PHP projects get a best-practice,
+multi-stage Dockerfile rendered locally from the files in the project
+(dependency manifest, lockfile, entry point, port, toolchain version) in
+about a millisecond. Generation only goes to the model when the user asks
+for something extra, and then only to patch the rendered file.
+
+render() returns None when it cannot produce a sound Dockerfile (unknown
+language, Java without Maven or Gradle, Go without go.mod, Python that
+declares its dependencies outside requirements.txt), and callers fall back
+to a full model generation. Set DEVOPSGPT_DOCKERFILE_TEMPLATES=0 to
+always use the model.
+"""
+import json
+import os
+import re
+from pathlib import Path
+
+from devopsgpt import analyzer
+
+TEMPLATES_ENABLED = os.getenv("DEVOPSGPT_DOCKERFILE_TEMPLATES", "1") != "0"
+
+LANGUAGE_ALIASES = {
+    'python': 'python', 'py': 'python',
+    'javascript': 'javascript', 'js': 'javascript', 'node': 'javascript', 'nodejs': 'javascript',
+    'node.js': 'javascript', 'typescript': 'javascript', 'ts': 'javascript',
+    'java': 'java',
+    'golang': 'golang', 'go': 'golang',
+    'ruby': 'ruby', 'rb': 'ruby',
+    'php': 'php',
+}
+
+PYTHON_ENTRY_POINTS = ('main.py', 'app.py', 'server.py', 'run.py', 'wsgi.py')
+NODE_ENTRY_POINTS = ('index.js', 'server.js', 'app.js')
+NODE_LOCKFILES = ('package-lock.json', 'yarn.lock', 'pnpm-lock.yaml')
+GRADLE_FILES = ('build.gradle.kts', 'build.gradle')
+GRADLE_SETTINGS = ('settings.gradle.kts', 'settings.gradle')
+RUBY_ENTRY_POINTS = ('app.rb', 'main.rb', 'server.rb')
+
+# Every path the renderers below read or check, besides the analyzer's facts
+TEMPLATE_INPUTS = (
+    PYTHON_ENTRY_POINTS + NODE_ENTRY_POINTS + NODE_LOCKFILES + GRADLE_FILES + GRADLE_SETTINGS + RUBY_ENTRY_POINTS
+    + ('requirements.txt', 'package.json', 'pom.xml', 'go.mod', 'go.sum', 'main.go', '.ruby-version',
+       'Gemfile', 'Gemfile.lock', 'bin/rails', 'config.ru', 'composer.json', 'composer.lock', 'public')
+)
+NON_ROOT_USER = "RUN useradd --create-home --uid 10001 app"
+
+
+def normalize_language(language):
+    """Map what the user typed to one of the supported stacks, or None"""
+    return LANGUAGE_ALIASES.get((language or '').strip().lower())
+
+
+def _read(root, name):
+    try:
+        return (root / name).read_text()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _first_existing(root, names):
+    for name in names:
+        if (root / name).is_file():
+            return name
+    return None
+
+
+def _exec_form(args):
+    return json.dumps(args)
+
+
+def _port(facts, default):
+    """First port the project names in its code or config, else the stack's usual one"""
+    return facts['ports'][0] if facts['ports'] else default
+
+
+def _python(root, facts):
+    port = _port(facts, 8000)
+    has_requirements = (root / 'requirements.txt').is_file()
+    if not has_requirements and any(analyzer.MANIFESTS.get(name) == 'python' for name in facts['manifests']):
+        return None  # pyproject.toml, Pipfile or setup.py: the template cannot install those
+    entry = _first_existing(root, PYTHON_ENTRY_POINTS) or 'app.py'
+    requirements = _read(root, 'requirements.txt') or ''
+    if entry == 'wsgi.py' and re.search(r'^gunicorn\b', requirements, re.M | re.I):
+        cmd = ['gunicorn', '--bind', f'0.0.0.0:{port}', 'wsgi:app']
+    else:
+        cmd = ['python', entry]
+
+    lines = []
+    if has_requirements:
+        lines += [
+            "FROM python:3.12-slim AS build",
+            "WORKDIR /app",
+            "RUN python -m venv /opt/venv",
+            'ENV PATH="/opt/venv/bin:$PATH"',
+            "COPY requirements.txt .",
+            "RUN pip install --no-cache-dir -r requirements.txt",
+            "",
+        ]
+    env = ['PYTHONDONTWRITEBYTECODE=1', 'PYTHONUNBUFFERED=1']
+    if has_requirements:
+        env.append('PATH="/opt/venv/bin:$PATH"')
+    lines += [
+        "FROM python:3.12-slim",
+        "WORKDIR /app",
+        "ENV " + " \\\n    ".join(env),
+        NON_ROOT_USER,
+    ]
+    if has_requirements:
+        lines.append("COPY --from=build /opt/venv /opt/venv")
+    lines += [
+        "COPY --chown=app:app . .",
+        "USER app",
+        f"EXPOSE {port}",
+        f"CMD {_exec_form(cmd)}",
+    ]
+    return lines
+
+
+def _node_install(lockfile, production):
+    if lockfile == 'yarn.lock':
+        return "corepack enable && yarn install --frozen-lockfile" + (" --production" if production else "")
+    if lockfile == 'pnpm-lock.yaml':
+        return "corepack enable && pnpm install --frozen-lockfile" + (" --prod" if production else "")
+    if lockfile == 'package-lock.json':
+        return "npm ci" + (" --omit=dev" if production else "") + " && npm cache clean --force"
+    return "npm install" + (" --omit=dev" if production else "") + " && npm cache clean --force"
+
+
+def _javascript(root, facts):
+    port = _port(facts, 3000)
+    try:
+        package = json.loads(_read(root, 'package.json') or '{}')
+    except ValueError:
+        package = {}
+    lockfile = _first_existing(root, NODE_LOCKFILES)
+    manifests = ' '.join(name for name in ('package.json', lockfile) if name and (root / name).is_file())
+    scripts = package.get('scripts') or {}
+    main = package.get('main')
+    if main and (root / main).is_file():
+        cmd = ['node', main]
+    elif 'start' in scripts:
+        cmd = ['npm', 'start']
+    else:
+        cmd = ['node', _first_existing(root, NODE_ENTRY_POINTS) or 'index.js']
+
+    if not manifests:
+        return [
+            "FROM node:20-alpine",
+            "WORKDIR /app",
+            "ENV NODE_ENV=production",
+            "COPY --chown=node:node . .",
+            "USER node",
+            f"EXPOSE {port}",
+            f"CMD {_exec_form(cmd)}",
+        ]
+
+    if 'build' in scripts:
+        build = [
+            "FROM node:20-alpine AS build",
+            "WORKDIR /app",
+            f"COPY {manifests} ./",
+            f"RUN {_node_install(lockfile, production=False)}",
+            "COPY . .",
+            f"RUN npm run build && rm -rf node_modules && {_node_install(lockfile, production=True)}",
+            "",
+        ]
+        copy = ["COPY --from=build --chown=node:node /app ./"]
+    else:
+        build = [
+            "FROM node:20-alpine AS deps",
+            "WORKDIR /app",
+            f"COPY {manifests} ./",
+            f"RUN {_node_install(lockfile, production=True)}",
+            "",
+        ]
+        copy = ["COPY --from=deps --chown=node:node /app/node_modules ./node_modules", "COPY --chown=node:node . ."]
+    return build + [
+        "FROM node:20-alpine",
+        "WORKDIR /app",
+        "ENV NODE_ENV=production",
+        *copy,
+        "USER node",
+        f"EXPOSE {port}",
+        f"CMD {_exec_form(cmd)}",
+    ]
+
+
+def _java(root, facts):
+    if (root / 'pom.xml').is_file():
+        build = [
+            "FROM maven:3.9-eclipse-temurin-21 AS build",
+            "WORKDIR /app",
+            "COPY pom.xml .",
+            "RUN mvn -B -q dependency:go-offline",
+            "COPY src ./src",
+            "RUN mvn -B -q package -DskipTests \\",
+            "    && find target -maxdepth 1 -name '*.jar' ! -name 'original-*' ! -name '*-sources.jar' \\",
+            "       | head -n 1 | xargs -I{} cp {} app.jar",
+        ]
+    else:
+        gradle_file = _first_existing(root, GRADLE_FILES)
+        if not gradle_file:
+            return None
+        settings = _first_existing(root, GRADLE_SETTINGS)
+        build = [
+            "FROM gradle:8-jdk21 AS build",
+            "WORKDIR /app",
+            f"COPY {' '.join(filter(None, (gradle_file, settings)))} ./",
+            "RUN gradle dependencies --no-daemon -q",
+            "COPY src ./src",
+            "RUN gradle bootJar --no-daemon -q 2>/dev/null || gradle jar --no-daemon -q \\",
+            "    && find build/libs -name '*.jar' ! -name '*-plain.jar' | head -n 1 | xargs -I{} cp {} app.jar",
+        ]
+    return build + [
+        "",
+        "FROM eclipse-temurin:21-jre-alpine",
+        "WORKDIR /app",
+        "RUN addgroup -S app && adduser -S app -G app",
+        "COPY --from=build /app/app.jar app.jar",
+        "USER app",
+        f"EXPOSE {_port(facts, 8080)}",
+        'ENTRYPOINT ["java", "-jar", "app.jar"]',
+    ]
+
+
+def _golang(root, facts):
+    go_mod = _read(root, 'go.mod')
+    if go_mod is None:
+        return None
+    match = re.search(r'^go\s+(\d+\.\d+)', go_mod, re.M)
+    version = match.group(1) if match else '1.22'
+    manifests = 'go.mod go.sum' if (root / 'go.sum').is_file() else 'go.mod'
+    package = '.'
+    if not (root / 'main.go').is_file():
+        commands = sorted(path.parent for path in root.glob('cmd/*/main.go'))
+        if commands:
+            package = './' + commands[0].relative_to(root).as_posix()
+    return [
+        f"FROM golang:{version}-alpine AS build",
+        "WORKDIR /src",
+        f"COPY {manifests} ./",
+        "RUN go mod download",
+        "COPY . .",
+        f'RUN CGO_ENABLED=0 go build -trimpath -ldflags="-s -w" -o /out/app {package}',
+        "",
+        "FROM gcr.io/distroless/static-debian12:nonroot",
+        "COPY --from=build /out/app /app",
+        "USER nonroot:nonroot",
+        f"EXPOSE {_port(facts, 8080)}",
+        'ENTRYPOINT ["/app"]',
+    ]
+
+
+def _ruby(root, facts):
+    port = _port(facts, 3000)
+    match = re.match(r'(?:ruby-)?(\d+\.\d+)', (_read(root, '.ruby-version') or '').strip())
+    image = f"ruby:{match.group(1) if match else '3.3'}-slim"
+    has_gemfile = (root / 'Gemfile').is_file()
+    locked = (root / 'Gemfile.lock').is_file()
+    bundle_env = 'ENV BUNDLE_WITHOUT="development:test" BUNDLE_PATH=/usr/local/bundle' + (
+        ' BUNDLE_DEPLOYMENT=1' if locked else ''
+    )
+    if (root / 'bin' / 'rails').is_file():
+        cmd = ['bundle', 'exec', 'rails', 'server', '-b', '0.0.0.0', '-p', str(port)]
+    elif (root / 'config.ru').is_file():
+        cmd = ['bundle', 'exec', 'rackup', '--host', '0.0.0.0', '--port', str(port)]
+    else:
+        entry = _first_existing(root, RUBY_ENTRY_POINTS) or 'app.rb'
+        cmd = ['bundle', 'exec', 'ruby', entry] if has_gemfile else ['ruby', entry]
+
+    lines = []
+    if has_gemfile:
+        lines += [
+            f"FROM {image} AS build",
+            "WORKDIR /app",
+            "RUN apt-get update \\",
+            "    && apt-get install -y --no-install-recommends build-essential \\",
+            "    && rm -rf /var/lib/apt/lists/*",
+            bundle_env,
+            f"COPY {'Gemfile Gemfile.lock' if locked else 'Gemfile'} ./",
+            'RUN bundle install && rm -rf "$BUNDLE_PATH"/ruby/*/cache',
+            "",
+        ]
+    lines += [f"FROM {image}", "WORKDIR /app"]
+    if has_gemfile:
+        lines.append(bundle_env)
+    lines.append(NON_ROOT_USER)
+    if has_gemfile:
+        lines.append("COPY --from=build /usr/local/bundle /usr/local/bundle")
+    return lines + [
+        "COPY --chown=app:app . .",
+        "USER app",
+        f"EXPOSE {port}",
+        f"CMD {_exec_form(cmd)}",
+    ]
+
+
+def _php(root, facts):
+    has_composer = (root / 'composer.json').is_file()
+    manifests = 'composer.json composer.lock' if (root / 'composer.lock').is_file() else 'composer.json'
+    document_root = '/var/www/html/public' if (root / 'public').is_dir() else '/var/www/html'
+
+    lines = []
+    if has_composer:
+        lines += [
+            "FROM composer:2 AS vendor",
+            "WORKDIR /app",
+            f"COPY {manifests} ./",
+            "RUN composer install --no-dev --no-interaction --no-progress --no-scripts \\",
+            "    --prefer-dist --optimize-autoloader --ignore-platform-reqs",
+            "",
+        ]
+    lines += [
+        "FROM php:8.3-apache",
+        f"ENV APACHE_DOCUMENT_ROOT={document_root}",
+        "# Listen on an unprivileged port so Apache can run as www-data",
+        "RUN sed -ri 's/Listen 80$/Listen 8080/' /etc/apache2/ports.conf \\",
+        "    && sed -ri 's/:80>/:8080>/; s!/var/www/html!${APACHE_DOCUMENT_ROOT}!g' /etc/apache2/sites-available/*.conf \\",
+        "    && a2enmod rewrite",
+        "WORKDIR /var/www/html",
+    ]
+    if has_composer:
+        lines.append("COPY --from=vendor --chown=www-data:www-data /app/vendor ./vendor")
+    return lines + [
+        "COPY --chown=www-data:www-data . .",
+        "USER www-data",
+        "EXPOSE 8080",
+    ]
+
+
+_RENDERERS = {
+    'python': _python,
+    'javascript': _javascript,
+    'java': _java,
+    'golang': _golang,
+    'ruby': _ruby,
+    'php': _php,
+}
+
+
+def input_paths(root='.'):
+    """Every path whose content or presence can change the Dockerfile for the project in root"""
+    root = Path(root)
+    # Entry points include package.json "main", which the Node template runs
+    entrypoints = analyzer.project_facts(root)['entrypoints']
+    names = set(TEMPLATE_INPUTS) | set(entrypoints)
+    return sorted(set(analyzer.input_paths(root)) | {root / name for name in names})
+
+
+def render(language, root='.'):
+    """Return a Dockerfile for the project in root, or None if language has no template"""
+    stack = normalize_language(language)
+    if not TEMPLATES_ENABLED or stack is None:
+        return None
+    lines = _RENDERERS[stack](Path(root), analyzer.project_facts(root))
+    if lines is None:
+        return None
+    return "# syntax=docker/dockerfile:1\n" + "\n".join(lines) + "\n"
@@ -0,0 +1,223 @@
+"""Generation logic shared by the provider scripts and batch mode."""
+from devopsgpt import (
+    analyzer, backends, dockerfiles, hedge, metrics, prompts, providers, semantic_cache, validation, workflows,
+)
+
+DEP_FILES = {
+    'python': 'requirements.txt',
+    'javascript': 'package.json',
+    'java': 'pom.xml',
+    'golang': 'go.mod',
+    'ruby': 'Gemfile',
+    'php': 'composer.json'
+}
+
+CLOUD_CREDENTIALS = {
+    'aws': 'AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY',
+    'azure': 'ARM_CLIENT_ID, ARM_CLIENT_SECRET, ARM_SUBSCRIPTION_ID, and ARM_TENANT_ID',
+    'google': 'GOOGLE_CREDENTIALS as JSON',
+}
+
+NO_EXTRA_REQUIREMENT = {'', 'no', 'none', 'n', 'na', 'n/a', 'nothing', '-'}
+
+
+def get_dependency_info(language, root='.'):
+    """Determine if project has dependencies and how to install them
+
+    The instructions carry the analyzer's facts about the project in root:
+    the packages its manifests declare, lockfiles, frameworks, entry point
+    and ports.
+    """
+    facts = analyzer.project_facts(root)
+    stack = dockerfiles.normalize_language(language)
+    dep_file = DEP_FILES.get(language.strip().lower())
+    has_dependencies = bool(dep_file and dep_file in facts['manifests']) or any(
+        analyzer.MANIFESTS[name] == stack for name in facts['manifests']
+    )
+    if has_dependencies:
+        return {
+            'has_dependencies': True,
+            'instructions': analyzer.describe(facts, stack),
+            'facts': facts,
+        }
+    return {
+        'has_dependencies': False,
+        'instructions': analyzer.describe(facts, stack) or "No specific dependency installation needed",
+        'facts': facts,
+    }
+
+
+def get_credentials(cloud):
+    """Return credentials required for a given cloud provider"""
+    return CLOUD_CREDENTIALS.get(cloud.strip().lower(), 'Unknown credentials (please update mapping)')
+
+
+def normalize_extra_requirement(extra_requirement):
+    """Return the user's extra requirement, or None when they answered no"""
+    extra = (extra_requirement or '').strip()
+    if extra.lower().rstrip('.') in NO_EXTRA_REQUIREMENT:
+        return None
+    return extra
+
+
+def render_dockerfile_prompt(language, extra_requirement, root='.'):
+    dep_info = get_dependency_info(language, root)
+    return prompts.template('dockerfile').format(
+        language=language,
+        has_dependencies="has" if dep_info['has_dependencies'] else "doesn't have",
+        dependency_instructions=dep_info['instructions'],
+        extra_requirement=normalize_extra_requirement(extra_requirement) or "None"
+    )
+
+
+def plan_dockerfile(language, extra_requirement, root='.'):
+    """Return (dockerfile, None) when a template covers the request, else (None, (prompt, artifact))
+
+    With an extra requirement the template is sent to the model to patch;
+    stacks without a template get the full generation prompt.
+    """
+    dockerfile = dockerfiles.render(language, root)
+    extra = normalize_extra_requirement(extra_requirement)
+    if dockerfile and not extra:
+        return dockerfile, None
+    if dockerfile:
+        prompt = prompts.template('dockerfile_patch').format(
+            language=language, dockerfile=dockerfile.strip(), extra_requirement=extra
+        )
+        return None, (prompt, 'dockerfile_patch')
+    return None, (render_dockerfile_prompt(language, extra_requirement, root), 'dockerfile')
+
+
+def render_docker_ci_prompt(branch, app_dir, dockerhub_user, image_name):
+    return prompts.template('docker_ci').format(
+        BRANCH=branch,
+        APP_DIR=app_dir,
+        DOCKERHUB_USERNAME=dockerhub_user,
+        IMAGE_NAME=image_name
+    )
+
+
+def render_terraform_prompt(cloud, branch, tf_dir='.'):
+    credentials = get_credentials(cloud)
+    if "Unknown" in credentials:
+        raise ValueError(f"Unsupported cloud: {cloud}")
+    return prompts.template('terraform').format(
+        CREDENTIALS=credentials,
+        BRANCH=branch,
+        TF_DIR=tf_dir
+    )
+
+
+def _plan_workflow(workflow, artifact, purpose, customization):
+    extra = normalize_extra_requirement(customization)
+    if not extra:
+        return workflow, None
+    prompt = prompts.template(f'{artifact}_patch').format(
+        purpose=purpose, workflow=workflow.strip(), customization=extra
+    )
+    return None, (prompt, f'{artifact}_patch')
+
+
+def plan_docker_ci(branch, app_dir, dockerhub_user, image_name, customization=None):
+    """Return (yaml, None) built from the spec, or (None, (prompt, artifact)) for the model
+
+    The model only sees the rendered workflow, to patch it for a customisation.
+    """
+    workflow = workflows.render_docker_ci(branch, app_dir, dockerhub_user, image_name)
+    if workflow is None:
+        return None, (render_docker_ci_prompt(branch, app_dir, dockerhub_user, image_name), 'docker_ci')
+    return _plan_workflow(workflow, 'docker_ci', "building and pushing a Docker image", customization)
+
+
+def plan_terraform(cloud, branch, tf_dir='.', customization=None):
+    """Return (yaml, None) built from the spec, or (None, (prompt, artifact)) for the model"""
+    workflow = workflows.render_terraform(cloud, branch, tf_dir)
+    if workflow is None:
+        return None, (render_terraform_prompt(cloud, branch, tf_dir), 'terraform')
+    return _plan_workflow(workflow, 'terraform', f"a Terraform pipeline on {cloud.strip()}", customization)
+
+
+def generate(provider, prompt, model=None, on_chunk=None, artifact=None):
+    """Run one generation, hedged against DEVOPSGPT_HEDGE_BACKUP when that is set
+
+    The output limit comes from the artifact's budget in prompts.OUTPUT_BUDGETS.
+    """
+    max_tokens = prompts.output_budget(artifact, prompt, providers.context_window(provider, model))
+    backup = hedge.HEDGE_BACKUP
+    if backup and hedge.parse_backend(backup)[0] != provider:
+        primary = f"{provider}:{model}" if model else provider
+        text = hedge.hedged_generate(prompt, primary, backup, max_tokens=max_tokens)
+        if on_chunk is not None:
+            on_chunk(text)
+        return text
+    return backends.generate(provider, prompt, model=model, max_tokens=max_tokens, on_chunk=on_chunk)
+
+
+def _run_plan(provider, plan, on_chunk, requirement=None, exact=()):
+    """Return the planned content, or generate it
+
+    requirement is the free-form input rendered into the prompt and exact the
+    inputs the semantic cache must match exactly.
+    """
+    content, request = plan
+    if content is None:
+        prompt, artifact = request
+        key = None
+        if semantic_cache.enabled():
+            key = semantic_cache.request_key(provider, None, artifact, prompt, requirement, exact)
+        content = semantic_cache.lookup(*key) if key else None
+        if content is None:
+            text = generate(provider, prompt, on_chunk=on_chunk, artifact=artifact)
+            text, problems = checked(provider, artifact, text)
+            if key and not problems:
+                semantic_cache.store(*key, text)
+            return text
+    if on_chunk is not None:
+        on_chunk(content)
+    return content
+
+
+def checked(provider, artifact, text):
+    """Validate model output locally and have the model fix only the lines that fail
+
+    Returns the text and the problems that are left, which are also printed.
+    """
+    text, problems = validation.repair(artifact, text, lambda prompt: generate(provider, prompt, artifact='repair'))
+    if problems:
+        print(f"\nWarning: the generated {artifact} still fails validation:\n{validation.describe(problems)}")
+    return text, problems
+
+
+def generate_dockerfile(provider, language, extra_requirement, root='.', on_chunk=None):
+    """Generate a Dockerfile for language; root is where dependency manifests are looked up
+
+    Known stacks are rendered from a local template, and the model is only
+    asked to patch it for an extra requirement.
+    """
+    with metrics.generation(provider, artifact='dockerfile'):
+        with metrics.span('render'):
+            plan = plan_dockerfile(language, extra_requirement, root)
+        requirement = normalize_extra_requirement(extra_requirement) or "None"
+        return _run_plan(provider, plan, on_chunk, requirement, (language,))
+
+
+def generate_docker_ci(provider, branch, app_dir, dockerhub_user, image_name, on_chunk=None, customization=None):
+    """Generate GitHub Actions YAML for Docker build and push
+
+    The workflow is built from the inputs; the model only applies a customisation.
+    """
+    with metrics.generation(provider, artifact='docker_ci'):
+        with metrics.span('render'):
+            plan = plan_docker_ci(branch, app_dir, dockerhub_user, image_name, customization)
+        return _run_plan(provider, plan, on_chunk, normalize_extra_requirement(customization) or "None")
+
+
+def generate_githubaction(provider, cloud, branch, tf_dir='.', on_chunk=None, customization=None):
+    """Generate GitHub Actions YAML for a Terraform pipeline
+
+    The workflow is built from the inputs; the model only applies a customisation.
+    """
+    with metrics.generation(provider, artifact='terraform'):
+        with metrics.span('render'):
+            plan = plan_terraform(cloud, branch, tf_dir, customization)
+        return _run_plan(provider, plan, on_chunk, normalize_extra_requirement(customization) or "None")
@@ -0,0 +1,202 @@
+"""Streaming, budgeted git diff extraction for commit message prompts.
+
+Instead of capturing ``git diff`` whole, a cheap ``--numstat`` pre-pass
+ranks the changed files and drops lockfiles, generated/minified files and
+binaries. The diff itself is then read line by line from a pipe and only
+the selected files are kept, each within its share of a hard byte/token
+budget. Memory stays bounded by the budget no matter how large the commit
+is, and non-UTF-8 content is decoded with replacement characters.
+"""
+import fnmatch
+import math
+import os
+import re
+import subprocess
+import tempfile
+
+MAX_BYTES = int(os.getenv("DEVOPSGPT_DIFF_MAX_BYTES", "200000"))
+MAX_TOKENS = int(os.getenv("DEVOPSGPT_DIFF_MAX_TOKENS", "50000"))
+CHARS_PER_TOKEN = 4
+MAX_LINE_BYTES = 4096
+MIN_FILE_BYTES = 1024
+# Rough size of one changed line in unified diff output, used before the diff is read
+BYTES_PER_LINE = 60
+HEADER_BYTES = 200
+MAX_OMITTED_LISTED = 50
+
+DEFAULT_EXCLUDES = (
+    'package-lock.json', 'npm-shrinkwrap.json', 'yarn.lock', 'pnpm-lock.yaml',
+    'poetry.lock', 'Pipfile.lock', 'uv.lock', 'Cargo.lock', 'go.sum',
+    'composer.lock', 'Gemfile.lock', 'packages.lock.json',
+    '*.min.js', '*.min.css', '*.map', '*.snap',
+    '*_pb2.py', '*.pb.go', '*.generated.*',
+    'vendor/*', 'node_modules/*', 'dist/*', 'build/*', 'third_party/*',
+)
+EXTRA_EXCLUDES = tuple(p.strip() for p in os.getenv("DEVOPSGPT_DIFF_EXCLUDE", "").split(',') if p.strip())
+
+# Changes here say less about intent than source changes of the same size
+LOW_SIGNAL = ('*.md', '*.rst', '*.txt', 'docs/*', 'test/*', 'tests/*', '*_test.*', 'test_*')
+LOW_SIGNAL_WEIGHT = 0.5
+
+_DIFF_HEADER = re.compile(r'^diff --git "?a/.*?"? "?b/(.*?)"?$')
+
+
+def _matches(path, patterns):
+    name = path.rsplit('/', 1)[-1]
+    for pattern in patterns:
+        if '/' in pattern:
+            if fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path, '*/' + pattern):
+                return True
+        elif fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def diff_path(header):
+    """Path of the file a ``diff --git`` header line is about, or None if it cannot be parsed"""
+    match = _DIFF_HEADER.match(header.rstrip('\n'))
+    return match.group(1) if match else None
+
+
+def excluded(path, exclude=()):
+    """True for lockfiles, generated files and vendored code, which say little about a change"""
+    return _matches(path, DEFAULT_EXCLUDES + EXTRA_EXCLUDES + tuple(exclude))
+
+
+def stream_lines(cmd, cwd=None):
+    """Yield decoded output lines of cmd without holding the whole output in memory
+
+    Lines longer than MAX_LINE_BYTES (minified bundles, embedded blobs) are cut.
+    """
+    # stderr goes to a file: a pipe nobody reads until stdout ends would fill up with
+    # warnings (CRLF, LFS) on a big diff and block git, and this reader with it
+    errors = tempfile.TemporaryFile()
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=errors)
+    finished = False
+    try:
+        while True:
+            line = proc.stdout.readline(MAX_LINE_BYTES)
+            if not line:
+                break
+            if not line.endswith(b'\n'):
+                while True:
+                    rest = proc.stdout.readline(MAX_LINE_BYTES)
+                    if not rest or rest.endswith(b'\n'):
+                        break
+                line += b' [line truncated]\n'
+            yield line.decode('utf-8', errors='replace')
+        finished = True
+    finally:
+        if not finished:
+            proc.kill()
+        proc.stdout.close()
+        returncode = proc.wait()
+        errors.seek(0)
+        stderr = errors.read().decode('utf-8', errors='replace')
+        errors.close()
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
+
+
+def numstat(revisions, cwd=None):
+    """Return [{'path', 'added', 'deleted', 'binary'}] for the change between revisions"""
+    result = subprocess.run(
+        ['git', 'diff', '--numstat', '-z', *revisions],
+        cwd=cwd, capture_output=True, check=True
+    )
+    fields = result.stdout.decode('utf-8', errors='replace').split('\0')
+    stats = []
+    i = 0
+    while i < len(fields):
+        entry = fields[i]
+        i += 1
+        if not entry:
+            continue
+        added, deleted, path = entry.split('\t', 2)
+        if not path:
+            # Rename: the old and new paths follow as separate fields
+            path = fields[i + 1]
+            i += 2
+        binary = added == '-'
+        stats.append({
+            'path': path,
+            'added': 0 if binary else int(added),
+            'deleted': 0 if binary else int(deleted),
+            'binary': binary,
+        })
+    return stats
+
+
+def rank_files(stats, exclude=()):
+    """Drop excluded and binary files and sort the rest by relevance
+
+    Returns (ranked, skipped).
+    """
+    ranked = []
+    skipped = []
+    for stat in stats:
+        if stat['binary'] or excluded(stat['path'], exclude):
+            skipped.append(stat)
+            continue
+        churn = stat['added'] + stat['deleted']
+        weight = LOW_SIGNAL_WEIGHT if _matches(stat['path'], LOW_SIGNAL) else 1.0
+        ranked.append({**stat, 'score': weight * math.log1p(churn)})
+    ranked.sort(key=lambda stat: stat['score'], reverse=True)
+    return ranked, skipped
+
+
+def allocate(ranked, budget):
+    """Give each file a byte allowance so as many files as possible fit in budget
+
+    Files beyond what MIN_FILE_BYTES each allows are dropped lowest-rank
+    first; the remainder is split by water-filling, so small files get all
+    they need and large ones share what is left.
+    """
+    keep = ranked[:max(1, budget // MIN_FILE_BYTES)]
+    dropped = ranked[len(keep):]
+    estimates = sorted(
+        (HEADER_BYTES + BYTES_PER_LINE * (stat['added'] + stat['deleted']), stat['path']) for stat in keep
+    )
+    allowance = {}
+    remaining = budget
+    for index, (estimate, path) in enumerate(estimates):
+        share = remaining // (len(estimates) - index)
+        allowance[path] = min(estimate, share) if index < len(estimates) - 1 else share
+        remaining -= allowance[path]
+    return allowance, dropped
+
+
+def read_diff(base='HEAD~1', head='HEAD', max_bytes=None, max_tokens=None, exclude=(), cwd=None):
+    """Return the diff between base and head, ranked, filtered and cut to the budget"""
+    budget = min(max_bytes or MAX_BYTES, (max_tokens or MAX_TOKENS) * CHARS_PER_TOKEN)
+    revisions = [rev for rev in (base, head) if rev]
+    ranked, skipped = rank_files(numstat(revisions, cwd), exclude)
+    allowance, dropped = allocate(ranked, budget)
+
+    buffers = {path: [] for path in allowance}
+    used = {path: 0 for path in allowance}
+    truncated = set()
+    current = None
+    for line in stream_lines(['git', 'diff', '--no-color', '--no-ext-diff', *revisions], cwd):
+        if line.startswith('diff --git '):
+            current = diff_path(line)
+            current = current if current in buffers else None
+        if current is None or current in truncated:
+            continue
+        if used[current] + len(line) > allowance[current]:
+            buffers[current].append("... [diff truncated]\n")
+            truncated.add(current)
+            continue
+        buffers[current].append(line)
+        used[current] += len(line)
+
+    parts = [''.join(buffers[stat['path']]) for stat in ranked if stat['path'] in buffers]
+    omitted = skipped + dropped
+    if omitted:
+        listed = ', '.join(
+            f"{stat['path']} (binary)" if stat['binary'] else f"{stat['path']} (+{stat['added']} -{stat['deleted']})"
+            for stat in omitted[:MAX_OMITTED_LISTED]
+        )
+        more = len(omitted) - MAX_OMITTED_LISTED
+        parts.append(f"# Also changed, not shown: {listed}" + (f" and {more} more" if more > 0 else "") + "\n")
+    return ''.join(parts).strip()
@@ -0,0 +1,193 @@
+"""Hedged requests across two backends.
+
+The generation is sent to the primary backend. If no valid answer has
+arrived after the hedge delay (or the primary fails sooner), the same
+prompt goes to a backup backend, e.g. the local Ollama model behind a
+cloud primary. The first valid answer wins and the loser's stream is closed.
+
+Each backend's wins, requests and latencies are persisted, so the delay can
+be tuned from observed primary latencies (``python -m devopsgpt.hedge``).
+Every call's latency is measured from its own launch, whether it won or
+lost; a loser closed before it finished counts with the time it had run
+by then, which is a lower bound on its latency.
+
+Opt in with DEVOPSGPT_HEDGE_BACKUP=<provider[:model]>; DEVOPSGPT_HEDGE_DELAY
+fixes the delay in seconds, otherwise the primary's recorded p95 is used.
+"""
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from devopsgpt import backends, metrics, providers
+
+HEDGE_BACKUP = os.getenv("DEVOPSGPT_HEDGE_BACKUP")
+HEDGE_DELAY = float(os.environ["DEVOPSGPT_HEDGE_DELAY"]) if os.getenv("DEVOPSGPT_HEDGE_DELAY") else None
+DEFAULT_DELAY = 2.0
+STATS_PATH = os.getenv("DEVOPSGPT_HEDGE_STATS", str(Path.home() / ".cache" / "devopsgpt" / "hedge_stats.json"))
+LATENCY_SAMPLES = 200
+
+
+def parse_backend(spec):
+    """Split 'provider[:model]' into (provider, model)"""
+    provider, _, model = spec.partition(':')
+    return provider, model or None
+
+
+class HedgeStats:
+    """Win counts and recent latencies per backend, saved as JSON"""
+
+    def __init__(self, path=STATS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            self.data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.data = {}
+
+    def _entry(self, backend):
+        return self.data.setdefault(backend, {'requests': 0, 'wins': 0, 'failures': 0, 'latencies': []})
+
+    def record(self, launched, winner=None, failed=()):
+        with self._lock:
+            for backend in launched:
+                self._entry(backend)['requests'] += 1
+            for backend in failed:
+                self._entry(backend)['failures'] += 1
+            if winner:
+                self._entry(winner)['wins'] += 1
+            self._save()
+
+    def add_latency(self, backend, latency):
+        with self._lock:
+            entry = self._entry(backend)
+            entry['latencies'] = (entry['latencies'] + [round(latency, 4)])[-LATENCY_SAMPLES:]
+            self._save()
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Could not save hedge stats: {e}")
+
+    def suggest_delay(self, backend, percentile=0.95):
+        """Hedge after the primary's usual worst case, so only its slow tail gets a backup
+
+        Until enough latencies are recorded, the provider's declared latency is used.
+        """
+        latencies = sorted(self.data.get(backend, {}).get('latencies', []))
+        if len(latencies) < 10:
+            try:
+                return providers.get(parse_backend(backend)[0]).latency
+            except ValueError:
+                return DEFAULT_DELAY
+        return latencies[min(len(latencies) - 1, int(len(latencies) * percentile))]
+
+    def report(self):
+        rows = {}
+        for backend, entry in self.data.items():
+            rows[backend] = {
+                'requests': entry['requests'],
+                'wins': entry['wins'],
+                'failures': entry['failures'],
+                'win_rate': round(entry['wins'] / entry['requests'], 3) if entry['requests'] else 0.0,
+                'suggested_delay': round(self.suggest_delay(backend), 3),
+            }
+        return rows
+
+
+_stats = None
+
+
+def default_stats():
+    global _stats
+    if _stats is None:
+        _stats = HedgeStats()
+    return _stats
+
+
+def _is_valid(text):
+    return bool(text and text.strip())
+
+
+def hedged_generate(prompt, primary, backup, delay=None, validate=_is_valid, stats=None, **kwargs):
+    """Return the first valid completion from primary or, after delay seconds, backup"""
+    stats = stats or default_stats()
+    if delay is None:
+        delay = HEDGE_DELAY if HEDGE_DELAY is not None else stats.suggest_delay(primary)
+
+    results = queue.Queue()
+    cancel = threading.Event()
+    started = time.perf_counter()
+
+    def run(spec):
+        launched_at = time.perf_counter()
+        provider, model = parse_backend(spec)
+        chunks = backends.stream(provider, prompt, model=model, **kwargs)
+        parts = []
+        try:
+            for chunk in chunks:
+                if cancel.is_set():
+                    stats.add_latency(spec, time.perf_counter() - launched_at)
+                    return
+                parts.append(chunk)
+        except Exception as e:
+            results.put((spec, None, e))
+            return
+        finally:
+            chunks.close()
+        text = ''.join(parts)
+        # Failures and empty answers come back fast and would make the backend look quicker than it is
+        if validate(text):
+            stats.add_latency(spec, time.perf_counter() - launched_at)
+        results.put((spec, text, None))
+
+    launched = []
+
+    def launch(spec):
+        launched.append(spec)
+        threading.Thread(target=metrics.bind(run), args=(spec,), daemon=True).start()
+
+    launch(primary)
+    pending = 1
+    failed = []
+    last_error = None
+    while pending:
+        timeout = None
+        if backup not in launched:
+            timeout = max(0.0, delay - (time.perf_counter() - started))
+        try:
+            spec, text, error = results.get(timeout=timeout)
+        except queue.Empty:
+            launch(backup)
+            pending += 1
+            continue
+        pending -= 1
+        if error is None and validate(text):
+            cancel.set()
+            stats.record(launched, spec, failed)
+            return text
+        failed.append(spec)
+        last_error = error or RuntimeError(f"{spec} returned an invalid answer")
+        if backup not in launched:
+            launch(backup)
+            pending += 1
+
+    stats.record(launched, failed=failed)
+    raise last_error
+
+
+def main():
+    print(json.dumps(default_stats().report(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,197 @@
+"""Write-ahead journal that lets long manifest runs resume after a crash.
+
+Every job is fingerprinted from what determines its output: provider,
+model, artifact and the rendered prompt (or the locally rendered content).
+Before a job runs, a ``started`` entry is appended. After its file is written,
+an ``ok`` entry follows, carrying the SHA-256 of the output, or a ``failed``
+entry. A rerun replays the journal and skips every job whose last entry is
+``ok`` with the same fingerprint, provided its file is still there with that
+hash. Failed, interrupted and changed jobs run again.
+
+Appends never wait for the disk. One writer thread takes whatever has
+queued up since its last write and commits it with a single write and a
+single fsync (group commit), so hundreds of concurrent jobs cost a handful
+of fsyncs. A torn final line from a crash is ignored on replay and cut off
+before the next append, and the file is compacted to one entry per job when
+superseded entries pile up.
+
+DEVOPSGPT_JOURNAL_FSYNC=0 skips the fsync (faster, but a power cut may lose
+the last few entries; a process crash still does not).
+"""
+import hashlib
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+FSYNC = os.getenv("DEVOPSGPT_JOURNAL_FSYNC", "1") != "0"
+# Compact when the file holds this many times more entries than jobs
+COMPACT_RATIO = 4
+
+_STOP = object()
+
+
+def fingerprint(*parts):
+    """Stable hash of a job's inputs"""
+    material = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def content_hash(content):
+    """SHA-256 of the bytes written for content (str is hashed as UTF-8, as writer writes it)"""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def read_log(path):
+    """Entries of a JSON-lines log; a torn or corrupt line is skipped"""
+    entries = []
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict):
+                    entries.append(entry)
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+class AppendLog:
+    """Append-only JSON-lines file committed by one background thread in groups"""
+
+    def __init__(self, path, fsync=FSYNC):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.commits = 0
+        self._queue = queue.SimpleQueue()
+        self._trim_torn_tail()
+        self._file = open(self.path, 'ab')
+        self._thread = threading.Thread(target=self._write_loop, name='journal-writer', daemon=True)
+        self._thread.start()
+
+    def _trim_torn_tail(self):
+        """Cut a partial last line left by a crash, so the next entry starts on its own line"""
+        try:
+            with open(self.path, 'r+b') as f:
+                size = f.seek(0, os.SEEK_END)
+                if not size:
+                    return
+                f.seek(size - 1)
+                if f.read(1) == b"\n":
+                    return
+                start = max(0, size - 65536)
+                f.seek(start)
+                tail = f.read()
+                f.truncate(start + tail.rfind(b"\n") + 1 if b"\n" in tail else start)
+        except FileNotFoundError:
+            pass
+
+    def append(self, entry):
+        """Queue entry for the next commit; never blocks on the disk"""
+        self._queue.put(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b"\n")
+
+    def flush(self):
+        """Block until everything appended so far is committed"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._file.close()
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take everything that queued up while the last commit was on disk
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in batch if isinstance(item, bytes)]
+            if lines:
+                try:
+                    self._file.write(b''.join(lines))
+                    self._file.flush()
+                    if self.fsync:
+                        os.fsync(self._file.fileno())
+                    self.commits += 1
+                except OSError as e:
+                    print(f"Journal write failed: {e}")
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if any(item is _STOP for item in batch):
+                return
+
+
+class Journal:
+    """Job states replayed from a journal file, and the log new states go to"""
+
+    def __init__(self, path, fresh=False):
+        self.path = Path(path)
+        entries = [] if fresh else read_log(self.path)
+        self.state = {}
+        for entry in entries:
+            if entry.get('id'):
+                self.state[entry['id']] = entry
+        if fresh or len(entries) > COMPACT_RATIO * max(len(self.state), 16):
+            self._rewrite()
+        self.log = AppendLog(self.path)
+
+    def _rewrite(self):
+        """Replace the file with the latest entry of every job"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            for entry in self.state.values():
+                f.write(json.dumps(entry, separators=(',', ':')).encode('utf-8') + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _record(self, job_id, status, job_fingerprint, **fields):
+        entry = {'id': job_id, 'status': status, 'fingerprint': job_fingerprint, 'time': round(time.time(), 3), **fields}
+        self.state[job_id] = entry
+        self.log.append(entry)
+
+    def is_done(self, job_id, job_fingerprint, target=None):
+        """True if job_id finished with these inputs and its output file is unchanged"""
+        entry = self.state.get(job_id)
+        if not entry or entry.get('status') != 'ok' or entry.get('fingerprint') != job_fingerprint:
+            return False
+        if target is None:
+            return True
+        try:
+            # Bytes, not read_text(): newline translation would hide CRLF edits and break matches on Windows
+            return content_hash(Path(target).read_bytes()) == entry.get('output')
+        except OSError:
+            return False
+
+    def started(self, job_id, job_fingerprint):
+        self._record(job_id, 'started', job_fingerprint)
+
+    def finished(self, job_id, job_fingerprint, content):
+        self._record(job_id, 'ok', job_fingerprint, output=content_hash(content))
+
+    def failed(self, job_id, job_fingerprint, error):
+        self._record(job_id, 'failed', job_fingerprint, error=str(error))
+
+    def interrupted(self):
+        """Jobs that were started but never finished or failed"""
+        return sorted(job_id for job_id, entry in self.state.items() if entry.get('status') == 'started')
+
+    def close(self):
+        self.log.close()
@@ -0,0 +1,372 @@
+"""Per-phase timing and token metrics for every generation.
+
+Each generation records how long it spent in every phase (prompt
+rendering, client construction, cache lookup, waiting on the network,
+parsing the response), how many model calls it made, prompt and completion
+tokens (as reported by the provider, estimated otherwise) and bytes on the
+wire. Saving the result to disk is recorded as a separate ``write`` event.
+
+Set DEVOPSGPT_METRICS_LOG to append one JSON line per event, and/or
+DEVOPSGPT_METRICS_PROM to maintain a Prometheus textfile-collector file.
+The textfile holds cumulative counters: each process merges its totals
+into it on exit, so short-lived script runs add up. With neither set,
+recording is a no-op.
+"""
+import atexit
+import contextvars
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent runs may lose an update
+    fcntl = None
+
+METRICS_LOG = os.getenv("DEVOPSGPT_METRICS_LOG")
+METRICS_PROM = os.getenv("DEVOPSGPT_METRICS_PROM")
+ENABLED = bool(METRICS_LOG or METRICS_PROM)
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+FAMILIES = {
+    'devopsgpt_generations_total': ('counter', "Generations by outcome"),
+    'devopsgpt_generation_seconds': ('histogram', "End-to-end generation latency"),
+    # Phases of parallel steps (commit map-reduce, hedging) are summed, so they can exceed the latency
+    'devopsgpt_phase_seconds': ('summary', "Time spent per phase"),
+    'devopsgpt_model_calls_total': ('counter', "Requests sent to the model, including continuations and map-reduce steps"),
+    'devopsgpt_prompt_tokens_total': ('counter', "Prompt tokens sent"),
+    'devopsgpt_completion_tokens_total': ('counter', "Completion tokens received"),
+    'devopsgpt_bytes_sent_total': ('counter', "Request bytes sent to the provider"),
+    'devopsgpt_bytes_received_total': ('counter', "Response bytes received from the provider"),
+    'devopsgpt_written_bytes_total': ('counter', "Bytes of generated files written to disk"),
+}
+
+_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{.*\})?\s+(\S+)$')
+
+_current = contextvars.ContextVar('devopsgpt_generation', default=None)
+
+
+class Generation:
+    """Measurements for one generation; shared by every thread working on it"""
+
+    def __init__(self, provider, model=None, artifact=None):
+        self.provider = provider
+        self.model = model
+        self.artifact = artifact
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.cache = None
+        self.model_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.tokens_estimated = False
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_call(self, prompt, text, state):
+        from devopsgpt import prompts
+
+        usage = state.get('usage') or (None, None)
+        prompt_tokens, completion_tokens = usage
+        estimated = prompt_tokens is None or completion_tokens is None
+        if prompt_tokens is None:
+            prompt_tokens = prompts.count_tokens(prompt)
+        if completion_tokens is None:
+            completion_tokens = prompts.count_tokens(text)
+        # SDKs that hide the raw body are counted by payload size
+        sent, received = state.get('wire') or (len(prompt.encode('utf-8')), len(text.encode('utf-8')))
+        with self._lock:
+            self.model_calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.tokens_estimated = self.tokens_estimated or estimated
+            self.bytes_sent += sent
+            self.bytes_received += received
+
+    def as_event(self, status, seconds):
+        return {
+            'event': 'generation',
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'provider': self.provider,
+            'model': self.model,
+            'artifact': self.artifact,
+            'status': status,
+            'seconds': round(seconds, 6),
+            'phases': {name: round(value, 6) for name, value in self.phases.items()},
+            'cache': self.cache,
+            'model_calls': self.model_calls,
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'tokens_estimated': self.tokens_estimated,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+        }
+
+
+def current():
+    """The generation being recorded in this context, or None"""
+    return _current.get()
+
+
+@contextmanager
+def generation(provider, model=None, artifact=None):
+    """Record everything inside the block as one generation
+
+    Nested blocks join the outer generation, filling in labels it lacks.
+    """
+    record = _current.get()
+    if record is not None or not ENABLED:
+        if record is not None:
+            record.model = record.model or model
+            record.artifact = record.artifact or artifact
+        yield record
+        return
+
+    record = Generation(provider, model, artifact)
+    token = _current.set(record)
+    status = 'ok'
+    try:
+        yield record
+    except (KeyboardInterrupt, GeneratorExit):
+        status = 'cancelled'
+        raise
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        _current.reset(token)
+        seconds = time.perf_counter() - record.started
+        _emit(record.as_event(status, seconds))
+        _aggregate_generation(record, status, seconds)
+
+
+def add_phase(name, seconds):
+    record = _current.get()
+    if record is not None:
+        record.add_phase(name, seconds)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent inside the block to phase name of the current generation"""
+    record = _current.get()
+    if record is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.add_phase(name, time.perf_counter() - started)
+
+
+def model_call(prompt, text, state):
+    """Count one request to the model; state may carry 'usage' and 'wire' reported by the backend"""
+    record = _current.get()
+    if record is not None:
+        record.add_call(prompt, text, state)
+
+
+def cache_result(hit):
+    record = _current.get()
+    if record is not None and record.cache != 'hit':
+        record.cache = 'hit' if hit else 'miss'
+
+
+def bind(fn):
+    """Wrap fn so that calls from worker threads count towards the current generation"""
+    record = _current.get()
+    if record is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _current.set(record)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+@contextmanager
+def file_write(provider, artifact, path, content):
+    """Record writing a generated file as a 'write' event"""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        size = len(content.encode('utf-8')) if status == 'ok' else 0
+        _emit({
+            'event': 'write',
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'provider': provider,
+            'artifact': artifact,
+            'path': str(path),
+            'status': status,
+            'seconds': round(seconds, 6),
+            'bytes': size,
+        })
+        phase_labels = {'provider': provider, 'model': '', 'phase': 'write'}
+        with _totals_lock:
+            _add('devopsgpt_phase_seconds_sum', phase_labels, seconds)
+            _add('devopsgpt_phase_seconds_count', phase_labels, 1)
+            _add('devopsgpt_written_bytes_total', {'provider': provider, 'artifact': artifact or ''}, size)
+        _register_flush()
+
+
+_log_lock = threading.Lock()
+
+
+def _emit(event):
+    if not METRICS_LOG:
+        return
+    line = json.dumps(event) + "\n"
+    try:
+        path = Path(METRICS_LOG).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with _log_lock, open(path, 'a') as f:
+            f.write(line)
+    except OSError as e:
+        print(f"Could not write metrics log: {e}")
+
+
+# In-process Prometheus samples, merged into METRICS_PROM at exit: {(name, labels): value}
+_totals = {}
+_totals_lock = threading.Lock()
+_flush_registered = False
+
+
+def _labels(labels):
+    escaped = (
+        (key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in sorted(labels.items())
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+def _add(name, labels, value):
+    key = (name, _labels(labels))
+    _totals[key] = _totals.get(key, 0.0) + value
+
+
+def _aggregate_generation(record, status, seconds):
+    if not METRICS_PROM:
+        return
+    labels = {'provider': record.provider, 'model': record.model or '', 'artifact': record.artifact or ''}
+    usage_labels = {'provider': record.provider, 'model': record.model or ''}
+    with _totals_lock:
+        _add('devopsgpt_generations_total', {**labels, 'status': status}, 1)
+        for bound in LATENCY_BUCKETS:
+            if seconds <= bound:
+                _add('devopsgpt_generation_seconds_bucket', {**labels, 'le': str(bound)}, 1)
+        _add('devopsgpt_generation_seconds_bucket', {**labels, 'le': '+Inf'}, 1)
+        _add('devopsgpt_generation_seconds_sum', labels, seconds)
+        _add('devopsgpt_generation_seconds_count', labels, 1)
+        for phase, value in record.phases.items():
+            _add('devopsgpt_phase_seconds_sum', {**usage_labels, 'phase': phase}, value)
+            _add('devopsgpt_phase_seconds_count', {**usage_labels, 'phase': phase}, 1)
+        _add('devopsgpt_model_calls_total', usage_labels, record.model_calls)
+        _add('devopsgpt_prompt_tokens_total', usage_labels, record.prompt_tokens)
+        _add('devopsgpt_completion_tokens_total', usage_labels, record.completion_tokens)
+        _add('devopsgpt_bytes_sent_total', usage_labels, record.bytes_sent)
+        _add('devopsgpt_bytes_received_total', usage_labels, record.bytes_received)
+    _register_flush()
+
+
+def _register_flush():
+    global _flush_registered
+    if METRICS_PROM and not _flush_registered:
+        _flush_registered = True
+        atexit.register(flush)
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in FAMILIES:
+            return name[:-len(suffix)]
+    return name
+
+
+def _read_samples(path):
+    samples = {}
+    try:
+        lines = path.read_text().splitlines()
+    except OSError:
+        return samples
+    for line in lines:
+        match = _SAMPLE.match(line.strip())
+        if match and not line.startswith('#'):
+            name, labels, value = match.groups()
+            try:
+                samples[(name, labels or '')] = float(value)
+            except ValueError:
+                pass
+    return samples
+
+
+def _number(value):
+    """Exact text for a sample value; flush() adds to what it reads back, so nothing may be rounded"""
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _format(samples):
+    by_family = {}
+    for (name, labels), value in samples.items():
+        by_family.setdefault(_family(name), []).append((name, labels, value))
+    lines = []
+    for family in sorted(by_family):
+        kind, help_text = FAMILIES.get(family, ('untyped', ''))
+        lines.append(f"# HELP {family} {help_text}")
+        lines.append(f"# TYPE {family} {kind}")
+        for name, labels, value in sorted(by_family[family]):
+            lines.append(f"{name}{labels} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def flush():
+    """Merge this process's totals into the Prometheus textfile and reset them"""
+    if not METRICS_PROM:
+        return
+    with _totals_lock:
+        totals = dict(_totals)
+        _totals.clear()
+    if not totals:
+        return
+    path = Path(METRICS_PROM).expanduser()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(path.name + '.lock'), 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            samples = _read_samples(path)
+            for key, value in totals.items():
+                samples[key] = samples.get(key, 0.0) + value
+            # The collector may read at any moment, so the file is replaced atomically
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(_format(samples))
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write Prometheus metrics: {e}")
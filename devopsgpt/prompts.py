@@ -0,0 +1,240 @@
+"""Prompt templates, token counting and output budgets.
+
+Every template comes in two styles. ``full`` is the original, verbose
+checklist. ``compact`` states the same requirements in a fraction of the
+tokens, and is the default (DEVOPSGPT_PROMPT_STYLE=full switches back).
+
+Prompt sizes are measured with tiktoken when it is installed and with a
+close local approximation otherwise. The output budget for each artifact is
+capped so that prompt plus answer fit the model's context window.
+"""
+import math
+import os
+import re
+
+PROMPT_STYLE = os.getenv("DEVOPSGPT_PROMPT_STYLE", "compact")
+
+DOCKERFILE_FULL = """
+Generate an ideal Dockerfile for a {language} application following best practices.
+The application {has_dependencies} dependencies.
+
+Requirements:
+1. Use the most appropriate official base image
+    a.Choose minimal and secure base images (e.g., alpine, slim, or distroless if possible). - python:3.12-slim, node:20-alpine, golang:1.21-alpine.
+2. Install required dependencies only {dependency_instructions}
+    a.Avoid unnecessary tools or build packages in the final image.
+    b.Use --no-cache or remove package manager caches.
+    c. For Node: npm ci instead of npm install.
+3.Set a proper working directory
+    a.Use WORKDIR /app or a relevant directory name to isolate app files.
+4.Copy only necessary files
+    a.Use .dockerignore to exclude files like .git, node_modules, tests, etc.
+    b.Copy only what's needed for build, then source code.
+5.Use multi-stage builds when beneficial
+    a.Separate build and runtime environments to reduce size. Like: use a builder stage with compilers/tools, then copy the built artifacts to a minimal runtime image.
+6.Follow security best practices
+    a.Avoid running as root: create and use a non-root user.
+    b.Keep dependencies updated.
+    c.Use image scanners like Trivy or Docker Scout.
+    d.Minimize attack surface (no shell tools in production image).
+7.Expose only necessary ports (for web apps)
+    a.Use EXPOSE relevant PORT .
+    b.Do not expose ports unnecessarily.
+8.Include proper cleanup to minimize image size
+    a.Remove temp build files, caches, logs after use.
+    b.Combine commands using && to reduce layers.
+    c. Use rm -rf /path/to/temp when needed.
+9.Additional requirements from the user: {extra_requirement}
+
+Output ONLY the Dockerfile content with no additional explanation or commentary.
+"""
+
+DOCKER_CI_FULL = """
+Generate a GitHub Action YAML file that builds a Docker image from the application's Dockerfile and pushes it to Docker Hub.
+
+Requirements:
+1. The workflow should trigger on pushes to these branches: {BRANCH}.
+2. The Dockerfile is located in this directory: {APP_DIR}
+3. The job should:
+   - Set up Docker Buildx
+   - Log in to Docker Hub using secrets: `DOCKERHUB_USERNAME` and `DOCKERHUB_TOKEN`
+   - Build the Docker image with the appropriate tag: `{DOCKERHUB_USERNAME}/{IMAGE_NAME}:latest`
+   - Push the image to Docker Hub
+4. Follow GitHub security and Docker best practices.
+5. Output only the GitHub Actions YAML file.
+"""
+
+TERRAFORM_FULL = """
+Generate an ideal GitHub Action for a Terraform application following best practices.
+
+Requirements:
+1. Run the workflow on these branches: {BRANCH}. If the branch is 'main', trigger only on pull requests.
+2. Set permissions:
+   contents: read
+   pull-requests: write
+3. Inside the job, do the following:
+   a. Create environment variables for GitHub token and cloud credentials: {CREDENTIALS}, and specify the Terraform working directory: {TF_DIR}.
+   b. Set verbosity for Terraform logs.
+   c. Run the following steps in order:
+      - checkout
+      - setup Terraform
+      - terraform fmt
+      - terraform sec scan
+      - terraform lint
+      - terraform validate
+      - terraform plan
+   d. For `terraform plan`, if `github.event_name == 'pull_request'`, run a script that:
+      - collects the outputs of each Terraform step
+      - formats them into a comment
+      - uses `github.rest.issues.createComment` to post the result back to the pull request
+"""
+
+DOCKERFILE_COMPACT = """Write a production Dockerfile for a {language} application. It {has_dependencies} dependencies: {dependency_instructions}.
+Rules: smallest suitable official base image (slim/alpine/distroless); multi-stage build when it shrinks the image; WORKDIR /app; copy dependency manifests before source; install runtime deps only, without package caches (npm ci for Node); run as a non-root user; EXPOSE only needed ports; chain RUN steps with && and remove temp files.
+Extra requirements: {extra_requirement}
+Output only the Dockerfile."""
+
+DOCKER_CI_COMPACT = """Write a GitHub Actions workflow YAML that runs on push to {BRANCH}, sets up Docker Buildx, logs in to Docker Hub with secrets DOCKERHUB_USERNAME and DOCKERHUB_TOKEN, then builds the Dockerfile in {APP_DIR} and pushes {DOCKERHUB_USERNAME}/{IMAGE_NAME}:latest. Use least-privilege permissions and pinned major action versions.
+Output only the YAML."""
+
+TERRAFORM_COMPACT = """Write a GitHub Actions workflow YAML for Terraform.
+- Trigger on {BRANCH}; for main, only on pull requests.
+- permissions: contents: read, pull-requests: write.
+- env: GitHub token, {CREDENTIALS}, working directory {TF_DIR}, TF_LOG verbosity.
+- Steps in order: checkout, setup Terraform, fmt, tfsec scan, tflint, validate, plan.
+- On pull_request, post each step's outcome as a PR comment via github.rest.issues.createComment.
+Output only the YAML."""
+
+DOCKERFILE_PATCH_FULL = """
+Below is a production Dockerfile for a {language} application. It already follows best practices
+(minimal official base image, multi-stage build, dependency manifests copied before the source,
+no package caches, non-root user).
+
+{dockerfile}
+
+Modify it so that it also satisfies this requirement from the user: {extra_requirement}
+Change only what the requirement needs and keep every other instruction as it is.
+Output only the complete Dockerfile, with no explanations and no code fences.
+"""
+
+DOCKERFILE_PATCH_COMPACT = """Dockerfile for a {language} app:
+
+{dockerfile}
+
+Change it minimally to also satisfy: {extra_requirement}
+Keep everything else. Output only the complete Dockerfile."""
+
+WORKFLOW_PATCH_FULL = """
+Below is a GitHub Actions workflow for {purpose}. It already follows best practices
+(least-privilege permissions, pinned major action versions, secrets read from the repository).
+
+{workflow}
+
+Modify it so that it also satisfies this customisation from the user: {customization}
+Change only what the customisation needs and keep every other key and step as it is.
+Output only the complete workflow YAML, with no explanations and no code fences.
+"""
+
+WORKFLOW_PATCH_COMPACT = """GitHub Actions workflow for {purpose}:
+
+{workflow}
+
+Change it minimally to also satisfy: {customization}
+Keep everything else. Output only the complete YAML."""
+
+REPAIR_FULL = """
+Lines {first}-{last} of a {kind} fail validation:
+{errors}
+
+For reference, the lines just before them (do not repeat these):
+{before}
+
+Lines {first}-{last}, which need fixing:
+{region}
+
+For reference, the lines just after them (do not repeat these):
+{after}
+
+Rewrite lines {first}-{last} so that the errors are fixed, keeping their indentation and anything that is not wrong.
+Output only the replacement lines, with no explanations and no code fences.
+"""
+
+REPAIR_COMPACT = """Lines {first}-{last} of a {kind} fail validation:
+{errors}
+
+Before (context only):
+{before}
+Lines {first}-{last}:
+{region}
+After (context only):
+{after}
+
+Output only the corrected lines {first}-{last}, same indentation, no code fences."""
+
+TEMPLATES = {
+    'dockerfile': {'full': DOCKERFILE_FULL, 'compact': DOCKERFILE_COMPACT},
+    'dockerfile_patch': {'full': DOCKERFILE_PATCH_FULL, 'compact': DOCKERFILE_PATCH_COMPACT},
+    'docker_ci': {'full': DOCKER_CI_FULL, 'compact': DOCKER_CI_COMPACT},
+    'terraform': {'full': TERRAFORM_FULL, 'compact': TERRAFORM_COMPACT},
+    'docker_ci_patch': {'full': WORKFLOW_PATCH_FULL, 'compact': WORKFLOW_PATCH_COMPACT},
+    'terraform_patch': {'full': WORKFLOW_PATCH_FULL, 'compact': WORKFLOW_PATCH_COMPACT},
+    'repair': {'full': REPAIR_FULL, 'compact': REPAIR_COMPACT},
+}
+
+# Typical answer sizes in tokens with headroom; a cut-off answer is continued rather than regenerated
+OUTPUT_BUDGETS = {
+    'dockerfile': 700,
+    'dockerfile_patch': 700,
+    'docker_ci': 900,
+    'terraform': 1600,
+    'docker_ci_patch': 900,
+    'terraform_patch': 1600,
+    'repair': 400,
+    'commit': 250,
+    'summary': 200,
+}
+DEFAULT_OUTPUT_BUDGET = 800
+CONTEXT_MARGIN = 64
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]|\s+")
+_encoding = None
+
+
+def template(artifact, style=None):
+    """Return the prompt template for artifact in the given (or configured) style"""
+    variants = TEMPLATES[artifact]
+    return variants.get(style or PROMPT_STYLE, variants['full'])
+
+
+def _tiktoken_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _encoding = False
+    return _encoding
+
+
+def count_tokens(text):
+    """Count tokens in text with tiktoken, or approximate BPE counts without it"""
+    encoding = _tiktoken_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    count = 0
+    for piece in _TOKEN_PATTERN.findall(text):
+        if piece.isspace():
+            count += piece.count('\n')
+        elif piece[0].isalnum() or piece[0] == '_':
+            count += math.ceil(len(piece) / 4)
+        else:
+            count += 1
+    return count
+
+
+def output_budget(artifact, prompt, context_window):
+    """Output token limit for artifact, shrunk if the prompt leaves less room in the context"""
+    budget = OUTPUT_BUDGETS.get(artifact, DEFAULT_OUTPUT_BUDGET)
+    room = context_window - count_tokens(prompt) - CONTEXT_MARGIN
+    return max(64, min(budget, room))
@@ -0,0 +1,166 @@
+"""Registry of model backends and what each one can do.
+
+Every backend declares its default model, context window, output limits,
+whether it streams, whether it offers a batch API, its rate limits, and a
+rough relative cost and latency. The rest of the package reads these
+instead of keeping its own per-provider tables: prompts size their output
+budget and diff chunks from the context window, backends fall back to a
+single chunk for providers that cannot stream, the scheduler takes its
+rate limits and concurrency from here, commit summaries fan out as wide as
+the provider allows, and hedging waits for the provider's usual latency
+until it has measured its own.
+
+Third-party backends register themselves: list their modules in
+DEVOPSGPT_PROVIDER_PLUGINS (comma-separated), and have each call
+register() with a ProviderSpec whose call (and optionally stream) function
+has the same signature as the built-in ones in backends.py.
+
+The default model of any provider can be overridden with
+DEVOPSGPT_<PROVIDER>_MODEL, e.g. DEVOPSGPT_OLLAMA_MODEL=llama3.1.
+
+Usage: python -m devopsgpt.providers
+"""
+import importlib
+import os
+import threading
+from dataclasses import dataclass, field
+
+DEFAULT_CONTEXT_WINDOW = 8192
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """What a backend supports and how hard it may be driven"""
+    name: str
+    default_model: str = None
+    # Context window of the default model; models lists other known models' windows
+    context_window: int = DEFAULT_CONTEXT_WINDOW
+    models: dict = field(default_factory=dict)
+    # Most tokens one response may have, and the limit sent when the caller gives none
+    max_output_tokens: int = 4096
+    default_max_tokens: int = None
+    streaming: bool = True
+    batch_api: bool = False
+    rpm: int = 60
+    tpm: int = 100_000
+    concurrency: int = 4
+    # Rough price per token relative to Titan Text Express (local models are free)
+    cost: float = 1.0
+    # Typical seconds to a complete short answer
+    latency: float = 2.0
+    # Environment variable naming the model, for deployments that have no fixed default
+    model_env: str = None
+    call: object = None
+    stream: object = None
+
+
+BUILTIN = (
+    ProviderSpec(
+        'ollama', 'llama3', context_window=8192, models={'llama3.1': 131_072, 'llama3.2': 131_072},
+        max_output_tokens=8192, rpm=6000, tpm=10_000_000, concurrency=2, cost=0.0, latency=3.0,
+    ),
+    ProviderSpec(
+        'bedrock', 'amazon.titan-text-express-v1', context_window=8192, max_output_tokens=8192,
+        default_max_tokens=800, batch_api=True, rpm=60, tpm=100_000, concurrency=8, cost=1.0, latency=2.0,
+    ),
+    ProviderSpec(
+        'gemini', 'gemini-1.5-pro', context_window=1_048_576, models={'gemini-1.5-flash': 1_048_576},
+        max_output_tokens=8192, default_max_tokens=800, batch_api=True,
+        rpm=60, tpm=1_000_000, concurrency=8, cost=6.0, latency=2.5,
+    ),
+    # The AI Foundry scoring endpoint answers in one piece and reports no stop reason
+    ProviderSpec(
+        'azure', 'azure-ai-foundry', context_window=8192, max_output_tokens=4096,
+        streaming=False, rpm=60, tpm=60_000, concurrency=8, cost=2.0, latency=2.5,
+    ),
+    ProviderSpec(
+        'azure_openai', None, context_window=8192, max_output_tokens=4096,
+        batch_api=True, rpm=60, tpm=60_000, concurrency=8, cost=12.0, latency=2.0,
+        model_env='AZURE_DEPLOYMENT_NAME',
+    ),
+)
+
+_registry = {spec.name: spec for spec in BUILTIN}
+_plugins_loaded = False
+_lock = threading.Lock()
+
+
+def register(spec):
+    """Add or replace a backend"""
+    with _lock:
+        _registry[spec.name] = spec
+    return spec
+
+
+def _load_plugins():
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+    for module in filter(None, (name.strip() for name in os.getenv("DEVOPSGPT_PROVIDER_PLUGINS", "").split(','))):
+        importlib.import_module(module)
+
+
+def names():
+    """Names of every registered backend"""
+    _load_plugins()
+    return tuple(_registry)
+
+
+def get(provider):
+    """The ProviderSpec registered under provider"""
+    _load_plugins()
+    spec = _registry.get(provider)
+    if spec is None:
+        raise ValueError(f"Unknown provider: {provider}")
+    return spec
+
+
+def default_model(provider):
+    """Model used when the caller names none, after environment overrides"""
+    spec = get(provider)
+    return (
+        os.getenv(f"DEVOPSGPT_{provider.upper()}_MODEL")
+        or (os.getenv(spec.model_env) if spec.model_env else None)
+        or spec.default_model
+    )
+
+
+def context_window(provider, model=None):
+    """Context window in tokens for provider's model; unlisted models are assumed to be small"""
+    spec = get(provider)
+    model = model or default_model(provider)
+    if model == spec.default_model:
+        return spec.context_window
+    return spec.models.get(model, DEFAULT_CONTEXT_WINDOW)
+
+
+def limits(provider):
+    """Rate limits and concurrency the scheduler starts from"""
+    spec = get(provider)
+    return {'rpm': spec.rpm, 'tpm': spec.tpm, 'concurrency': spec.concurrency}
+
+
+def describe(provider):
+    spec = get(provider)
+    return {
+        'model': default_model(provider),
+        'context_window': spec.context_window,
+        'max_output_tokens': spec.max_output_tokens,
+        'streaming': spec.streaming,
+        'batch_api': spec.batch_api,
+        **limits(provider),
+        'cost': spec.cost,
+        'latency': spec.latency,
+    }
+
+
+def main():
+    import json
+
+    print(json.dumps({name: describe(name) for name in names()}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
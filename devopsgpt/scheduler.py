@@ -0,0 +1,176 @@
+"""Rate-limit-aware asyncio scheduler for provider calls.
+
+Each (provider, model) pair gets its own lane with
+
+* a token bucket for requests per minute,
+* a token bucket for tokens per minute (prompt estimate + output budget),
+* a concurrency cap.
+
+Throttling responses (HTTP 429, Bedrock ThrottlingException, Gemini
+ResourceExhausted, ...) pause the whole lane for the server's Retry-After
+or a jittered exponential backoff and the request is retried, so a busy run
+settles at the quota ceiling instead of collapsing into an error storm.
+"""
+import asyncio
+import functools
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from devopsgpt import backends, metrics, providers
+
+CHARS_PER_TOKEN = 4
+DEFAULT_COMPLETION_TOKENS = 1024
+MAX_RETRIES = int(os.getenv("DEVOPSGPT_MAX_RETRIES", "6"))
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+THROTTLE_CODES = {'ThrottlingException', 'TooManyRequestsException', 'ServiceQuotaExceededException'}
+THROTTLE_CLASSES = {'ResourceExhausted', 'TooManyRequests', 'RateLimitError'}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate used for budgeting"""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def is_rate_limited(exc):
+    """True if exc is a provider's throttling response"""
+    if type(exc).__name__ in THROTTLE_CLASSES:
+        return True
+    if getattr(exc, 'status_code', None) == 429:
+        return True
+    response = getattr(exc, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        status = response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+        return code in THROTTLE_CODES or status == 429
+    return False
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait, or None"""
+    response = getattr(exc, 'response', None)
+    if isinstance(response, dict):
+        headers = response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+    else:
+        headers = getattr(response, 'headers', None) or {}
+    value = headers.get('Retry-After') or headers.get('retry-after')
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+def backoff(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Exponential backoff with equal jitter"""
+    delay = min(cap, base * (2 ** attempt))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class TokenBucket:
+    """Refills continuously at per_minute / 60 units a second, up to one minute of burst"""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def drain(self):
+        """Empty the bucket after the server pushed back"""
+        self._refill()
+        self.tokens = 0.0
+
+
+class Lane:
+    """Limits shared by every request to one provider/model"""
+
+    def __init__(self, rpm, tpm, concurrency):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+        self.requests.drain()
+
+    async def wait(self):
+        while True:
+            delay = self.resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+
+class Scheduler:
+    """Runs backends.generate calls under per-lane rate limits"""
+
+    def __init__(self, limits=None, max_retries=MAX_RETRIES, max_workers=32):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.lanes = {}
+        self.stats = {'requests': 0, 'throttled': 0, 'retries': 0, 'failed': 0}
+
+    def _lane(self, provider, model):
+        key = (provider, model)
+        lane = self.lanes.get(key)
+        if lane is None:
+            # The registry's limits, overridden per run with Scheduler(limits=...) or the batch --rpm/--tpm flags
+            limits = {**providers.limits(provider), **self.limits.get(provider, {})}
+            lane = Lane(limits['rpm'], limits['tpm'], limits['concurrency'])
+            self.lanes[key] = lane
+        return lane
+
+    async def generate(self, provider, prompt, model=None, max_tokens=None, **kwargs):
+        """Schedule one generation, retrying throttled attempts"""
+        lane = self._lane(provider, model)
+        budget = max_tokens or providers.get(provider).default_max_tokens or DEFAULT_COMPLETION_TOKENS
+        cost = estimate_tokens(prompt) + budget
+        call = metrics.bind(
+            functools.partial(backends.generate, provider, prompt, model=model, max_tokens=max_tokens, **kwargs)
+        )
+        loop = asyncio.get_running_loop()
+
+        for attempt in range(self.max_retries + 1):
+            await lane.wait()
+            await lane.requests.acquire(1)
+            await lane.tokens.acquire(cost)
+            async with lane.slots:
+                self.stats['requests'] += 1
+                try:
+                    return await loop.run_in_executor(self.executor, call)
+                except Exception as e:
+                    if not is_rate_limited(e) or attempt == self.max_retries:
+                        self.stats['failed'] += 1
+                        raise
+                    self.stats['throttled'] += 1
+                    lane.pause(retry_after(e) or backoff(attempt))
+            self.stats['retries'] += 1
+
+    def close(self):
+        self.executor.shutdown(wait=False)
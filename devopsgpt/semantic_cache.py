@@ -0,0 +1,289 @@
+"""Near-duplicate response cache backed by local embeddings.
+
+The exact cache in cache.py misses requests that differ only trivially:
+"expose port 8000" and "Expose port 8000.", or "run as non-root" and
+"use a non-root user".
+This cache answers them from an earlier response instead.
+
+Only the free-form requirement of a request (the extra Dockerfile
+requirement or a workflow customisation) is compared by meaning. It is
+masked out of the rendered prompt, and the rest must match exactly: same
+provider, model, artifact, language and everything else in the prompt. The
+requirement is normalized, embedded with a local Ollama embedding model, and
+looked up in a NumPy cosine-similarity index. Numbers that appear on both
+sides must agree, so "port 8000" never answers "port 9000".
+
+The index is kept in memory and saved to disk after every insert. Entries
+expire after the response cache TTL, and the least recently used are
+evicted beyond DEVOPSGPT_SEMANTIC_MAX_ENTRIES.
+
+Off by default; set DEVOPSGPT_SEMANTIC_CACHE=1 (requires NumPy and an
+Ollama embedding model, DEVOPSGPT_SEMANTIC_MODEL, default nomic-embed-text).
+DEVOPSGPT_CACHE=0 turns it off along with the exact cache.
+
+Usage: python -m devopsgpt.semantic_cache [stats|clear]
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from devopsgpt import cache, metrics
+
+SEMANTIC_ENABLED = os.getenv("DEVOPSGPT_SEMANTIC_CACHE", "0") == "1"
+EMBED_MODEL = os.getenv("DEVOPSGPT_SEMANTIC_MODEL", "nomic-embed-text")
+THRESHOLD = float(os.getenv("DEVOPSGPT_SEMANTIC_THRESHOLD", "0.9"))
+MAX_ENTRIES = int(os.getenv("DEVOPSGPT_SEMANTIC_MAX_ENTRIES", "2000"))
+INDEX_DIR = os.getenv("DEVOPSGPT_SEMANTIC_DIR", str(Path.home() / ".cache" / "devopsgpt" / "semantic"))
+
+# Answers that all mean "nothing extra", folded together before embedding
+_EMPTY_ANSWERS = {'', 'no', 'none', 'n', 'na', 'n/a', 'nothing', '-'}
+_NUMBER = re.compile(r'\d+(?:\.\d+)*')
+_MASK = '\x00'
+
+
+def normalize(text):
+    """Lowercase, collapse whitespace and trailing punctuation, fold empty answers"""
+    text = re.sub(r'\s+', ' ', str(text or '')).strip().lower().rstrip('.!')
+    return 'none' if text in _EMPTY_ANSWERS else text
+
+
+def request_key(provider, model, artifact, prompt, requirement, exact=()):
+    """(namespace, text) for a request whose free-form requirement was rendered into prompt
+
+    The namespace hashes everything that has to match exactly: the prompt
+    with the requirement masked out and the normalized exact inputs (such as
+    the language). Only the requirement is compared by meaning. Templates
+    render it after every other input, so its last occurrence is the one
+    masked; an earlier match in the prompt is left alone.
+    """
+    requirement = str(requirement or '')
+    head, found, tail = prompt.rpartition(requirement) if requirement else ('', '', prompt)
+    masked = head + _MASK + tail if found else prompt
+    material = json.dumps({
+        'provider': provider, 'model': model, 'artifact': artifact, 'prompt': masked,
+        'exact': [normalize(value) for value in exact],
+    })
+    namespace = hashlib.sha256(material.encode('utf-8')).hexdigest()
+    return namespace, normalize(requirement)
+
+
+def _numbers_agree(left, right):
+    ours, theirs = set(_NUMBER.findall(left)), set(_NUMBER.findall(right))
+    return not ours or not theirs or ours == theirs
+
+
+def ollama_embed(text):
+    """Embedding of text from the local Ollama embedding model"""
+    from devopsgpt import backends
+
+    response = backends.get_client('ollama').embed(model=EMBED_MODEL, input=text)
+    return response['embeddings'][0]
+
+
+class SemanticIndex:
+    """Unit vectors in one NumPy matrix, with the entries they point at"""
+
+    def __init__(self, root=INDEX_DIR, threshold=THRESHOLD, max_entries=MAX_ENTRIES,
+                 ttl=cache.TTL_SECONDS, embed=ollama_embed):
+        import numpy
+
+        self.np = numpy
+        self.root = Path(root)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.vectors = None
+        self.entries = []
+        self.hits = 0
+        self.misses = 0
+        self._embeddings = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            entries = json.loads((self.root / 'entries.json').read_text())
+            vectors = self.np.load(self.root / 'vectors.npy')
+        except (OSError, ValueError):
+            return
+        if len(entries) == len(vectors):
+            self.entries, self.vectors = entries, vectors.astype(self.np.float32)
+
+    def save(self):
+        """Write the index atomically; a concurrent writer's inserts may be lost"""
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.npy')
+            with os.fdopen(fd, 'wb') as f:
+                self.np.save(f, self.vectors if self.vectors is not None else self.np.zeros((0, 0), self.np.float32))
+            os.replace(tmp, self.root / 'vectors.npy')
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.json')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.entries, f)
+            os.replace(tmp, self.root / 'entries.json')
+        except OSError as e:
+            print(f"Semantic cache write failed: {e}")
+
+    def _vector(self, text):
+        vector = self._embeddings.get(text)
+        if vector is None:
+            vector = self.np.asarray(self.embed(text), dtype=self.np.float32)
+            norm = self.np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            if len(self._embeddings) >= 1024:
+                self._embeddings.clear()
+            self._embeddings[text] = vector
+        return vector
+
+    def get(self, namespace, text):
+        """The cached response for the closest earlier request in namespace, or None"""
+        now = time.time()
+        # put() swaps in new lists and arrays, so a snapshot stays consistent without the lock
+        with self._lock:
+            entries, vectors = self.entries, self.vectors
+        candidates = [
+            index for index, entry in enumerate(entries)
+            if entry['namespace'] == namespace and not (self.ttl and now - entry['created'] > self.ttl)
+        ]
+        best = next((index for index in candidates if entries[index]['text'] == text), None)
+        if best is None and candidates:
+            query = self._vector(text)
+            if vectors.shape[1] == len(query):
+                scores = vectors[candidates] @ query
+                for score, index in sorted(zip(scores.tolist(), candidates), reverse=True):
+                    if score < self.threshold:
+                        break
+                    if _numbers_agree(text, entries[index]['text']):
+                        best = index
+                        break
+        with self._lock:
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entries[best]['accessed'] = now
+            return entries[best]['value']
+
+    def put(self, namespace, text, value):
+        vector = self._vector(text)
+        now = time.time()
+        with self._lock:
+            # Vectors from a different embedding model cannot be compared: start over
+            stale = self.vectors is not None and self.vectors.shape[1] != len(vector)
+            keep = [] if stale else [
+                index for index, entry in enumerate(self.entries)
+                if not (entry['namespace'] == namespace and entry['text'] == text)
+                and not (self.ttl and now - entry['created'] > self.ttl)
+            ]
+            if len(keep) >= self.max_entries:
+                # Least recently used go first
+                keep = sorted(keep, key=lambda index: self.entries[index]['accessed'])[len(keep) - self.max_entries + 1:]
+                keep.sort()
+            entry = {'namespace': namespace, 'text': text, 'value': value, 'created': now, 'accessed': now}
+            kept = self.vectors[keep] if keep else self.np.zeros((0, len(vector)), self.np.float32)
+            self.entries = [self.entries[index] for index in keep] + [entry]
+            self.vectors = self.np.vstack([kept, vector[None, :]])
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self.entries, self.vectors = [], None
+            self.save()
+
+    def info(self):
+        with self._lock:
+            return {
+                'path': str(self.root),
+                'entries': len(self.entries),
+                'dimensions': int(self.vectors.shape[1]) if self.vectors is not None and len(self.entries) else 0,
+                'threshold': self.threshold,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+_default = None
+_default_lock = threading.Lock()
+_failed = False
+
+
+def enabled():
+    return SEMANTIC_ENABLED and cache.CACHE_ENABLED and not _failed
+
+
+def default_index():
+    """The process-wide index, or None when disabled or NumPy is missing"""
+    global _default, _failed
+    if not enabled():
+        return None
+    with _default_lock:
+        if _default is None:
+            try:
+                _default = SemanticIndex()
+            except ImportError:
+                print("Semantic cache disabled: NumPy is not installed")
+                _failed = True
+        return _default
+
+
+def _disable(error):
+    global _failed
+    if not _failed:
+        print(f"Semantic cache disabled: {error}")
+    _failed = True
+
+
+def lookup(namespace, text):
+    """Cached response for a near-duplicate request, or None"""
+    index = default_index()
+    if index is None:
+        return None
+    try:
+        with metrics.span('cache'):
+            value = index.get(namespace, text)
+    except Exception as e:  # No embedding model available: carry on without the cache
+        _disable(e)
+        return None
+    metrics.cache_result(value is not None)
+    return value
+
+
+def store(namespace, text, value):
+    index = default_index()
+    if index is None or not value:
+        return
+    try:
+        index.put(namespace, text, value)
+    except Exception as e:
+        _disable(e)
+
+
+def main(argv=None):
+    import sys
+
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else 'stats'
+    try:
+        index = SemanticIndex(embed=None)
+    except ImportError:
+        print("NumPy is required for the semantic cache (pip install numpy)")
+        return 1
+    if command == 'clear':
+        index.clear()
+        print("Semantic cache cleared.")
+    elif command == 'stats':
+        print(json.dumps(index.info(), indent=2))
+    else:
+        print("Usage: python -m devopsgpt.semantic_cache [stats|clear]")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,375 @@
+"""Local checks for generated Dockerfiles and workflows, with targeted repair.
+
+Model output is checked before it is returned: Dockerfiles are parsed
+instruction by instruction (known instructions, FROM first, argument
+shapes, exec-form JSON, ports, build stage names), and workflows are
+parsed as YAML and checked against the shape GitHub Actions accepts
+(triggers, jobs, runs-on, steps with exactly one of uses/run, known keys,
+duplicate keys, balanced ${{ }} expressions).
+
+When a check fails, only the failing lines and the error go back to the
+model, and its answer is spliced into the file in their place. That costs
+a few hundred tokens per fix instead of a full regeneration.
+DEVOPSGPT_REPAIR_ATTEMPTS (default 2) bounds the repair rounds, and
+DEVOPSGPT_VALIDATE=0 turns validation off.
+"""
+import json
+import os
+import re
+from collections import namedtuple
+
+from devopsgpt import metrics, prompts
+
+VALIDATION_ENABLED = os.getenv("DEVOPSGPT_VALIDATE", "1") != "0"
+REPAIR_ATTEMPTS = int(os.getenv("DEVOPSGPT_REPAIR_ATTEMPTS", "2"))
+# Lines shown around a region so the model sees indentation and neighbours
+CONTEXT_LINES = 3
+
+# A failing stretch of the file: 1-based, inclusive line numbers
+Problem = namedtuple('Problem', 'line end message')
+
+ARTIFACT_KINDS = {
+    'dockerfile': 'dockerfile',
+    'dockerfile_patch': 'dockerfile',
+    'docker_ci': 'workflow',
+    'docker_ci_patch': 'workflow',
+    'terraform': 'workflow',
+    'terraform_patch': 'workflow',
+}
+
+KIND_NAMES = {'dockerfile': 'Dockerfile', 'workflow': 'GitHub Actions workflow'}
+
+DOCKERFILE_INSTRUCTIONS = {
+    'FROM', 'RUN', 'CMD', 'LABEL', 'MAINTAINER', 'EXPOSE', 'ENV', 'ADD', 'COPY', 'ENTRYPOINT',
+    'VOLUME', 'USER', 'WORKDIR', 'ARG', 'ONBUILD', 'STOPSIGNAL', 'HEALTHCHECK', 'SHELL',
+}
+
+WORKFLOW_KEYS = {'name', 'run-name', 'on', 'permissions', 'env', 'defaults', 'concurrency', 'jobs'}
+JOB_KEYS = {
+    'name', 'permissions', 'needs', 'if', 'runs-on', 'environment', 'concurrency', 'outputs', 'env',
+    'defaults', 'steps', 'timeout-minutes', 'strategy', 'continue-on-error', 'container', 'services',
+    'uses', 'with', 'secrets',
+}
+STEP_KEYS = {'id', 'if', 'name', 'uses', 'run', 'working-directory', 'shell', 'with', 'env',
+             'continue-on-error', 'timeout-minutes'}
+PERMISSION_LEVELS = {'read', 'write', 'none'}
+
+_FENCE = re.compile(r'^```[\w+-]*[ \t]*\n(.*?)^```[ \t]*$', re.M | re.S)
+_USES = re.compile(r'^(\./\S+|docker://\S+|[\w.-]+/[\w./-]+@[\w./-]+)$')
+_PORT = re.compile(r'^(\d+|\$\{?\w+\}?)(-\d+)?(/(tcp|udp))?$', re.I)
+_HEREDOC = re.compile(r'<<-?\s*["\']?(\w+)["\']?')
+_EXPRESSION = re.compile(r'\$\{\{.*?\}\}', re.S)
+
+
+def kind_of(artifact):
+    """'dockerfile' or 'workflow' for artifacts that can be checked, else None"""
+    return ARTIFACT_KINDS.get(artifact)
+
+
+def clean(text):
+    """Strip a Markdown code fence the model wrapped around the answer"""
+    match = _FENCE.search(text or '')
+    if match:
+        text = match.group(1)
+    return text.strip('\n') + '\n' if text and text.strip() else ''
+
+
+def _instructions(text):
+    """Yield (first line, last line, keyword, arguments) for each Dockerfile instruction"""
+    lines = text.split('\n')
+    escape = '\\'
+    index = 0
+    for line in lines:
+        directive = re.match(r'^#\s*escape\s*=\s*(\S)', line, re.I)
+        if directive:
+            escape = directive.group(1)
+        if not line.startswith('#'):
+            break
+    while index < len(lines):
+        line = lines[index].strip()
+        start = index
+        index += 1
+        if not line or line.startswith('#'):
+            continue
+        parts = [line]
+        while parts[-1].endswith(escape):
+            parts[-1] = parts[-1][:-1]
+            # Comment and blank lines inside a continuation are skipped by Docker
+            while index < len(lines) and lines[index].strip().startswith('#'):
+                index += 1
+            if index >= len(lines):
+                yield start + 1, index, None, "the last instruction ends with a line continuation"
+                return
+            parts.append(lines[index].strip())
+            index += 1
+        joined = ' '.join(part for part in parts if part)
+        heredoc = _HEREDOC.search(joined)
+        if heredoc and joined.split(None, 1)[0].upper() in ('RUN', 'COPY', 'ADD'):
+            while index < len(lines) and lines[index].strip() != heredoc.group(1):
+                index += 1
+            index += 1
+        keyword, _, args = joined.partition(' ')
+        yield start + 1, min(index, len(lines)), keyword, args.strip()
+
+
+def _flags(args):
+    """Split leading --flags off instruction arguments"""
+    words = args.split()
+    flags = {}
+    while words and words[0].startswith('--'):
+        name, _, value = words.pop(0)[2:].partition('=')
+        flags[name.lower()] = value
+    return flags, words
+
+
+def lint_dockerfile(text):
+    """Problems Docker would reject or silently misread, as a list of Problem"""
+    problems = []
+    stages = set()
+    seen_from = False
+    for line, end, keyword, args in _instructions(text):
+        def report(message):
+            problems.append(Problem(line, end, message))
+
+        if keyword is None:
+            report(args)
+            continue
+        name = keyword.upper()
+        if name not in DOCKERFILE_INSTRUCTIONS:
+            report(f"unknown instruction '{keyword}'")
+            continue
+        if not seen_from and name not in ('FROM', 'ARG'):
+            report(f"{name} before the first FROM")
+        if not args:
+            report(f"{name} needs arguments")
+            continue
+
+        if name == 'FROM':
+            seen_from = True
+            _, words = _flags(args)
+            if len(words) == 3 and words[1].lower() == 'as':
+                if words[2].lower() in stages:
+                    report(f"duplicate build stage name '{words[2]}'")
+                stages.add(words[2].lower())
+            elif len(words) != 1:
+                report("FROM takes an image and an optional 'AS name'")
+        elif name in ('COPY', 'ADD'):
+            flags, words = _flags(args)
+            if not _HEREDOC.search(args) and not args.startswith('[') and len(words) < 2:
+                report(f"{name} needs at least one source and a destination")
+            source = flags.get('from')
+            if source and not source.isdigit() and source.lower() not in stages and not re.search(r'[:/.]', source):
+                report(f"COPY --from={source} names no earlier build stage")
+        elif name in ('CMD', 'ENTRYPOINT', 'SHELL', 'VOLUME') and args.startswith('['):
+            try:
+                value = json.loads(args)
+                if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+                    raise ValueError
+            except ValueError:
+                report(f"{name} exec form must be a JSON array of strings")
+        elif name == 'SHELL':
+            report("SHELL must use the JSON array form")
+        elif name == 'EXPOSE':
+            for port in args.split():
+                match = _PORT.match(port)
+                if not match or (match.group(1).isdigit() and not 0 < int(match.group(1)) < 65536):
+                    report(f"invalid port '{port}' in EXPOSE")
+        elif name == 'HEALTHCHECK':
+            word = args.split()[0].upper()
+            if word != 'NONE' and 'CMD' not in args.upper().split():
+                report("HEALTHCHECK needs NONE or CMD")
+        elif name in ('ENV', 'LABEL') and '=' not in args and len(args.split()) < 2:
+            report(f"{name} needs key=value pairs")
+    if not seen_from and not problems:
+        problems.append(Problem(1, 1, "no FROM instruction"))
+    return problems
+
+
+def _last_line(node):
+    # Block nodes end where the next token starts, often at the next line's "- " or key
+    mark = node.end_mark
+    before = mark.buffer[mark.pointer - mark.column:mark.pointer] if mark.buffer else ''
+    if mark.column and before.strip() not in ('', '-'):
+        return mark.line + 1
+    return max(mark.line, node.start_mark.line + 1)
+
+
+def _span(node, message):
+    return Problem(node.start_mark.line + 1, _last_line(node), message)
+
+
+def _pairs(node):
+    return [(key.value, value) for key, value in node.value]
+
+
+def _check_mapping(node, allowed, what, problems):
+    """Flag duplicate and unknown keys of a mapping node; returns {key: value node}"""
+    values = {}
+    for key, value in node.value:
+        name = key.value
+        if name in values:
+            problems.append(_span(key, f"duplicate key '{name}' in {what}"))
+        elif allowed is not None and name not in allowed:
+            problems.append(_span(key, f"unknown key '{name}' in {what}"))
+        values[name] = value
+    return values
+
+
+def _check_expressions(node, problems):
+    if node.id == 'scalar':
+        # Only a ${{ left without its }} is wrong; a bare {{ }} (Go templates, docker --format) is plain text
+        if isinstance(node.value, str) and '${{' in _EXPRESSION.sub('', node.value):
+            problems.append(_span(node, "unbalanced ${{ }} expression"))
+    elif node.id == 'sequence':
+        for item in node.value:
+            _check_expressions(item, problems)
+    elif node.id == 'mapping':
+        for _, value in node.value:
+            _check_expressions(value, problems)
+
+
+def _check_permissions(node, problems):
+    if node.id == 'scalar':
+        if node.value not in ('read-all', 'write-all', '{}'):
+            problems.append(_span(node, "permissions must be read-all, write-all or a mapping"))
+    elif node.id == 'mapping':
+        for name, value in _pairs(node):
+            if value.id != 'scalar' or value.value not in PERMISSION_LEVELS:
+                problems.append(_span(value, f"permission '{name}' must be read, write or none"))
+
+
+def _check_step(step, job, problems):
+    where = f"a step of job '{job}'"
+    if step.id != 'mapping':
+        problems.append(_span(step, f"{where} must be a mapping"))
+        return
+    values = _check_mapping(step, STEP_KEYS, where, problems)
+    if ('uses' in values) == ('run' in values):
+        problems.append(_span(step, f"{where} needs exactly one of 'uses' or 'run'"))
+    uses = values.get('uses')
+    if uses is not None and (uses.id != 'scalar' or not _USES.match(uses.value or '')):
+        problems.append(_span(uses, "'uses' must look like owner/repo@ref, ./path or docker://image"))
+    for key in ('with', 'env'):
+        if key in values and values[key].id != 'mapping':
+            problems.append(_span(values[key], f"'{key}' of {where} must be a mapping"))
+
+
+def check_workflow(text):
+    """YAML and GitHub Actions schema problems, as a list of Problem"""
+    try:
+        import yaml
+    except ImportError:  # Without PyYAML workflows are passed through unchecked
+        return []
+    try:
+        root = yaml.compose(text, Loader=yaml.SafeLoader)
+    except yaml.YAMLError as e:
+        marks = [mark for mark in (getattr(e, 'context_mark', None), getattr(e, 'problem_mark', None)) if mark]
+        lines = [mark.line + 1 for mark in marks] or [1]
+        message = ' '.join(str(part) for part in (getattr(e, 'context', None), getattr(e, 'problem', None)) if part)
+        return [Problem(min(lines), max(lines), f"invalid YAML: {message or e}")]
+
+    last = max(1, text.count('\n'))
+    if root is None or root.id != 'mapping':
+        return [Problem(1, last, "a workflow must be a YAML mapping")]
+    problems = []
+    top = _check_mapping(root, WORKFLOW_KEYS, "the workflow", problems)
+    _check_expressions(root, problems)
+    if 'on' not in top:
+        problems.append(Problem(1, 1, "the workflow has no 'on' trigger"))
+    if 'permissions' in top:
+        _check_permissions(top['permissions'], problems)
+    jobs = top.get('jobs')
+    if jobs is None:
+        problems.append(Problem(last, last, "the workflow has no 'jobs'"))
+        return problems
+    if jobs.id != 'mapping' or not jobs.value:
+        problems.append(_span(jobs, "'jobs' must map job ids to jobs"))
+        return problems
+
+    for key, job in jobs.value:
+        name = key.value
+        if job.id != 'mapping':
+            problems.append(_span(job, f"job '{name}' must be a mapping"))
+            continue
+        values = _check_mapping(job, JOB_KEYS, f"job '{name}'", problems)
+        if 'permissions' in values:
+            _check_permissions(values['permissions'], problems)
+        if 'uses' in values:
+            continue
+        # Missing keys are reported on the job's own line, where they can be added
+        if 'runs-on' not in values:
+            problems.append(_span(key, f"job '{name}' has no 'runs-on'"))
+        steps = values.get('steps')
+        if steps is None or steps.id != 'sequence' or not steps.value:
+            problems.append(_span(steps or key, f"job '{name}' needs a non-empty list of steps"))
+            continue
+        for step in steps.value:
+            _check_step(step, name, problems)
+    return problems
+
+
+def validate(artifact, text):
+    """Problems found in text, a generated artifact; empty when it passes or cannot be checked"""
+    kind = kind_of(artifact)
+    if kind is None or not VALIDATION_ENABLED:
+        return []
+    with metrics.span('validate'):
+        return lint_dockerfile(text) if kind == 'dockerfile' else check_workflow(text)
+
+
+def _regions(problems):
+    """Merge overlapping problem spans into (first, last, messages), sorted by line"""
+    regions = []
+    for problem in sorted(problems):
+        if regions and problem.line <= regions[-1][1] + 1:
+            first, last, messages = regions[-1]
+            regions[-1] = (first, max(last, problem.end), messages + [problem.message])
+        else:
+            regions.append((problem.line, max(problem.line, problem.end), [problem.message]))
+    return regions
+
+
+def repair_prompt(artifact, text, first, last, messages):
+    """Prompt asking the model to rewrite lines first..last of text to fix messages"""
+    lines = text.split('\n')
+    return prompts.template('repair').format(
+        kind=KIND_NAMES[kind_of(artifact)],
+        first=first,
+        last=last,
+        errors='\n'.join(f"- {message}" for message in messages),
+        before='\n'.join(lines[max(0, first - 1 - CONTEXT_LINES):first - 1]) or '(start of file)',
+        region='\n'.join(lines[first - 1:last]),
+        after='\n'.join(lines[last:last + CONTEXT_LINES]) or '(end of file)',
+    )
+
+
+def splice(text, first, last, replacement):
+    """Replace lines first..last of text with replacement"""
+    lines = text.split('\n')
+    fix = replacement.rstrip('\n').split('\n') if replacement.strip() else []
+    return '\n'.join(lines[:first - 1] + fix + lines[last:])
+
+
+def repair(artifact, text, complete, attempts=None):
+    """Validate text and fix failing regions through complete(prompt); returns (text, remaining problems)
+
+    Each round sends every failing region (merged when they touch) and
+    splices the answers in bottom-up, so earlier line numbers stay valid.
+    """
+    if kind_of(artifact) is None or not VALIDATION_ENABLED or not (text or '').strip():
+        return text, []
+    text = clean(text)
+    problems = validate(artifact, text)
+    for _ in range(REPAIR_ATTEMPTS if attempts is None else attempts):
+        if not problems:
+            break
+        for first, last, messages in reversed(_regions(problems)):
+            fix = complete(repair_prompt(artifact, text, first, last, messages))
+            text = splice(text, first, last, clean(fix))
+        problems = validate(artifact, text)
+    return text, problems
+
+
+def describe(problems):
+    """One line per problem, for warnings"""
+    return '\n'.join(f"  line {problem.line}: {problem.message}" for problem in problems)
@@ -0,0 +1,222 @@
+"""Regenerate a manifest's artifacts when their inputs change.
+
+Watches the files each artifact is generated from and regenerates only
+the artifacts whose inputs really changed. A Dockerfile depends on the
+files the project analyzer and the Dockerfile templates read in its
+service directory (dependency manifests such as requirements.txt and
+package.json, lockfiles, entry points, files that name a port and
+toolchain files such as .ruby-version), see dockerfiles.input_paths. A
+workflow depends only on its
+service's fields in the batch manifest (see batch.py), which is watched
+as well.
+
+File events come from watchdog (inotify on Linux, FSEvents on macOS) when
+it is installed (it is optional: pip install watchdog), otherwise from
+polling mtimes every DEVOPSGPT_WATCH_POLL seconds. Bursts of events (a branch switch, npm install) are debounced
+until nothing has changed for DEVOPSGPT_WATCH_DEBOUNCE seconds. Then the
+inputs of every artifact are hashed by content, and only the artifacts
+whose hash differs from the last run go through batch.run_batch, with the
+batch journal and the skip-if-unchanged writer. Touching a file without
+changing it, or saving the generated files themselves, regenerates
+nothing. An artifact that fails is tried again when its inputs change or
+the watcher restarts.
+
+Usage: python -m devopsgpt.watch manifest.yaml [--provider ollama] [--workers 8] [--debounce 2] [--once]
+"""
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+
+from devopsgpt import batch, dockerfiles, journal
+
+DEBOUNCE = float(os.getenv("DEVOPSGPT_WATCH_DEBOUNCE", "2.0"))
+POLL_INTERVAL = float(os.getenv("DEVOPSGPT_WATCH_POLL", "1.0"))
+
+# Manifest fields each artifact is rendered from (see batch.job_plan)
+INPUT_FIELDS = {
+    'dockerfile': ('language', 'extra_requirement'),
+    'docker_ci': ('branch', 'app_dir', 'path', 'dockerhub_user', 'image_name', 'ci_customization'),
+    'terraform': ('cloud', 'branch', 'tf_dir', 'terraform_customization'),
+}
+
+
+def job_inputs(job, outputs=()):
+    """Files that decide job's output, leaving out generated files"""
+    if job['artifact'] != 'dockerfile':
+        return []
+    return [path for path in dockerfiles.input_paths(job['root']) if path not in outputs]
+
+
+def input_hash(job, outputs=()):
+    """Hash of the job's fields and the contents of its input files (missing files count too)"""
+    contents = {}
+    for path in job_inputs(job, outputs):
+        try:
+            contents[str(path)] = journal.content_hash(path.read_bytes())
+        except IsADirectoryError:
+            contents[str(path)] = 'directory'  # Only its presence matters, e.g. PHP's public/
+        except OSError:
+            contents[str(path)] = None
+    fields = {name: job['fields'].get(name) for name in INPUT_FIELDS[job['artifact']]}
+    return journal.fingerprint(job['artifact'], fields, str(job['root']), str(job['target']), contents)
+
+
+def plan(manifest_path):
+    """(provider, jobs, hashes by job ID, paths to watch) for the manifest as it is now"""
+    manifest = batch.load_manifest(manifest_path)
+    jobs = batch.plan_jobs(manifest, manifest_path.parent)
+    outputs = {job['target'] for job in jobs}
+    hashes = {job['id']: input_hash(job, outputs) for job in jobs}
+    paths = {manifest_path}
+    for job in jobs:
+        paths.update(job_inputs(job, outputs))
+    return manifest.get('provider'), jobs, hashes, paths
+
+
+class _Poller:
+    """Sets changed whenever the mtime or size of a watched path changes"""
+
+    def __init__(self, paths, changed, interval=POLL_INTERVAL):
+        self.paths = sorted(paths)
+        self.changed = changed
+        self.interval = interval
+        self._stop = threading.Event()
+        self._seen = self._signature()
+        threading.Thread(target=self._run, name='watch-poller', daemon=True).start()
+
+    def _signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            seen = self._signature()
+            if seen != self._seen:
+                self._seen = seen
+                self.changed.set()
+
+    def stop(self):
+        self._stop.set()
+
+
+class _Observer:
+    """Sets changed on filesystem events for watched paths, through watchdog"""
+
+    def __init__(self, paths, changed):
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        # Watch the nearest existing directory of each path, and count the creation of any
+        # missing directory in between, so files that do not exist yet are seen when they appear
+        relevant = set()
+        directories = set()
+        for path in paths:
+            relevant.add(str(path))
+            directory = path.parent
+            while not directory.is_dir() and directory != directory.parent:
+                relevant.add(str(directory))
+                directory = directory.parent
+            directories.add(directory)
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.src_path in relevant or getattr(event, 'dest_path', None) in relevant:
+                    changed.set()
+
+        self._observer = Observer()
+        for directory in sorted(directories):
+            self._observer.schedule(Handler(), str(directory), recursive=False)
+        self._observer.start()
+
+    def stop(self):
+        self._observer.stop()
+        self._observer.join()
+
+
+def _events(paths, changed):
+    try:
+        return _Observer(paths, changed)
+    except ImportError:
+        return _Poller(paths, changed)
+
+
+def _regenerate(jobs, provider, workers, rpm, tpm, journal_path):
+    summary = batch.run_batch(jobs, provider, workers, rpm, tpm, journal_path)
+    for result in summary['results']:
+        detail = result.get('write') or result.get('error') or ''
+        print(f"{result['id']}: {result['status']}{f' ({detail})' if detail else ''}", flush=True)
+
+
+def watch(manifest_path, provider=None, workers=batch.DEFAULT_WORKERS, rpm=None, tpm=None, debounce=DEBOUNCE,
+          journal_path=None, once=False):
+    """Bring every artifact up to date, then regenerate changed ones on every settled change until interrupted"""
+    manifest_path = Path(manifest_path).resolve()
+    changed = threading.Event()
+    manifest_provider, jobs, hashes, paths = plan(manifest_path)
+    source = None if once else _events(paths, changed)
+    if source is not None:
+        mode = 'polling' if isinstance(source, _Poller) else 'watchdog'
+        print(f"Watching {len(paths)} files for {len(jobs)} artifacts ({mode})", flush=True)
+    try:
+        # The first pass brings everything up to date; the journal skips what already is
+        _regenerate(jobs, provider or manifest_provider or batch.DEFAULT_PROVIDER, workers, rpm, tpm, journal_path)
+        # Failed jobs too: they are retried when their inputs change, not on every unrelated event
+        current = dict(hashes)
+        while source is not None:
+            changed.wait()
+            # Debounce: wait until a whole interval passes without another change
+            while True:
+                changed.clear()
+                if not changed.wait(debounce):
+                    break
+            try:
+                manifest_provider, jobs, hashes, paths = plan(manifest_path)
+            except (OSError, ValueError, RuntimeError) as e:
+                print(f"Cannot read {manifest_path}: {e}", flush=True)
+                continue
+            stale = [job for job in jobs if hashes[job['id']] != current.get(job['id'])]
+            if stale:
+                print(f"Inputs changed for {', '.join(job['id'] for job in stale)}", flush=True)
+                _regenerate(stale, provider or manifest_provider or batch.DEFAULT_PROVIDER, workers, rpm, tpm, journal_path)
+                current.update((job['id'], hashes[job['id']]) for job in stale)
+            # Services, directories and files may have come and gone
+            source.stop()
+            source = _events(paths, changed)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if source is not None:
+            source.stop()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Regenerate a manifest's artifacts whenever their inputs change")
+    parser.add_argument('manifest', help="YAML or JSON manifest listing services (see batch.py)")
+    parser.add_argument('--provider', help=f"backend to use (default: manifest 'provider' or {batch.DEFAULT_PROVIDER})")
+    parser.add_argument('--workers', type=int, default=batch.DEFAULT_WORKERS, help="concurrent generations")
+    parser.add_argument('--rpm', type=int, help="requests per minute allowed for the provider")
+    parser.add_argument('--tpm', type=int, help="tokens per minute allowed for the provider")
+    parser.add_argument('--debounce', type=float, default=DEBOUNCE, help="seconds of quiet before regenerating")
+    parser.add_argument('--journal', help="progress journal (default: <manifest>.journal.jsonl next to the manifest)")
+    parser.add_argument('--no-journal', action='store_true', help="do not record or skip finished jobs")
+    parser.add_argument('--once', action='store_true', help="bring everything up to date once and exit")
+    args = parser.parse_args(argv)
+    journal_path = None if args.no_journal else args.journal or batch.default_journal_path(args.manifest)
+    try:
+        return watch(args.manifest, args.provider, args.workers, args.rpm, args.tpm, args.debounce, journal_path, args.once)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""GitHub Actions workflows built from a typed spec instead of the model.
+
+The Docker CI and Terraform workflows the scripts ask for are fully
+determined by a handful of inputs (branches, directories, image name,
+cloud credentials), so they are assembled here as plain data and
+serialized straight to YAML: no model round trip, no invalid output, and
+hundreds of repositories take well under a second. The model is only
+involved when the user asks for a free-form customisation, and then it
+patches the rendered workflow.
+
+Set DEVOPSGPT_WORKFLOW_TEMPLATES=0 to always generate with the model.
+"""
+import json
+import os
+import re
+from dataclasses import dataclass, field
+
+TEMPLATES_ENABLED = os.getenv("DEVOPSGPT_WORKFLOW_TEMPLATES", "1") != "0"
+
+# Secrets each cloud's Terraform provider reads from the environment
+CLOUD_SECRETS = {
+    'aws': ('AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY'),
+    'azure': ('ARM_CLIENT_ID', 'ARM_CLIENT_SECRET', 'ARM_SUBSCRIPTION_ID', 'ARM_TENANT_ID'),
+    'google': ('GOOGLE_CREDENTIALS',),
+}
+
+CLOUD_ALIASES = {
+    'aws': 'aws', 'amazon': 'aws',
+    'azure': 'azure', 'microsoft': 'azure',
+    'google': 'google', 'gcp': 'google', 'gcloud': 'google',
+}
+
+TF_LOG_LEVEL = 'INFO'
+
+_PLAIN_KEY = re.compile(r'^[A-Za-z_][\w.-]*$')
+# Anything starting with a digit is quoted, which sidesteps YAML 1.1 numbers, dates and times
+_PLAIN_VALUE = re.compile(r'^[A-Za-z_$./(][^\n#:]*$')
+_YAML_KEYWORDS = {'y', 'n', 'yes', 'no', 'true', 'false', 'on', 'off', 'null', '~', '.inf', '.nan'}
+_DOT_NUMBER = re.compile(r'^\.\d')
+
+
+@dataclass
+class DockerCISpec:
+    """Inputs of the Docker build-and-push workflow"""
+    dockerhub_user: str
+    image_name: str
+    branches: list = field(default_factory=lambda: ['main'])
+    app_dir: str = '.'
+
+
+@dataclass
+class TerraformSpec:
+    """Inputs of the Terraform fmt/scan/lint/validate/plan workflow"""
+    cloud: str
+    branches: list = field(default_factory=lambda: ['main'])
+    tf_dir: str = '.'
+    secrets: tuple = ()
+
+
+def parse_branches(branch):
+    """Split the user's comma- or space-separated branch answer; defaults to main"""
+    if isinstance(branch, (list, tuple)):
+        names = [str(name).strip() for name in branch]
+    else:
+        names = re.split(r'[,\s]+', branch or '')
+    seen = []
+    for name in names:
+        if name and name not in seen:
+            seen.append(name)
+    return seen or ['main']
+
+
+def normalize_cloud(cloud):
+    """Map what the user typed to aws, azure or google, or None"""
+    return CLOUD_ALIASES.get((cloud or '').strip().lower())
+
+
+def _secret(name):
+    return '${{ secrets.%s }}' % name
+
+
+def _path(directory, name=None):
+    directory = (str(directory) or '.').strip().rstrip('/') or '.'
+    if name is None:
+        return directory
+    return name if directory == '.' else f"{directory}/{name}"
+
+
+def docker_ci(spec):
+    """The Docker CI workflow for spec as a dict, in the order it should be written"""
+    image = f"{spec.dockerhub_user}/{spec.image_name}"
+    return {
+        'name': 'Docker Build and Push',
+        'on': {
+            'push': {'branches': parse_branches(spec.branches)},
+            'workflow_dispatch': None,
+        },
+        'permissions': {'contents': 'read'},
+        'concurrency': {'group': '${{ github.workflow }}-${{ github.ref }}', 'cancel-in-progress': True},
+        'jobs': {
+            'build-and-push': {
+                'runs-on': 'ubuntu-latest',
+                'steps': [
+                    {'name': 'Checkout', 'uses': 'actions/checkout@v4'},
+                    {'name': 'Set up Docker Buildx', 'uses': 'docker/setup-buildx-action@v3'},
+                    {
+                        'name': 'Log in to Docker Hub',
+                        'uses': 'docker/login-action@v3',
+                        'with': {
+                            'username': _secret('DOCKERHUB_USERNAME'),
+                            'password': _secret('DOCKERHUB_TOKEN'),
+                        },
+                    },
+                    {
+                        'name': 'Build and push',
+                        'uses': 'docker/build-push-action@v6',
+                        'with': {
+                            'context': _path(spec.app_dir),
+                            'file': _path(spec.app_dir, 'Dockerfile'),
+                            'push': True,
+                            'tags': f"{image}:latest\n{image}:${{{{ github.sha }}}}\n",
+                            'cache-from': 'type=gha',
+                            'cache-to': 'type=gha,mode=max',
+                        },
+                    },
+                ],
+            },
+        },
+    }
+
+
+PLAN_COMMENT_SCRIPT = """const output = `#### Terraform Format and Style \\`${{ steps.fmt.outcome }}\\`
+#### Terraform Security Scan \\`${{ steps.tfsec.outcome }}\\`
+#### Terraform Lint \\`${{ steps.tflint.outcome }}\\`
+#### Terraform Initialization \\`${{ steps.init.outcome }}\\`
+#### Terraform Validation \\`${{ steps.validate.outcome }}\\`
+#### Terraform Plan \\`${{ steps.plan.outcome }}\\`
+
+<details><summary>Show Plan</summary>
+
+\\`\\`\\`terraform
+${process.env.PLAN}
+\\`\\`\\`
+
+</details>
+
+*Pushed by: @${{ github.actor }}, Action: \\`${{ github.event_name }}\\`, Working Directory: \\`${{ env.TF_DIR }}\\`*`;
+
+github.rest.issues.createComment({
+  issue_number: context.issue.number,
+  owner: context.repo.owner,
+  repo: context.repo.repo,
+  body: output
+})
+"""
+
+
+def terraform(spec):
+    """The Terraform workflow for spec as a dict, in the order it should be written
+
+    A main branch is only checked on pull requests, as the prompt always
+    asked; other branches run on push.
+    """
+    branches = parse_branches(spec.branches)
+    triggers = {}
+    if 'main' in branches:
+        triggers['pull_request'] = {'branches': ['main']}
+    pushed = [name for name in branches if name != 'main']
+    if pushed:
+        triggers['push'] = {'branches': pushed}
+
+    tf_dir = _path(spec.tf_dir)
+    env = {'GITHUB_TOKEN': _secret('GITHUB_TOKEN')}
+    env.update((name, _secret(name)) for name in spec.secrets or CLOUD_SECRETS.get(normalize_cloud(spec.cloud), ()))
+    env.update(TF_DIR=tf_dir, TF_LOG=TF_LOG_LEVEL, TF_IN_AUTOMATION='true')
+
+    return {
+        'name': 'Terraform',
+        'on': triggers,
+        'permissions': {'contents': 'read', 'pull-requests': 'write'},
+        'jobs': {
+            'terraform': {
+                'runs-on': 'ubuntu-latest',
+                'env': env,
+                'defaults': {'run': {'working-directory': tf_dir}},
+                'steps': [
+                    {'name': 'Checkout', 'uses': 'actions/checkout@v4'},
+                    {'name': 'Setup Terraform', 'uses': 'hashicorp/setup-terraform@v3'},
+                    {'name': 'Terraform fmt', 'id': 'fmt', 'run': 'terraform fmt -check -recursive',
+                     'continue-on-error': True},
+                    {'name': 'Terraform init', 'id': 'init', 'run': 'terraform init -input=false'},
+                    {'name': 'tfsec scan', 'id': 'tfsec', 'uses': 'aquasecurity/tfsec-action@v1.0.3',
+                     'with': {'working_directory': tf_dir, 'soft_fail': True}},
+                    {'name': 'Setup TFLint', 'uses': 'terraform-linters/setup-tflint@v4'},
+                    {'name': 'TFLint', 'id': 'tflint', 'run': 'tflint --init\ntflint -f compact\n',
+                     'continue-on-error': True},
+                    {'name': 'Terraform validate', 'id': 'validate', 'run': 'terraform validate -no-color'},
+                    {'name': 'Terraform plan', 'id': 'plan', 'run': 'terraform plan -no-color -input=false',
+                     'continue-on-error': True},
+                    {
+                        'name': 'Comment plan on pull request',
+                        'if': "github.event_name == 'pull_request'",
+                        'uses': 'actions/github-script@v7',
+                        'env': {'PLAN': 'terraform\n${{ steps.plan.outputs.stdout }}\n'},
+                        'with': {'github-token': _secret('GITHUB_TOKEN'), 'script': PLAN_COMMENT_SCRIPT},
+                    },
+                    {'name': 'Fail on plan error', 'if': "steps.plan.outcome == 'failure'", 'run': 'exit 1'},
+                ],
+            },
+        },
+    }
+
+
+def _scalar(value):
+    if value is None:
+        return ''
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = str(value)
+    if (not _PLAIN_VALUE.match(text) or text != text.strip() or text.lower() in _YAML_KEYWORDS
+            or _DOT_NUMBER.match(text)):
+        # A JSON string is a valid double-quoted YAML scalar
+        return json.dumps(text, ensure_ascii=False)
+    return text
+
+
+def _key(key):
+    key = str(key)
+    # 'on' stays bare as GitHub writes it; Actions reads keys as strings
+    if key == 'on' or (_PLAIN_KEY.match(key) and key.lower() not in _YAML_KEYWORDS):
+        return key
+    return json.dumps(key, ensure_ascii=False)
+
+
+def _lines(value, indent):
+    pad = ' ' * indent
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _entry(f"{pad}{_key(key)}:", item, indent)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            if isinstance(item, dict) and item:
+                first = True
+                for line in _lines(item, indent + 2):
+                    yield f"{pad}- {line[indent + 2:]}" if first else line
+                    first = False
+            else:
+                yield from _entry(f"{pad}-", item, indent)
+    else:
+        yield f"{pad}{_scalar(value)}"
+
+
+def _entry(prefix, value, indent):
+    if isinstance(value, dict) and value:
+        yield prefix
+        yield from _lines(value, indent + 2)
+    elif isinstance(value, (list, tuple)) and value:
+        yield prefix
+        yield from _lines(value, indent + 2)
+    elif isinstance(value, str) and '\n' in value and not value.endswith('\n\n') and not value[:1].isspace():
+        # Literal block: '|' keeps the single trailing newline, '|-' means there was none
+        yield f"{prefix} |" if value.endswith('\n') else f"{prefix} |-"
+        for line in value.rstrip('\n').split('\n'):
+            yield f"{' ' * (indent + 2)}{line}" if line else ''
+    elif isinstance(value, (dict, list, tuple)):
+        yield f"{prefix} {'{}' if isinstance(value, dict) else '[]'}"
+    elif value is None:
+        yield prefix
+    else:
+        yield f"{prefix} {_scalar(value)}"
+
+
+def dump_yaml(data):
+    """Serialize nested dicts, lists and scalars as block-style YAML, keeping key order"""
+    return "\n".join(_lines(data, 0)) + "\n"
+
+
+def render_docker_ci(branch, app_dir, dockerhub_user, image_name):
+    """Docker CI workflow YAML, or None when templates are turned off"""
+    if not TEMPLATES_ENABLED:
+        return None
+    spec = DockerCISpec(dockerhub_user.strip(), image_name.strip(), parse_branches(branch), app_dir or '.')
+    return dump_yaml(docker_ci(spec))
+
+
+def render_terraform(cloud, branch, tf_dir='.'):
+    """Terraform workflow YAML, or None when templates are off or the cloud is unknown"""
+    cloud = normalize_cloud(cloud)
+    if not TEMPLATES_ENABLED or cloud is None:
+        return None
+    spec = TerraformSpec(cloud, parse_branches(branch), tf_dir or '.', CLOUD_SECRETS[cloud])
+    return dump_yaml(terraform(spec))
@@ -0,0 +1,135 @@
+"""Atomic writes of generated files that leave unchanged files alone.
+
+Rewriting a Dockerfile or workflow with identical content still bumps its
+mtime, which invalidates Docker build caches and wakes path-filtered CI.
+write_file() hashes the new content against the file on disk and only
+writes when they differ. Writes go to a temporary file in the same
+directory, are fsynced and then renamed over the target, so a crash never
+leaves a half-written file behind. An existing file keeps its permissions.
+
+WriteBatch collects the files of a batch run and writes them in one pass,
+syncing each directory once, and reports every file as created, changed or
+unchanged.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+from devopsgpt import metrics
+
+CREATED = 'created'
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+
+
+def _digest(data):
+    return hashlib.sha256(data).digest()
+
+
+def status_of(path, data):
+    """CREATED, CHANGED or UNCHANGED for writing data (bytes) to path"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return CREATED
+    if stat.st_size != len(data):
+        return CHANGED
+    with open(path, 'rb') as f:
+        return UNCHANGED if _digest(f.read()) == _digest(data) else CHANGED
+
+
+def _fsync_dir(directory):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # Not supported on every platform
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _create_temp(path):
+    """Open a new temporary file next to path, with the mode open() gives a new file under the umask"""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        tmp = path.parent / f".{path.name}.{os.urandom(4).hex()}.tmp"
+        try:
+            return os.open(tmp, flags, 0o666), tmp
+        except FileExistsError:
+            continue
+
+
+def _replace(path, data):
+    try:
+        mode = os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        mode = None  # A new file keeps the mode it was created with
+    fd, tmp = _create_temp(path)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_file(path, content, provider=None, artifact=None, sync_dir=True):
+    """Write content to path unless it is already there; returns CREATED, CHANGED or UNCHANGED"""
+    path = Path(path)
+    data = content.encode('utf-8')
+    status = status_of(path, data)
+    if status == UNCHANGED:
+        return status
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with metrics.file_write(provider, artifact, path, content):
+        _replace(path, data)
+    if sync_dir:
+        _fsync_dir(path.parent)
+    return status
+
+
+class WriteBatch:
+    """Files staged during a run and written together by commit()"""
+
+    def __init__(self):
+        self.staged = {}
+
+    def add(self, path, content, provider=None, artifact=None):
+        """Stage a file; a later add for the same path replaces the earlier one"""
+        self.staged[Path(path)] = (content, provider, artifact)
+
+    def commit(self):
+        """Write every staged file; returns {path: status or 'failed: <error>'}"""
+        report = {}
+        directories = set()
+        for path, (content, provider, artifact) in self.staged.items():
+            try:
+                report[str(path)] = status = write_file(path, content, provider, artifact, sync_dir=False)
+            except OSError as e:
+                report[str(path)] = f"failed: {e}"
+                continue
+            if status != UNCHANGED:
+                directories.add(path.parent)
+        for directory in directories:
+            _fsync_dir(directory)
+        self.staged.clear()
+        return report
+
+
+def count(report):
+    """Number of files per status in a commit() report"""
+    totals = {CREATED: 0, CHANGED: 0, UNCHANGED: 0, 'failed': 0}
+    for status in report.values():
+        totals[status if status in totals else 'failed'] += 1
+    return totals
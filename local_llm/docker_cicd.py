@@ -1,56 +1,30 @@
-
-import ollama
-from pathlib import Path
 import os
+import sys
+from pathlib import Path
 
-
-PROMPT_TEMPLATE = """
-Generate a GitHub Action YAML file that builds a Docker image from the application's Dockerfile and pushes it to Docker Hub.
-
-Requirements:
-1. The workflow should trigger on pushes to these branches: {BRANCH}.
-2. The Dockerfile is located in this directory: {APP_DIR}
-3. The job should:
-   - Set up Docker Buildx
-   - Log in to Docker Hub using secrets: `DOCKERHUB_USERNAME` and `DOCKERHUB_TOKEN`
-   - Build the Docker image with the appropriate tag: `{DOCKERHUB_USERNAME}/{IMAGE_NAME}:latest`
-   - Push the image to Docker Hub
-4. Follow GitHub security and Docker best practices.
-5. Output only the GitHub Actions YAML file.
-"""
-
-
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from devopsgpt import console, daemon, writer
 
 
-def generate_docker_ci(branch, app_dir, dockerhub_user, image_name):
+def generate_docker_ci(branch, app_dir, dockerhub_user, image_name, on_chunk=None, customization=None):
     """Generate GitHub Actions YAML for Docker build and push"""
-    prompt = PROMPT_TEMPLATE.format(
-        BRANCH=branch,
-        APP_DIR=app_dir,
-        DOCKERHUB_USERNAME=dockerhub_user,
-        IMAGE_NAME=image_name
-    )
-
     try:
-        response = ollama.chat(
-            model='llama3',
-            messages=[{'role': 'user', 'content': prompt}],
-            options={'temperature': 0.2}
+        return daemon.request(
+            'docker_ci', 'ollama', on_chunk=on_chunk, branch=branch, app_dir=app_dir,
+            dockerhub_user=dockerhub_user, image_name=image_name, customization=customization
         )
-        return response['message']['content']
     except Exception as e:
         print(f"Error generating GitHub Action YAML: {e}")
         return None
-    
-
 
 def save_yamlfile(content, path='.'):
     """Save generated YAML file"""
     yamlfile_path = Path(path) / 'docker-ci.yml'
     try:
-        with open(yamlfile_path, 'w') as f:
-            f.write(content)
-        print(f"\n YAML file saved to: {yamlfile_path.resolve()}")
+        if writer.write_file(yamlfile_path, content, 'ollama', 'docker_ci') == writer.UNCHANGED:
+            print(f"\n YAML file unchanged: {yamlfile_path.resolve()}")
+        else:
+            print(f"\n YAML file saved to: {yamlfile_path.resolve()}")
     except Exception as e:
         print(f" Error saving YAML file: {e}")
 
@@ -72,12 +46,19 @@ def main():
         print(" Docker Hub username and image name are required.")
         return
 
+    customization = input("Any customisation for the workflow? (type 'no' to skip): ").strip()
+
     print("\n🚀 Generating GitHub Action YAML for Docker...")
-    yamlfile = generate_docker_ci(branch, app_dir, dockerhub_user, image_name)
+    printer = console.StreamPrinter("\n--- Generated YAML ---\n")
+    try:
+        yamlfile = generate_docker_ci(branch, app_dir, dockerhub_user, image_name, on_chunk=printer,
+                                      customization=customization)
+    except KeyboardInterrupt:
+        print("\nGeneration cancelled.")
+        return
 
     if yamlfile:
-        print("\n--- Generated YAML ---\n")
-        print(yamlfile)
+        printer.finish(yamlfile)
 
         save = input("\n Save this YAML to file? (y/n): ").lower()
         if save == 'y':
@@ -87,4 +68,4 @@ def main():
         print(" Failed to generate the GitHub Action YAML")
 
 if __name__ == '__main__':
-    main(
\ No newline at end of file
+    main()
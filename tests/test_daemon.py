@@ -0,0 +1,80 @@
+"""Smoke test for the resident daemon: serve, ping, one request, stop.
+
+The daemon listens on a socket in a temporary directory and answers with
+a stub provider, so no model or SDK is needed.
+"""
+import threading
+import time
+
+import pytest
+
+from devopsgpt import cache, daemon, providers
+
+
+def _echo(prompt, model, temperature, max_tokens, state):
+    return "Add the stub feature"
+
+
+@pytest.fixture
+def running_daemon(tmp_path, monkeypatch):
+    if not daemon.HAS_UNIX_SOCKETS:
+        pytest.skip("needs Unix sockets")
+    monkeypatch.setattr(daemon, 'SOCKET_PATH', str(tmp_path / 'daemon.sock'))
+    monkeypatch.setattr(cache, 'CACHE_ENABLED', False)
+    monkeypatch.setattr(cache, '_default', cache.TieredCache([cache.MemoryTier()]))
+    # Through monkeypatch, so the stub leaves the global registry after the test
+    stub = providers.ProviderSpec('stub', 'stub-model', streaming=False, call=_echo)
+    monkeypatch.setitem(providers._registry, 'stub', stub)
+
+    errors = []
+
+    def serve():
+        try:
+            daemon.serve([], idle_timeout=0)
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while daemon.status() is None:
+        assert not errors, errors
+        assert time.monotonic() < deadline, "daemon did not come up"
+        time.sleep(0.02)
+    yield tmp_path / 'daemon.sock'
+    daemon.stop()
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert not errors, errors
+
+
+def test_serve_ping_request_stop(running_daemon):
+    info = daemon.status()
+    assert info['served'] == 0
+
+    chunks = []
+    message = daemon.request('commit', 'stub', on_chunk=chunks.append, diff_text="diff --git a/x b/x\n+x\n")
+    assert message == "Add the stub feature"
+    assert ''.join(chunks) == message
+    assert daemon.status()['served'] == 1
+
+
+def test_warm_accepts_provider_list(monkeypatch):
+    monkeypatch.setattr(cache, '_default', cache.TieredCache([cache.MemoryTier()]))
+    daemon.warm([])
+
+
+def test_failed_warm_up_leaves_no_socket(tmp_path, monkeypatch):
+    if not daemon.HAS_UNIX_SOCKETS:
+        pytest.skip("needs Unix sockets")
+    socket_path = tmp_path / 'daemon.sock'
+    monkeypatch.setattr(daemon, 'SOCKET_PATH', str(socket_path))
+
+    def broken(providers):
+        raise RuntimeError("no credentials")
+
+    monkeypatch.setattr(daemon, 'warm', broken)
+    with pytest.raises(RuntimeError):
+        daemon.serve([], idle_timeout=0)
+    assert not socket_path.exists()
+    assert daemon.status() is None
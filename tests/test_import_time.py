@@ -0,0 +1,65 @@
+"""Cold-start budget for the command-line entry point.
+
+Each check runs in a fresh interpreter, since anything already imported
+by pytest would make the measurement meaningless. Raise the budget on slow
+machines with DEVOPSGPT_IMPORT_BUDGET (seconds).
+"""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+IMPORT_BUDGET = float(os.getenv("DEVOPSGPT_IMPORT_BUDGET", "0.15"))
+RUNS = 3
+
+# Provider SDKs and other heavy dependencies that must only load on first use
+HEAVY_MODULES = ('ollama', 'boto3', 'botocore', 'google.generativeai', 'httpx', 'requests', 'numpy', 'yaml', 'tiktoken')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+for name in sys.argv[1:]:
+    __import__(name)
+seconds = time.perf_counter() - started
+print(json.dumps({'seconds': seconds, 'modules': sorted(sys.modules)}))
+"""
+
+
+def _probe(*modules):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE, *modules],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def _heavy(loaded):
+    return sorted(name for name in loaded if any(name == heavy or name.startswith(heavy + '.') for heavy in HEAVY_MODULES))
+
+
+def test_cli_imports_within_budget():
+    # The fastest of a few runs, so a busy machine does not fail the build
+    seconds = min(_probe('devopsgpt.cli', 'devopsgpt.daemon', 'devopsgpt.gitdiff')['seconds'] for _ in range(RUNS))
+    assert seconds < IMPORT_BUDGET, f"importing the CLI took {seconds:.3f}s (budget {IMPORT_BUDGET}s)"
+
+
+def test_cli_loads_no_provider_sdk():
+    loaded = _probe('devopsgpt.cli', 'devopsgpt.daemon', 'devopsgpt.gitdiff', 'devopsgpt.console')['modules']
+    assert _heavy(loaded) == []
+
+
+def test_generators_defer_provider_sdks():
+    loaded = _probe('devopsgpt.generators', 'devopsgpt.commitmsg', 'devopsgpt.batch')['modules']
+    assert _heavy(loaded) == []
+
+
+def test_help_runs_without_loading_generators():
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'devopsgpt', '--help'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    assert 'dockerfile' in result.stdout
+    assert 'devopsgpt.generators' not in result.stderr